@@ -1,7 +1,18 @@
 #!/usr/bin/env python3
+import typing
 
-from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation as Bunkai
+if typing.TYPE_CHECKING:
+    from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation as Bunkai
 
 __all__ = ["Bunkai"]
 __version_info__ = (1, 5, 7)
 __version__ = ".".join(map(str, __version_info__))
+
+
+def __getattr__(name: str) -> typing.Any:
+    # the pipeline is imported on first use since Janome and emoji data are slow to load
+    if name == "Bunkai":
+        from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+
+        return BunkaiSentenceBoundaryDisambiguation
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
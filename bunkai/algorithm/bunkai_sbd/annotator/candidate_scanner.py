@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import re
+import typing
+
+from bunkai.algorithm.bunkai_sbd.annotator import constant
+from bunkai.algorithm.bunkai_sbd.annotator.facemark_matcher import DEFAULT_FACEMARK_MATCHER
+from bunkai.base.annotation import Annotations
+
+"""
+This module finds boundary candidates of the rule-based annotators in one pass over a text.
+
+The candidates of a rule are the same as finditer of its regular expression below.
+"""
+
+# candidates of FaceMarkDetector, found by FaceMarkMatcher
+RE_FACEMARK = re.compile(constant.FACE_EXPRESSION_REGEXP)
+# candidates of EmotionExpressionAnnotator
+PARENT_EMOTION = "|".join(constant.EMOTION_CHARACTERS + constant.EMOTION_EXPRESSIONS)
+RE_PARENT_EMOTION = re.compile(
+    r"[（\(](" + PARENT_EMOTION + r")[\)）]" + "|" + f"[{constant.EMOTION_SYMBOLS}]+[{constant.PUNCTUATIONS}]?"
+)
+# candidates of BasicRule
+RE_SENT_SPLIT = re.compile("[" + constant.PUNCTUATIONS + r"]+\s*")
+# candidates of LinebreakForceAnnotator
+RE_LBS = re.compile(r"[\n\s]*\n[\n\s]*")
+
+OPENING_PARENTHESES: str = "（("
+# every candidate contains one of these characters
+TRIGGERS: str = OPENING_PARENTHESES + constant.EMOTION_SYMBOLS + constant.PUNCTUATIONS + "\n"
+RE_TRIGGER = re.compile("[" + re.escape(TRIGGERS) + "]")
+# One alternative per kind of candidate. The lookahead lets the scan skip to triggers in C.
+# A single scan cannot return overlapping candidates of different rules, so they are restored in scan():
+# - the whitespace after punctuations in BasicRule can be a candidate of LinebreakForceAnnotator.
+# - a candidate of LinebreakForceAnnotator starts at the whitespace before the first line break.
+# - a punctuation after emotion symbols belongs to both EmotionExpressionAnnotator and BasicRule.
+# - facemarks are found by FaceMarkMatcher from the opening parentheses.
+RE_CANDIDATES = re.compile(
+    f"(?={RE_TRIGGER.pattern})(?:"
+    + "|".join(
+        [
+            rf"(?P<punctuations>[{constant.PUNCTUATIONS}]+)(?P<spaces>[^\S\n]*)(?P<linebreaks_after>\n\s*)?",
+            rf"(?P<parent_emotion>[（\(](?:{PARENT_EMOTION})[\)）])",
+            f"(?P<open>[{OPENING_PARENTHESES}])",
+            f"(?P<emotion_symbols>[{constant.EMOTION_SYMBOLS}]+)",
+            r"(?P<linebreaks>\n\s*)",
+        ]
+    )
+    + ")"
+)
+
+RESOURCE_NAME = "CandidateScanner"
+
+
+def scan(text: str) -> typing.Dict[str, typing.List[typing.Tuple[int, int]]]:
+    """Find (start, end) of candidates per rule with one finditer over the text."""
+    __facemark_opens: typing.List[int] = []
+    __emotion: typing.List[typing.Tuple[int, int]] = []
+    __basic: typing.List[typing.Tuple[int, int]] = []
+    __linebreak: typing.List[typing.Tuple[int, int]] = []
+    for match_obj in RE_CANDIDATES.finditer(text):
+        kind = match_obj.lastgroup
+        # the most frequent kinds first
+        if kind == "spaces":
+            __basic.append(match_obj.span())
+        elif kind == "open":
+            __facemark_opens.append(match_obj.start())
+        elif kind == "linebreaks_after":
+            __basic.append(match_obj.span())
+            # the whitespace after the punctuations
+            __linebreak.append((match_obj.end("punctuations"), match_obj.end()))
+        elif kind == "parent_emotion":
+            __facemark_opens.append(match_obj.start())
+            __emotion.append(match_obj.span())
+        elif kind == "emotion_symbols":
+            start_index, end_index = match_obj.span()
+            if end_index < len(text) and text[end_index] in constant.PUNCTUATIONS:
+                end_index += 1
+            __emotion.append((start_index, end_index))
+        else:
+            # no other candidate contains the whitespace before the line break
+            start_index, end_index = match_obj.span()
+            while start_index > 0 and text[start_index - 1].isspace():
+                start_index -= 1
+            __linebreak.append((start_index, end_index))
+    return {
+        "FaceMarkDetector": list(DEFAULT_FACEMARK_MATCHER.finditer(text, 0, __facemark_opens)),
+        "EmotionExpressionAnnotator": __emotion,
+        "BasicRule": __basic,
+        "LinebreakForceAnnotator": __linebreak,
+    }
+
+
+def get_candidates(original_text: str, spans: Annotations, rule_name: str) -> typing.List[typing.Tuple[int, int]]:
+    """Get candidates of a rule. The text is scanned once per document and the result is kept in spans."""
+    resource = spans.name2resource.get(RESOURCE_NAME)
+    if resource is None or resource[0] != original_text:
+        resource = (original_text, scan(original_text))
+        spans.name2resource[RESOURCE_NAME] = resource
+    return resource[1][rule_name]
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import re
 
-from bunkai.base.annotation import Annotations
+from bunkai.base.annotation import Annotations, SpanStore
 from bunkai.base.annotator import AnnotationFilter
 
 NumericExpression = re.compile(r"[〇一二三四五六七八九十百千万億兆京\d]+")
@@ -46,13 +46,14 @@ class DotExceptionAnnotator(AnnotationFilter):
         return True
 
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
-        __return_span_ann = []
-        for __s in spans.get_final_layer():
-            if self.is_exception_numeric(original_text, __s.start_index):
+        __final_layer = SpanStore.from_layer(spans.get_final_layer())
+        __kept = []
+        for i, start_index in enumerate(__final_layer.start_indices):
+            if self.is_exception_numeric(original_text, start_index):
                 continue
-            elif self.is_exception_mailaddress(original_text, __s.start_index):
+            elif self.is_exception_mailaddress(original_text, start_index):
                 continue
-            __return_span_ann.append(__s)
+            __kept.append(i)
 
-        spans.add_annotation_layer(self.rule_name, __return_span_ann)
+        spans.add_annotation_layer(self.rule_name, __final_layer.select(__kept))
         return spans
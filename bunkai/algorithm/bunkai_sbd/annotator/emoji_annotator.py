@@ -2,16 +2,10 @@
 import dataclasses
 import typing
 
-import emoji
-import emojis
-import emojis.db
-
+from bunkai.algorithm.bunkai_sbd.annotator.emoji_table import EMOJI_PRESENTATION_SELECTOR, get_emoji_table
 from bunkai.base.annotation import Annotations, SpanAnnotation
 from bunkai.base.annotator import Annotator
 
-EMOJI_UNICODE_ENGLISH = {emj: emoji.EMOJI_DATA[emj]["en"] for emj in emoji.EMOJI_DATA}
-
-
 """This module detects Emoji"""
 
 # You could set any emoji-category that functions as an end-of-sentence
@@ -46,37 +40,20 @@ class EmojiAnnotator(Annotator):
     @staticmethod
     def get_emoji_info(emoji_character: str) -> typing.Optional[str]:
         """Get emoji info. return a name of a category."""
-        info = emojis.db.get_emoji_by_code(emoji_character)
-        try:
-            if info is None:
-                info = emojis.db.get_emoji_by_code(f"{emoji_character}\ufe0f")
-                if info is None:
-                    return None
-                return info.category
-            else:
-                return info.category
-        except AttributeError:
-            return None
+        table = get_emoji_table()
+        if emoji_character in table.sequence2category:
+            return table.get_category(emoji_character)
+        return table.get_category(f"{emoji_character}{EMOJI_PRESENTATION_SELECTOR}")
 
     def __find_emoji(self, text: str) -> typing.List[EmojiText]:
-        """:return: spans of emoji index. [[start-index, end-index]]."""
-        emoji_spans = []
-        emoji_categories = []
-        is_emoji_span: bool = False
-        span_emoji_start: int = 0
-        for __i, char in enumerate(text):
-            if char not in EMOJI_UNICODE_ENGLISH:
-                continue
-
-            emoji_categories.append(self.get_emoji_info(char))
-            if not is_emoji_span:
-                is_emoji_span = True
-                span_emoji_start = __i
-
-            if __i + 1 == len(text) or text[__i + 1] not in EMOJI_UNICODE_ENGLISH:
-                emoji_spans.append(EmojiText(span_emoji_start, __i + 1, emoji_categories))
-                is_emoji_span = False
-                emoji_categories = []
+        """:return: spans of emoji index. Adjacent emoji sequences are put into a span with a category per sequence."""
+        emoji_spans: typing.List[EmojiText] = []
+        for start_index, end_index, category in get_emoji_table().find(text):
+            if len(emoji_spans) > 0 and emoji_spans[-1].end_index == start_index:
+                emoji_spans[-1].end_index = end_index
+                emoji_spans[-1].category.append(category)
+            else:
+                emoji_spans.append(EmojiText(start_index, end_index, [category]))
         return emoji_spans
 
     def annotate(self, original_text: str, spans: Annotations, emoji_threshold: int = 1) -> Annotations:
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import functools
+import re
+import typing
+
+"""This module finds emoji sequences by the longest match against a table built on first use"""
+
+VARIATION_SELECTORS = "\ufe0e\ufe0f"
+ZERO_WIDTH_JOINER = "\u200d"
+EMOJI_PRESENTATION_SELECTOR = "\ufe0f"
+
+
+class EmojiTable(object):
+    def __init__(self, sequence2category: typing.Dict[str, typing.Optional[str]]):
+        """
+        Map emoji sequences to their categories.
+
+        :param sequence2category: emoji sequences (a code point, ZWJ sequences, sequences with modifiers, etc.)
+            and their category names. The category is None when it is unknown.
+        """
+        self.sequence2category = sequence2category
+        # lengths of sequences per first character, longest first
+        self.char2lengths: typing.Dict[str, typing.Tuple[int, ...]] = {}
+        __char2lengths: typing.Dict[str, typing.Set[int]] = {}
+        for sequence in sequence2category:
+            __char2lengths.setdefault(sequence[0], set()).add(len(sequence))
+        for char, lengths in __char2lengths.items():
+            self.char2lengths[char] = tuple(sorted(lengths, reverse=True))
+        self.re_start = re.compile("[" + "".join(re.escape(c) for c in sorted(self.char2lengths)) + "]")
+
+    def match(self, text: str, position: int) -> int:
+        """Get the end index of the longest sequence starting at position. It is position when nothing matches."""
+        for length in self.char2lengths.get(text[position], ()):
+            if position + length <= len(text) and text[position : position + length] in self.sequence2category:
+                return position + length
+        return position
+
+    def get_category(self, sequence: str) -> typing.Optional[str]:
+        return self.sequence2category.get(sequence)
+
+    def __match_joined(self, text: str, start_index: int) -> typing.Tuple[int, typing.Optional[str]]:
+        """Match a sequence and extend it with trailing variation selectors and ZWJ-joined sequences."""
+        end_index = self.match(text, start_index)
+        category = self.get_category(text[start_index:end_index])
+        while True:
+            while end_index < len(text) and text[end_index] in VARIATION_SELECTORS:
+                end_index += 1
+            if end_index + 1 < len(text) and text[end_index] == ZERO_WIDTH_JOINER:
+                __end_index = self.match(text, end_index + 1)
+                if __end_index > end_index + 1:
+                    end_index = __end_index
+                    continue
+            break
+        if text[start_index:end_index] in self.sequence2category:
+            category = self.get_category(text[start_index:end_index])
+        return end_index, category
+
+    def find(self, text: str) -> typing.Iterator[typing.Tuple[int, int, typing.Optional[str]]]:
+        """Find (start, end, category) of emoji sequences from left to right in one pass."""
+        position = 0
+        while True:
+            match_obj = self.re_start.search(text, position)
+            if match_obj is None:
+                return
+            start_index = match_obj.start()
+            if self.match(text, start_index) == start_index:
+                position = start_index + 1
+                continue
+            end_index, category = self.__match_joined(text, start_index)
+            yield start_index, end_index, category
+            position = end_index
+
+
+def build_emoji_table() -> EmojiTable:
+    """Build a table from emoji sequences of the emoji package and categories of the emojis package."""
+    import emoji
+    import emojis.db
+
+    code2category: typing.Dict[str, str] = {}
+    for category in sorted(emojis.db.get_categories()):
+        for emoji_obj in emojis.db.get_emojis_by_category(category):
+            code2category.setdefault(emoji_obj.emoji, category)
+
+    def lookup(code: str) -> typing.Optional[str]:
+        __category = code2category.get(code)
+        if __category is None:
+            __category = code2category.get(f"{code}{EMOJI_PRESENTATION_SELECTOR}")
+        return __category
+
+    sequence2category: typing.Dict[str, typing.Optional[str]] = {}
+    for sequence in emoji.EMOJI_DATA:
+        category = lookup(sequence)
+        if category is None:
+            category = lookup(sequence.replace(EMOJI_PRESENTATION_SELECTOR, ""))
+        if category is None and len(sequence) > 1:
+            # e.g. a sequence with a skin tone modifier has the category of its base emoji.
+            category = lookup(sequence[0])
+        sequence2category[sequence] = category
+    return EmojiTable(sequence2category)
+
+
+@functools.lru_cache(maxsize=None)
+def get_emoji_table() -> EmojiTable:
+    """Get the table shared in the process. It is built on first use."""
+    return build_emoji_table()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import bisect
+import re
+import typing
+
+from bunkai.algorithm.bunkai_sbd.annotator import constant
+
+"""
+This module finds facemarks in linear time.
+
+It finds the same spans as finditer() of the regular expression constant.FACE_EXPRESSION_REGEXP,
+    P*[(（]S1*S2+S1*[)）]P*
+where P is FACE_SYMBOL_PREFIX_SUFFIX, S2 is the same class as P and S1 is S2 with alphanumerics.
+The regular expression backtracks heavily on long runs of symbols such as "((((((((".
+"""
+
+# the matcher relies on S2 and P being the same class
+assert constant.FACE_SYMBOL2_REGEXP == constant.FACE_SYMBOL_PREFIX_SUFFIX
+RE_OPEN = re.compile(r"[（\(]")
+CLOSE_CHARACTERS: str = "）)"
+RE_SYMBOL = re.compile(constant.FACE_SYMBOL_PREFIX_SUFFIX)
+RE_SYMBOLS = re.compile(constant.FACE_SYMBOL_PREFIX_SUFFIX + "*")
+RE_INNER_SYMBOL = re.compile(constant.FACE_SYMBOL2_REGEXP)
+RE_INNER_CHARACTERS = re.compile(constant.FACE_SYMBOL1_REGEXP + "*")
+
+
+class FaceMarkMatcher(object):
+    """
+    Find facemarks with the same result as the backtracking regular expression.
+
+    For a start position, the regular expression takes the last opening parenthesis in the run of symbols
+    which can be followed by S1*S2+S1*[)）], and the last closing parenthesis in the run of S1 characters after it.
+    Runs are scanned once, so the time is linear in the length of a text.
+    """
+
+    @staticmethod
+    def __find_last_close(text: str, start_index: int, end_index: int) -> int:
+        return max(
+            text.rfind(CLOSE_CHARACTERS[0], start_index, end_index),
+            text.rfind(CLOSE_CHARACTERS[1], start_index, end_index),
+        )
+
+    def finditer(
+        self, text: str, pos: int = 0, open_indices: typing.Optional[typing.Sequence[int]] = None
+    ) -> typing.Iterator[typing.Tuple[int, int]]:
+        """
+        Find (start, end) of facemarks from pos. The result is the same as finditer of RE_FACEMARK.
+
+        open_indices are the sorted positions of all opening parentheses in text, if they are already found.
+        """
+        if open_indices is None:
+            open_indices = [m.start() for m in RE_OPEN.finditer(text)]
+        # the end of the last run of S1 characters and the last closing parenthesis in it
+        inner_end_index = -1
+        last_close_index = -1
+        i_open = 0
+        while True:
+            i_open = bisect.bisect_left(open_indices, pos, i_open)
+            if i_open == len(open_indices):
+                return
+            # the run of symbols around the first opening parenthesis
+            start_index = open_indices[i_open]
+            while start_index > pos and RE_SYMBOL.match(text, start_index - 1):
+                start_index -= 1
+            symbols_end_index = RE_SYMBOLS.match(text, open_indices[i_open]).end()
+            if symbols_end_index >= inner_end_index:
+                inner_end_index = RE_INNER_CHARACTERS.match(text, symbols_end_index).end()
+                last_close_index = self.__find_last_close(text, start_index, inner_end_index)
+
+            close_index = -1
+            # no opening parenthesis is between start_index and the first one
+            seq_open_index = open_indices[i_open : bisect.bisect_left(open_indices, symbols_end_index, i_open)]
+            for open_index in reversed(seq_open_index):
+                # the first S2 character after the opening parenthesis
+                inner_index = open_index + 1
+                if inner_index == symbols_end_index:
+                    match_inner = RE_INNER_SYMBOL.search(text, inner_index, inner_end_index)
+                    inner_index = inner_end_index if match_inner is None else match_inner.start()
+                if inner_index < last_close_index:
+                    close_index = last_close_index
+                    break
+
+            if close_index < 0:
+                pos = symbols_end_index
+                continue
+            end_index = RE_SYMBOLS.match(text, close_index + 1).end()
+            yield start_index, end_index
+            pos = end_index
+
+
+DEFAULT_FACEMARK_MATCHER = FaceMarkMatcher()
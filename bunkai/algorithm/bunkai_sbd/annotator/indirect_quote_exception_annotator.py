@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 import dataclasses
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 from bunkai.algorithm.bunkai_sbd.annotator.basic_annotator import BasicRule
 from bunkai.algorithm.bunkai_sbd.annotator.constant import LAYER_NAME_FIRST
@@ -9,7 +9,7 @@ from bunkai.algorithm.bunkai_sbd.annotator.emotion_expression_annotator import E
 from bunkai.algorithm.bunkai_sbd.annotator.facemark_detector import FaceMarkDetector
 from bunkai.algorithm.bunkai_sbd.annotator.linebreak_annotator_compat import LinebreakAnnotator
 from bunkai.algorithm.bunkai_sbd.annotator.morph_annotator import MorphAnnotatorJanome
-from bunkai.base.annotation import Annotations, SpanAnnotation, TokenResult
+from bunkai.base.annotation import Annotations, SpanStore, TokenResult
 from bunkai.base.annotator import AnnotationFilter
 
 DEFAULT_RULE_TARGET = (
@@ -26,7 +26,7 @@ DEFAULT_RULE_TARGET = (
 class RuleObject(object):
     rule_word_surface: List[str]
 
-    def match(self, current_target_index: int, index2token_obj: Dict[int, TokenResult]):
+    def match(self, current_target_index: int, index2token_obj: Mapping[int, TokenResult]):
         for rule_surf in self.rule_word_surface:
             t = index2token_obj.get(current_target_index)
             if t is None:
@@ -54,17 +54,81 @@ MORPHEMES_AFTER_CANDIDATE: List[RuleObject] = [
 ]
 
 
+def get_max_rule_length(rules: Sequence[RuleObject] = MORPHEMES_AFTER_CANDIDATE) -> int:
+    """Get the number of characters after a candidate which the rules look up."""
+    return max((sum(len(rule_surf) for rule_surf in rule_object.rule_word_surface) for rule_object in rules), default=0)
+
+
+class RuleTrie(object):
+    def __init__(self, rules: Iterable[RuleObject] = ()):
+        """
+        Rules compiled into a trie of morpheme surfaces.
+
+        A candidate is resolved in one walk over the tokens after it, no longer than the longest matching rule.
+        """
+        # surface -> (child node, whether a rule ends here)
+        self.root: Dict[str, Tuple[dict, bool]] = {}
+        self.is_root_terminal = False
+        self.rules: List[RuleObject] = []
+        for rule_object in rules:
+            self.add(rule_object)
+
+    def add(self, rule_object: RuleObject) -> None:
+        self.rules.append(rule_object)
+        if len(rule_object.rule_word_surface) == 0:
+            self.is_root_terminal = True
+            return
+        node = self.root
+        for __i, rule_surf in enumerate(rule_object.rule_word_surface):
+            child, is_terminal = node.get(rule_surf, ({}, False))
+            is_terminal = is_terminal or __i + 1 == len(rule_object.rule_word_surface)
+            node[rule_surf] = (child, is_terminal)
+            node = child
+
+    def match(self, current_target_index: int, index2token_obj: Mapping[int, TokenResult]) -> bool:
+        """Be True if any rule matches tokens from current_target_index, the same as RuleObject.match."""
+        if self.is_root_terminal:
+            return True
+        node = self.root
+        while True:
+            t = index2token_obj.get(current_target_index)
+            if t is None:
+                return False
+            item = node.get(t.word_surface)
+            if item is None:
+                return False
+            node, is_terminal = item
+            if is_terminal:
+                return True
+            current_target_index += len(t.word_surface)
+
+
+DEFAULT_RULE_TRIE = RuleTrie(MORPHEMES_AFTER_CANDIDATE)
+
+
 class IndirectQuoteExceptionAnnotator(AnnotationFilter):
-    def __init__(self, rule_targets: Tuple[str, ...] = DEFAULT_RULE_TARGET):
+    def __init__(
+        self,
+        rule_targets: Tuple[str, ...] = DEFAULT_RULE_TARGET,
+        rules: Optional[Sequence[RuleObject]] = None,
+    ):
+        """
+        Filter out candidates followed by particles.
+
+        :param rules: morpheme rules used instead of MORPHEMES_AFTER_CANDIDATE.
+            Pass MORPHEMES_AFTER_CANDIDATE + custom rules to extend the default rules.
+        """
         super().__init__(rule_name=self.__class__.__name__)
         self.rule_targets = rule_targets
+        self.rule_trie = DEFAULT_RULE_TRIE if rules is None else RuleTrie(rules)
 
     @staticmethod
     def is_exception_particle(
         original_text: str,
         start_index: int,
         end_index: int,
-        index2token_obj: Dict[int, TokenResult],
+        index2token_obj: Mapping[int, TokenResult],
+        rule_trie: RuleTrie = DEFAULT_RULE_TRIE,
     ) -> bool:
         """
         形態素解析の結果、基本分割文字列の後ろが助詞だった場合は 分割を行わない.
@@ -86,52 +150,28 @@ class IndirectQuoteExceptionAnnotator(AnnotationFilter):
 
         if __next_end_index not in index2token_obj:
             return False
-        elif any(
-            [
-                rule_object.match(
-                    current_target_index=__next_end_index,
-                    index2token_obj=index2token_obj,
-                )
-                for rule_object in MORPHEMES_AFTER_CANDIDATE
-            ]
-        ):
-            return True
-        return False
-
-    def __generate(self, anns: List[SpanAnnotation]) -> Dict[int, TokenResult]:
-        index2tokens = {}
-        __start_index = 0
-        __tokenizer_anns = [ann for ann in anns if ann.rule_name == MorphAnnotatorJanome.__name__]
-        __processed = []
-        for ann in __tokenizer_anns:
-            t_obj = ann.args["token"]  # type: ignore
-            if t_obj in __processed:
-                continue
-            __length = len(t_obj.word_surface)
-            for __i in range(__start_index, __start_index + __length):
-                index2tokens[__i] = t_obj
-            __start_index += __length
-            __processed.append(t_obj)
-        else:
-            return index2tokens
+        return rule_trie.match(current_target_index=__next_end_index, index2token_obj=index2token_obj)
 
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
-        index2token_obj = self.__generate(list(spans.get_annotation_layer(MorphAnnotatorJanome.__name__)))
+        # tokens may not cover the whole text when MorphAnnotatorJanome tokenizes around candidates only.
+        index2token_obj = spans.get_token_index(MorphAnnotatorJanome.__name__)
 
-        __return_span_ann = []
+        __return_span_ann = SpanStore()
         for target_rule_name in self.rule_targets:
             if target_rule_name == LinebreakAnnotator.__name__ and target_rule_name not in spans.name2order:
                 continue
-            for __s in spans.get_annotation_layer(target_rule_name):
+            __target = spans.get_annotation_store(target_rule_name)
+            for i, (start_index, end_index) in enumerate(zip(__target.start_indices, __target.end_indices)):
                 if self.is_exception_particle(
                     original_text,
-                    __s.start_index,
-                    __s.end_index,
+                    start_index,
+                    end_index,
                     index2token_obj=index2token_obj,
+                    rule_trie=self.rule_trie,
                 ):
                     continue
                 else:
-                    __return_span_ann.append(__s)
+                    __return_span_ann.append_from(__target, i)
 
         spans.add_annotation_layer(self.rule_name, self.unify_span_annotations(__return_span_ann))
         return spans
@@ -4,14 +4,19 @@ import typing
 from pathlib import Path
 
 from bunkai.algorithm.bunkai_sbd.annotator.morph_annotator import MorphAnnotatorJanome
-from bunkai.algorithm.lbd.predict import Predictor
 from bunkai.base.annotation import SpanAnnotation
 from bunkai.base.annotator import Annotations, Annotator
 from bunkai.constant import METACHAR_LINE_BREAK
 
+# the number of windows of documents fed to the linebreak model at once in annotate_batch
+BATCH_SIZE: int = 8
+
 
 class LinebreakAnnotator(Annotator):
     def __init__(self, *, path_model: Path):
+        # imported here since torch and transformers are slow to import
+        from bunkai.algorithm.lbd.predict import Predictor
+
         super().__init__(LinebreakAnnotator.__name__)
         self.linebreak_detector = Predictor(modelpath=path_model)
 
@@ -21,7 +26,7 @@ class LinebreakAnnotator(Annotator):
     ) -> typing.List[str]:
         input_tokens: typing.List[str] = [
             span_obj.args["token"].word_surface
-            for span_obj in annotation_object.get_annotation_layer(attribute_name)
+            for span_obj in annotation_object.get_token_index(attribute_name).spans
             if span_obj.args is not None
         ]
         sentence_tokens: typing.List[str] = []
@@ -69,12 +74,27 @@ class LinebreakAnnotator(Annotator):
         # tokenizerを更新する。すでにTokenize済みの結果を利用する。
         # self.linebreak_detector.reset_tokenizer(word_tokenizer_type='pre_tokenize', sentence2tokens=sentence2tokens)
         __result = list(self.linebreak_detector.predict([sub_texts]))
+        return self.__add_layer(original_text, spans, __result)
+
+    def annotate_batch(
+        self, original_texts: typing.List[str], spans_list: typing.List[Annotations]
+    ) -> typing.List[Annotations]:
+        """Predict linebreaks of documents together. Windows of similar lengths are fed to the model at once."""
+        __results = self.linebreak_detector.predict(
+            [self.generate_sentence_structure(spans) for spans in spans_list], batch_size=BATCH_SIZE
+        )
+        for original_text, spans, __result in zip(original_texts, spans_list, __results):
+            self.__add_layer(original_text, spans, [__result])
+        return spans_list
 
+    def __add_layer(
+        self, original_text: str, spans: Annotations, predictions: typing.List[typing.Set[int]]
+    ) -> Annotations:
         new_spans = spans.get_final_layer()
-        morpheme_sequence = list(spans.get_annotation_layer(MorphAnnotatorJanome.__name__))
-        if len(__result) > 0:
+        morpheme_sequence = spans.get_token_index(MorphAnnotatorJanome.__name__).spans
+        if len(predictions) > 0:
             # result: typing.List[TokenIndex] = __result[0]  # type: ignore
-            for result in __result:
+            for result in predictions:
                 for predicted_index in result:
                     char_index_start = morpheme_sequence[predicted_index].start_index
                     char_index_end = morpheme_sequence[predicted_index].end_index
@@ -1,12 +1,8 @@
 #!/usr/bin/env python3
-try:
-    import numpy  # noqa: F401
-    import torch  # noqa: F401
-    import transformers  # noqa: F401
-except ImportError:
-    install_with_lb = False
-else:
-    install_with_lb = True
+import importlib.util
+
+# find modules without importing them since torch and transformers are slow to import
+install_with_lb = all(importlib.util.find_spec(name) is not None for name in ("numpy", "torch", "transformers"))
 
 if install_with_lb:
     from bunkai.algorithm.bunkai_sbd.annotator.linebreak_annotator import LinebreakAnnotator  # type: ignore
@@ -1,11 +1,8 @@
 #!/usr/bin/env python3
-import re
-
-from bunkai.base.annotation import Annotations, SpanAnnotation
+from bunkai.algorithm.bunkai_sbd.annotator.candidate_scanner import get_candidates
+from bunkai.base.annotation import Annotations, SpanAnnotation, SpanStore
 from bunkai.base.annotator import Annotator
 
-RE_LBS = re.compile(r"[\n\s]*\n[\n\s]*")
-
 
 class LinebreakForceAnnotator(Annotator):
     def __init__(self):
@@ -13,11 +10,10 @@ class LinebreakForceAnnotator(Annotator):
 
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
         s2regs = {}
-        for r_obj in RE_LBS.finditer(original_text):
-            s: int = r_obj.regs[0][0]
-            s2regs[s] = r_obj.regs[0]
+        for regs in get_candidates(original_text, spans, self.rule_name):
+            s2regs[regs[0]] = regs
 
-        __return_span_ann = []
+        __return_span_ann = SpanStore()
 
         def _add(ro):
             __return_span_ann.append(
@@ -30,13 +26,14 @@ class LinebreakForceAnnotator(Annotator):
                 )
             )
 
-        for __s in spans.get_final_layer():
-            ro = s2regs.get(__s.end_index)
+        __final_layer = SpanStore.from_layer(spans.get_final_layer())
+        for i, end_index in enumerate(__final_layer.end_indices):
+            ro = s2regs.get(end_index)
             if ro is None:
-                __return_span_ann.append(__s)
+                __return_span_ann.append_from(__final_layer, i)
             else:
                 _add(ro)
-                del s2regs[__s.end_index]
+                del s2regs[end_index]
 
         for ro in s2regs.values():
             _add(ro)
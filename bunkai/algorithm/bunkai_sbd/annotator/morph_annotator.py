@@ -1,65 +1,204 @@
 #!/usr/bin/env python3
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
-from janome.tokenizer import Token, Tokenizer
+from janome.tokenizer import Token
 
-from bunkai.base.annotation import Annotations, SpanAnnotation, TokenResult
+from bunkai.base.annotation import Annotations, SpanStore, TokenResult
 from bunkai.base.annotator import Annotator
+from bunkai.base.tokenizer_registry import get_janome_tokenizer
+
+DEFAULT_LOCAL_MARGIN: int = 16
+RESOURCE_NAME = "JanomeTokens"
+
+
+def set_tokens(spans: Annotations, text: str, tokens: List[Tuple[int, Token]]) -> None:
+    """
+    Give (start, token) of Janome for a text to MorphAnnotatorJanome, which then does not tokenize the text.
+
+    Starts are positions in the stripped text, the same as the offsets of tokens in the morph layer.
+    """
+    spans.name2resource[RESOURCE_NAME] = (text, tokens)
 
 
 class MorphAnnotatorJanome(Annotator):
-    def __init__(self):
+    def __init__(self, *, local_lookahead: Optional[int] = None, local_margin: int = DEFAULT_LOCAL_MARGIN):
+        """
+        Tokenize a text with Janome.
+
+        :param local_lookahead: If given, only windows around boundary candidates in the final layer are tokenized.
+            Tokens covering local_lookahead characters after each candidate are kept.
+            A window is expanded from local_margin characters until its tokens do not change.
+        """
         super().__init__(rule_name=self.__class__.__name__)
-        self.tokenizer = Tokenizer()
+        self.tokenizer = get_janome_tokenizer()
+        self.local_lookahead = local_lookahead
+        self.local_margin = local_margin
 
-    def __generate(self, text: str) -> List[SpanAnnotation]:
-        tokenizer_result = self.tokenizer.tokenize(text)
-        span_ann = []
-        __start_index = 0
-        for t_obj in tokenizer_result:
+    def __tokenize(self, text: str, start_index: int, end_index: int) -> Iterator[Tuple[int, Token]]:
+        """Tokenize text[start_index:end_index]. Janome strips the input, so leading spaces are skipped."""
+        window = text[start_index:end_index]
+        __start_index = start_index + len(window) - len(window.lstrip())
+        for t_obj in self.tokenizer.tokenize(window):
             assert isinstance(t_obj, Token)
-            __pos = t_obj.part_of_speech.split(",")
-            __length = len(t_obj.surface)
+            yield __start_index, t_obj
+            __start_index += len(t_obj.surface)
+
+    def __add_token(self, span_ann: SpanStore, start_index: int, t_obj: Token) -> None:
+        token = TokenResult(
+            node_obj=t_obj,
+            tuple_pos=t_obj.part_of_speech.split(","),
+            word_stem=t_obj.base_form,
+            word_surface=t_obj.surface,
+        )
+        span_ann.add(
+            self.rule_name,
+            start_index,
+            start_index + len(t_obj.surface),
+            "janome",
+            "token",
+            {"token": token},
+        )
+
+    def __get_regions(self, text: str, length: int, spans: Annotations) -> List[Tuple[int, int]]:
+        """Get ranges of characters after candidates. Ranges closer than 2 * local_margin are merged."""
+        assert self.local_lookahead is not None
+        __starts = set()
+        for __s in spans.get_final_layer():
+            # same as the position which IndirectQuoteExceptionAnnotator looks up.
+            __next_end_index = __s.end_index
+            if __next_end_index >= len(text):
+                continue
+            if text[__next_end_index] == "\n":
+                while text[__next_end_index] == "\n" and __next_end_index + 1 < len(text):
+                    __next_end_index += 1
+            if __next_end_index < length:
+                __starts.add(__next_end_index)
+        regions: List[Tuple[int, int]] = []
+        for start_index in sorted(__starts):
+            end_index = min(length, start_index + self.local_lookahead)
+            if len(regions) > 0 and start_index - regions[-1][1] < 2 * self.local_margin:
+                regions[-1] = (regions[-1][0], max(regions[-1][1], end_index))
+            else:
+                regions.append((start_index, end_index))
+        return regions
+
+    @staticmethod
+    def __is_covered(region: Tuple[int, int], tokens: List[Tuple[int, Token]]) -> bool:
+        __end_index = region[0]
+        for s, t_obj in tokens:
+            if s > __end_index:
+                return False
+            __end_index = s + len(t_obj.surface)
+        return __end_index >= region[1]
+
+    def __get_windows(self, region: Tuple[int, int], length: int) -> Iterator[Tuple[int, int]]:
+        """Generate windows around a region with doubling margins until a window covers the whole text."""
+        margin = self.local_margin
+        while True:
+            start_index = max(0, region[0] - margin)
+            end_index = min(length, region[1] + margin)
+            yield start_index, end_index
+            if start_index == 0 and end_index == length:
+                return
+            margin *= 2
+
+    def __estimate_cost(self, regions: List[Tuple[int, int]], length: int) -> int:
+        """Estimate the number of characters tokenized for regions. Each region is tokenized at least twice."""
+        __cost = 0
+        for region in regions:
+            for __n_window, (start_index, end_index) in enumerate(self.__get_windows(region, length)):
+                __cost += end_index - start_index
+                if __n_window == 1:
+                    break
+        return __cost
+
+    def __tokenize_region(
+        self, text: str, region: Tuple[int, int], budget: int
+    ) -> Tuple[Optional[List[Tuple[int, Token]]], int]:
+        """
+        Tokenize windows around a region with doubling margins until the tokens covering the region are stable.
+
+        Return the tokens and the number of characters tokenized. The tokens are None if the windows exceed budget.
+        """
+        previous: Optional[List[Tuple[int, Token]]] = None
+        __cost = 0
+        for start_index, end_index in self.__get_windows(region, len(text)):
+            __cost += end_index - start_index
+            if __cost > budget:
+                return None, __cost
+            current = [
+                (s, t_obj)
+                for s, t_obj in self.__tokenize(text, start_index, end_index)
+                if s < region[1] and s + len(t_obj.surface) > region[0]
+            ]
+            if start_index == 0 and end_index == len(text):
+                return current, __cost
+            if (
+                previous is not None
+                and self.__is_covered(region, current)
+                and [(s, t.surface, t.part_of_speech, t.base_form) for s, t in previous]
+                == [(s, t.surface, t.part_of_speech, t.base_form) for s, t in current]
+            ):
+                return current, __cost
+            previous = current
+        raise AssertionError("the last window covers the whole text")
+
+    def __tokenize_local(self, text: str, stripped: str, spans: Annotations) -> Optional[List[Tuple[int, Token]]]:
+        """Tokenize regions around candidates. Return None if it costs more than tokenizing the whole text once."""
+        regions = self.__get_regions(text, len(stripped), spans)
+        __budget = len(stripped)
+        if self.__estimate_cost(regions, len(stripped)) >= __budget:
+            return None
+        tokens: List[Tuple[int, Token]] = []
+        __added = set()
+        for region in regions:
+            __region_tokens, __cost = self.__tokenize_region(stripped, region, __budget)
+            if __region_tokens is None:
+                return None
+            __budget -= __cost
+            for __start_index, t_obj in __region_tokens:
+                if __start_index not in __added:
+                    tokens.append((__start_index, t_obj))
+                    __added.add(__start_index)
+        return tokens
+
+    def __generate(self, text: str, spans: Annotations) -> SpanStore:
+        span_ann = SpanStore()
+        __stripped = text.strip()
+        tokens = None
+        resource = spans.name2resource.get(RESOURCE_NAME)
+        if resource is not None and resource[0] == text:
+            tokens = resource[1]
+        elif self.local_lookahead is not None:
+            tokens = self.__tokenize_local(text, __stripped, spans)
+        if tokens is None:
+            tokens = self.__tokenize(__stripped, 0, len(__stripped))
+        for __start_index, t_obj in tokens:
+            self.__add_token(span_ann, __start_index, t_obj)
+        # Janome strips the text. Token offsets are positions in the stripped text.
+        __start_index = len(__stripped)
+        if __start_index < len(text) and text[__start_index : len(text)] == "\n":
+            # 末尾が改行のケースで改行記号を手動で追加する。
             token = TokenResult(
-                node_obj=t_obj,
-                tuple_pos=__pos,
-                word_stem=t_obj.base_form,
-                word_surface=t_obj.surface,
+                node_obj=None,
+                tuple_pos=("記号", "空白", "*", "*"),
+                word_stem="\n",
+                word_surface="\n",
             )
-            span_ann.append(
-                SpanAnnotation(
-                    rule_name=self.rule_name,
-                    start_index=__start_index,
-                    end_index=__start_index + __length,
-                    split_string_type="janome",
-                    split_string_value="token",
-                    args={"token": token},
-                )
+            span_ann.add(
+                self.rule_name,
+                __start_index,
+                len(text),
+                "janome",
+                "token",
+                {"token": token},
             )
-            __start_index += __length
-        else:
-            if __start_index < len(text) and text[__start_index : len(text)] == "\n":
-                # 末尾が改行のケースで改行記号を手動で追加する。
-                token = TokenResult(
-                    node_obj=None,
-                    tuple_pos=("記号", "空白", "*", "*"),
-                    word_stem="\n",
-                    word_surface="\n",
-                )
-                span_ann.append(
-                    SpanAnnotation(
-                        rule_name=self.rule_name,
-                        start_index=__start_index,
-                        end_index=len(text),
-                        split_string_type="janome",
-                        split_string_value="token",
-                        args={"token": token},
-                    )
-                )
-
-            return span_ann
+        return span_ann
 
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
-        anns = self.__generate(original_text)
-        spans.add_annotation_layer(self.rule_name, anns + list(spans.flatten()))
+        anns = self.__generate(original_text, spans)
+        # layers which are stores are copied column by column
+        for layer in spans.name2spans.values():
+            anns.extend(layer)
+        spans.add_annotation_layer(self.rule_name, anns)
         return spans
@@ -2,7 +2,7 @@
 import re
 
 from bunkai.algorithm.bunkai_sbd.annotator import constant
-from bunkai.base.annotation import Annotations
+from bunkai.base.annotation import Annotations, SpanStore
 from bunkai.base.annotator import AnnotationFilter
 
 RE_NUMBER_WORD = re.compile(constant.NUMBER_WORD_REGEXP)
@@ -31,11 +31,12 @@ class NumberExceptionAnnotator(AnnotationFilter):
         return False
 
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
-        __return_span_ann = []
-        for __s in spans.get_final_layer():
-            if self.is_exception_no(original_text, __s.start_index, __s.end_index):
+        __final_layer = SpanStore.from_layer(spans.get_final_layer())
+        __kept = []
+        for i, (start_index, end_index) in enumerate(zip(__final_layer.start_indices, __final_layer.end_indices)):
+            if self.is_exception_no(original_text, start_index, end_index):
                 continue
             else:
-                __return_span_ann.append(__s)
-        spans.add_annotation_layer(self.rule_name, __return_span_ann)
+                __kept.append(i)
+        spans.add_annotation_layer(self.rule_name, __final_layer.select(__kept))
         return spans
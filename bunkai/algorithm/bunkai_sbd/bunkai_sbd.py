@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from pathlib import Path
-from typing import Iterator, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union, cast
+
+from janome.tokenizer import Token
 
 from bunkai.algorithm.bunkai_sbd.annotator import (
     BasicRule,
@@ -15,8 +17,22 @@ from bunkai.algorithm.bunkai_sbd.annotator import (
     NumberExceptionAnnotator,
 )
 from bunkai.algorithm.bunkai_sbd.annotator.constant import LAYER_NAME_FIRST
-from bunkai.base.annotation import Annotations, SpanAnnotation
+from bunkai.algorithm.bunkai_sbd.annotator.indirect_quote_exception_annotator import (
+    MORPHEMES_AFTER_CANDIDATE,
+    RuleObject,
+    get_max_rule_length,
+)
+from bunkai.algorithm.bunkai_sbd.annotator.morph_annotator import set_tokens
+from bunkai.algorithm.bunkai_sbd.edit import Segmentation, edit_segmentation, get_segmentation
+from bunkai.algorithm.bunkai_sbd.stream import (
+    DEFAULT_LOOKAHEAD,
+    DEFAULT_MARGIN,
+    DEFAULT_WINDOW_SIZE,
+    StreamSegmenter,
+)
+from bunkai.base.annotation import Annotations, SpanAnnotation, SpanStore
 from bunkai.base.annotator import AnnotatorPipeline, RuleOrderException, SentenceBoundaryDisambiguator
+from bunkai.base.cache import SegmentationCache
 
 
 class BunkaiPipeline(AnnotatorPipeline):
@@ -56,8 +72,39 @@ class BunkaiPipeline(AnnotatorPipeline):
 
 
 class BunkaiSentenceBoundaryDisambiguation(SentenceBoundaryDisambiguator):
-    def __init__(self, *, path_model: Optional[Path] = None):
-        morph_annotator = MorphAnnotatorJanome()
+    def __init__(
+        self,
+        *,
+        path_model: Optional[Path] = None,
+        keep_layers: bool = True,
+        local_morph: bool = False,
+        cache: Optional[SegmentationCache] = None,
+        indirect_quote_rules: Optional[Sequence[RuleObject]] = None,
+    ):
+        """
+        Build the pipeline.
+
+        :param keep_layers: If False, intermediate annotation layers are dropped during eos(),
+            keeping only the latest layer and the morph layer. Boundaries are the same as with True.
+        :param local_morph: If True, only texts around boundary candidates are tokenized by Janome.
+            The morph layer of eos() then lacks the other tokens. It can not be used with path_model.
+        :param cache: If given, results of find_eos() are cached.
+        :param indirect_quote_rules: If given, IndirectQuoteExceptionAnnotator uses these rules
+            instead of MORPHEMES_AFTER_CANDIDATE.
+        """
+        if local_morph and path_model is not None:
+            raise ValueError("local_morph can not be used with path_model since the linebreak model needs all tokens.")
+        self.keep_layers = keep_layers
+        self.local_morph = local_morph
+        self.indirect_quote_rules = indirect_quote_rules
+        if local_morph:
+            morph_annotator = MorphAnnotatorJanome(
+                local_lookahead=get_max_rule_length(
+                    MORPHEMES_AFTER_CANDIDATE if indirect_quote_rules is None else indirect_quote_rules
+                )
+            )
+        else:
+            morph_annotator = MorphAnnotatorJanome()
 
         _annotators = [
             FaceMarkDetector(),
@@ -65,7 +112,7 @@ class BunkaiSentenceBoundaryDisambiguation(SentenceBoundaryDisambiguator):
             EmojiAnnotator(),
             BasicRule(),
             morph_annotator,
-            IndirectQuoteExceptionAnnotator(),
+            IndirectQuoteExceptionAnnotator(rules=indirect_quote_rules),
             DotExceptionAnnotator(),
             NumberExceptionAnnotator(),
         ]
@@ -78,10 +125,22 @@ class BunkaiSentenceBoundaryDisambiguation(SentenceBoundaryDisambiguator):
             _annotators.insert(_idxs[0] + 1, LinebreakAnnotator(path_model=path_model))
 
         self.pipeline = BunkaiPipeline(_annotators)
-        super().__init__()
+        super().__init__(path_model=path_model, cache=cache)
 
-    def eos(self, text: str) -> Annotations:
-        annotations = Annotations()
+    def _init_kwargs(self) -> Dict[str, Any]:
+        return {
+            "path_model": self.path_model,
+            "keep_layers": self.keep_layers,
+            "local_morph": self.local_morph,
+            "cache": self.cache,
+            "indirect_quote_rules": self.indirect_quote_rules,
+        }
+
+    def __init_annotations(self, text: str) -> Annotations:
+        annotations = Annotations(
+            keep_layers=self.keep_layers,
+            persistent_layers={MorphAnnotatorJanome.__name__},
+        )
         annotations.add_annotation_layer(
             LAYER_NAME_FIRST,
             [
@@ -94,26 +153,130 @@ class BunkaiSentenceBoundaryDisambiguation(SentenceBoundaryDisambiguator):
                 )
             ],
         )
+        return annotations
+
+    def eos(self, text: str, *, tokens: Optional[List[Tuple[int, Token]]] = None) -> Annotations:
+        """
+        Annotate boundaries of a text.
+
+        :param tokens: (start, token) of Janome for text, where starts are positions in the stripped text.
+            If given, MorphAnnotatorJanome uses them instead of tokenizing text.
+        """
+        annotations = self.__init_annotations(text)
+        if tokens is not None:
+            set_tokens(annotations, text, tokens)
         for rule_obj in self.pipeline:
             rule_obj.annotate(text, annotations)
         return annotations
 
+    def eos_batch(self, texts: List[str]) -> List[Annotations]:
+        """
+        Annotate boundaries of texts.
+
+        Each annotator annotates all texts before the next one, so the linebreak model predicts windows
+        of the texts together. Annotations of all texts are held at once.
+        """
+        annotations_list = [self.__init_annotations(text) for text in texts]
+        for rule_obj in self.pipeline:
+            rule_obj.annotate_batch(texts, annotations_list)
+        return annotations_list
+
+    @staticmethod
+    def __get_end_indices(annotations: Annotations) -> List[int]:
+        return list(sorted(set(SpanStore.from_layer(annotations.get_final_layer()).end_indices)))
+
+    def __find_eos(self, text: str) -> List[int]:
+        return self.__get_end_indices(self.eos(text))
+
+    def __find_eos_batch(self, texts: List[str]) -> List[List[int]]:
+        return [self.__get_end_indices(annotations) for annotations in self.eos_batch(texts)]
+
     def find_eos(self, text: str) -> List[int]:
-        annotations = self.eos(text)
-        end_index = list(sorted(list(set([s_a.end_index for s_a in annotations.get_final_layer()]))))
-        return end_index
+        return self._find_eos_with_cache(text, self.__find_eos)
+
+    def _find_eos_distinct(self, texts: List[str]) -> List[List[int]]:
+        if self.path_model is None:
+            # rule-based annotators share no work across documents
+            return super()._find_eos_distinct(texts)
+        return self._find_eos_batch_with_cache(texts, self.__find_eos_batch)
 
     def __call__(self, text: str) -> Iterator[str]:
-        annotations = self.eos(text)
-        end_index = sorted(list(set([s_a.end_index for s_a in annotations.get_final_layer()])))
-        __start_index = 0
-        __end_index = 0
-        for e_i in end_index:
-            part_sentences = text[__start_index:e_i]
-            __start_index = e_i
-            __end_index = e_i
-            yield part_sentences
-
-        if __end_index < len(text):
-            part_sentences = text[__end_index:]
-            yield part_sentences
+        yield from self._split_text(text, self.find_eos(text))
+
+    def get_segmentation(self, text: str, annotations: Optional[Annotations] = None) -> Segmentation:
+        """
+        Segment a text which will be edited. Pass the result to edit_segmentation() after each edit.
+
+        :param annotations: the result of eos() of text, which is reused if given.
+        """
+        return get_segmentation(self, text, annotations)
+
+    def edit_segmentation(
+        self,
+        previous: Segmentation,
+        offset: int,
+        deleted_length: int,
+        inserted_text: str,
+        *,
+        margin: int = DEFAULT_MARGIN,
+    ) -> Segmentation:
+        """
+        Update a segmentation after replacing deleted_length characters from offset with inserted_text.
+
+        Only the sentences around the edit are segmented again, and boundaries of the rest are shifted.
+        The result is the same as get_segmentation() of the edited text.
+        See bunkai.algorithm.bunkai_sbd.edit.edit_segmentation for details.
+        """
+        return edit_segmentation(self, previous, offset, deleted_length, inserted_text, margin=margin)
+
+    def segment_stream(
+        self,
+        chunks: Union[Iterable[str], TextIO],
+        *,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        margin: int = DEFAULT_MARGIN,
+    ) -> Iterator[str]:
+        """
+        Split one document given as chunks of text or a text stream into sentences.
+
+        The document is segmented in bounded windows, and sentences are yielded as soon as they are fixed.
+        Sentences are the same as __call__ on the whole document. See StreamSegmenter for window_size and margin.
+        """
+        if hasattr(chunks, "read"):
+            stream = cast(TextIO, chunks)
+            chunks = iter(lambda: stream.read(window_size), "")
+        segmenter = StreamSegmenter(self, window_size=window_size, margin=margin)
+        for chunk in chunks:
+            yield from segmenter.feed(chunk)
+        yield from segmenter.close()
+
+    def get_lookahead(self) -> int:
+        """Get the number of characters after a boundary which the annotators look at."""
+        return max(
+            DEFAULT_LOOKAHEAD,
+            get_max_rule_length(
+                MORPHEMES_AFTER_CANDIDATE if self.indirect_quote_rules is None else self.indirect_quote_rules
+            ),
+        )
+
+    def incremental_segmenter(
+        self,
+        *,
+        lookahead: Optional[int] = None,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        margin: int = DEFAULT_MARGIN,
+    ) -> StreamSegmenter:
+        """
+        Get a segmenter for a text which grows a few characters at a time, such as a live transcript.
+
+        feed() returns sentences as soon as their boundaries can not change, and close() returns the rest.
+        Sentences are the same as __call__ on the whole text. See StreamSegmenter for the arguments.
+
+        :param lookahead: the number of characters after a boundary before it is fixed. get_lookahead() by default.
+        """
+        return StreamSegmenter(
+            self,
+            window_size=window_size,
+            margin=margin,
+            lookahead=self.get_lookahead() if lookahead is None else lookahead,
+        )
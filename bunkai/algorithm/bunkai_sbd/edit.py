@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import bisect
+import dataclasses
+import re
+import typing
+
+from janome.tokenizer import Tokenizer
+
+from bunkai.algorithm.bunkai_sbd.stream import DEFAULT_MARGIN, JANOME_PUNCTUATIONS, LATTICE_BREAK, find_lattice_starts
+from bunkai.base.annotation import Annotations
+
+if typing.TYPE_CHECKING:
+    from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+
+"""
+This module updates boundaries of a document after an edit without segmenting the whole document again.
+
+Tokens of Janome depend on lattices of the whole text (see bunkai.algorithm.bunkai_sbd.stream).
+Lattices before the one containing the edit do not change, and lattices after the edit are the same as before
+once a lattice starts where a previous one started. Only the text between them is segmented again.
+"""
+
+# the whole text is segmented when windows after the first one grow over this ratio of the text
+MAX_WINDOW_RATIO: float = 0.25
+# characters which can end a lattice of Janome before MAX_CHUNK_SIZE
+RE_LATTICE_END = re.compile("[" + re.escape(JANOME_PUNCTUATIONS) + "]|\n\n|\r\n\r\n")
+
+
+@dataclasses.dataclass
+class Segmentation(object):
+    """A text with its end-of-sentence indices and starts of lattices of Janome."""
+
+    text: str
+    eos: typing.List[int]
+    lattice_starts: typing.List[int]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        """Iterate sentences."""
+        __start_index = 0
+        for e_i in self.eos:
+            yield self.text[__start_index:e_i]
+            __start_index = e_i
+        if __start_index < len(self.text):
+            yield self.text[__start_index:]
+
+
+def apply_edit(text: str, offset: int, deleted_length: int, inserted_text: str) -> str:
+    """Replace deleted_length characters from offset with inserted_text."""
+    if offset < 0 or deleted_length < 0 or offset + deleted_length > len(text):
+        raise ValueError(f"the edit is out of the text: {offset}, {deleted_length}, {len(text)}")
+    return text[:offset] + inserted_text + text[offset + deleted_length :]
+
+
+def get_lattice_starts(text: str, annotations: Annotations, start_index: int) -> typing.List[int]:
+    """Get starts of lattices of Janome from start_index with the tokens of eos(text)."""
+    token_ends = []
+    __position = len(text) - len(text.lstrip())
+    for token in annotations.get_morph_analysis():
+        __position += len(token.word_surface)
+        token_ends.append(__position)
+    return find_lattice_starts(text, token_ends, start_index)
+
+
+def get_segmentation(
+    disambiguator: "BunkaiSentenceBoundaryDisambiguation", text: str, annotations: typing.Optional[Annotations] = None
+) -> Segmentation:
+    """
+    Segment a text to be edited.
+
+    :param annotations: the result of eos() of text. If not given, eos() is called.
+    """
+    if disambiguator.local_morph:
+        raise ValueError("local_morph can not be used since lattices are found from all tokens.")
+    if annotations is None:
+        annotations = disambiguator.eos(text)
+    return Segmentation(
+        text=text,
+        eos=sorted(set(s.end_index for s in annotations.get_final_layer())),
+        lattice_starts=get_lattice_starts(text, annotations, len(text) - len(text.lstrip())),
+    )
+
+
+def edit_segmentation(
+    disambiguator: "BunkaiSentenceBoundaryDisambiguation",
+    previous: Segmentation,
+    offset: int,
+    deleted_length: int,
+    inserted_text: str,
+    *,
+    margin: int = DEFAULT_MARGIN,
+) -> Segmentation:
+    """
+    Get the segmentation of the text edited by replacing deleted_length characters from offset with inserted_text.
+
+    The text is segmented from a lattice starting margin characters or more before the lattice containing the edit,
+    to the first lattice after the edit which starts where a lattice started before the edit.
+    Boundaries margin characters or more away from the edited lattices are taken from previous and shifted.
+    The result is the same as get_segmentation() of the edited text unless the linebreak model is used.
+    If lattices are not aligned again within windows of MAX_WINDOW_RATIO of the text,
+    such as in a text without punctuations, the whole text is segmented.
+
+    :param margin: the number of characters before and after a boundary which annotators look at.
+    """
+    if margin <= 0:
+        raise ValueError(f"margin must be positive: {margin}")
+    text = previous.text
+    new_text = apply_edit(text, offset, deleted_length, inserted_text)
+    n_spaces = len(text) - len(text.lstrip())
+    if len(new_text) - len(new_text.lstrip()) != n_spaces or len(new_text) == n_spaces:
+        # offsets of all tokens change
+        return get_segmentation(disambiguator, new_text)
+
+    shift = len(inserted_text) - deleted_length
+    edit_end_index = offset + len(inserted_text)
+    if shift != 0 and RE_LATTICE_END.search(new_text, edit_end_index) is None:
+        # lattices after the edit end by their length, so they are shifted and never align with previous ones
+        return get_segmentation(disambiguator, new_text)
+    lattice_starts = previous.lattice_starts
+    # boundaries up to start_index look at neither the edited text nor tokens of the lattice containing the edit
+    start_index = lattice_starts[max(0, bisect.bisect_right(lattice_starts, offset) - 1)] - margin
+    context_index = max(0, bisect.bisect_right(lattice_starts, start_index - margin) - 1)
+    context_start = lattice_starts[context_index]
+    prefix = "" if context_index == 0 else text[:n_spaces] + LATTICE_BREAK
+
+    size = 2 * Tokenizer.MAX_CHUNK_SIZE
+    # the number of characters segmented so far
+    n_segmented = 0
+    while True:
+        window_end = min(len(new_text), edit_end_index + size)
+        window = prefix + new_text[context_start if len(prefix) > 0 else 0 : window_end]
+        if n_segmented > 0 and n_segmented + len(window) > MAX_WINDOW_RATIO * len(new_text):
+            # lattices do not align soon, e.g. in a text without punctuations
+            return get_segmentation(disambiguator, new_text)
+        n_segmented += len(window)
+        base_index = context_start - len(prefix) if len(prefix) > 0 else 0
+        annotations = disambiguator.eos(window)
+        window_lattice_starts = [
+            base_index + s
+            for s in get_lattice_starts(window, annotations, len(prefix) if len(prefix) > 0 else n_spaces)
+        ]
+
+        # boundaries from end_index are shifted. They follow the first lattice after the edit aligned with previous.
+        aligned_start: typing.Optional[int] = None
+        end_index = len(new_text) + 1
+        if window_end < len(new_text):
+            for s in window_lattice_starts:
+                __end_index = max(s, edit_end_index + margin)
+                if __end_index > window_lattice_starts[-1] - margin:
+                    break
+                __i = bisect.bisect_left(lattice_starts, s - shift)
+                if s >= edit_end_index and __i < len(lattice_starts) and lattice_starts[__i] == s - shift:
+                    aligned_start = s
+                    end_index = __end_index
+                    break
+            if aligned_start is None:
+                size *= 2
+                continue
+
+        window_eos = sorted(set(base_index + s.end_index for s in annotations.get_final_layer()))
+        eos = previous.eos
+        new_eos = (
+            eos[: bisect.bisect_right(eos, start_index)]
+            + [e for e in window_eos if start_index < e < end_index]
+            + [e + shift for e in eos[bisect.bisect_left(eos, end_index - shift) :]]
+        )
+        new_lattice_starts = lattice_starts[: context_index + 1] + [
+            s for s in window_lattice_starts if context_start < s and (aligned_start is None or s < aligned_start)
+        ]
+        if aligned_start is not None:
+            __i = bisect.bisect_left(lattice_starts, aligned_start - shift)
+            new_lattice_starts += [s + shift for s in lattice_starts[__i:]]
+        else:
+            # the same as find_lattice_starts() when the text is shortened
+            __end_index = len(new_text.rstrip())
+            for __i in range(1, len(new_lattice_starts)):
+                if new_lattice_starts[__i - 1] + Tokenizer.MAX_CHUNK_SIZE > __end_index:
+                    del new_lattice_starts[__i:]
+                    break
+        return Segmentation(text=new_text, eos=new_eos, lattice_starts=new_lattice_starts)
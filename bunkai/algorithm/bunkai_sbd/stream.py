@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+import bisect
+import collections
+import re
+import typing
+
+from janome.tokenizer import Token, Tokenizer
+
+from bunkai.algorithm.bunkai_sbd.annotator.candidate_scanner import RE_TRIGGER
+from bunkai.algorithm.bunkai_sbd.annotator.constant import LAYER_NAME_FIRST
+from bunkai.algorithm.bunkai_sbd.annotator.emoji_table import get_emoji_table
+from bunkai.base.tokenizer_registry import get_janome_tokenizer
+
+if typing.TYPE_CHECKING:
+    from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+
+"""
+This module splits a text given in chunks into sentences in bounded windows.
+
+Rule-based annotators look at a few characters around boundaries, but tokens depend on how Janome splits a text.
+Janome analyzes a long text in lattices of CHUNK_SIZE to MAX_CHUNK_SIZE characters,
+which end after punctuations or blank lines, so a window has to start where a lattice of the whole text starts.
+With a lookahead, a boundary is fixed as soon as the characters after it are given and tokens over them are stable.
+Tokens of the fixed text are kept, so only the text around new characters is tokenized and annotated again.
+"""
+
+DEFAULT_WINDOW_SIZE: int = 16384
+# characters before and after a boundary which rule-based annotators look at
+DEFAULT_MARGIN: int = 256
+# characters after a boundary which rule-based annotators look at, e.g. symbols around a facemark
+DEFAULT_LOOKAHEAD: int = 16
+JANOME_PUNCTUATIONS: str = "、。,.？?！!"
+# characters which can end a candidate besides TRIGGERS of candidate_scanner
+CLOSING_CHARACTERS: str = ")）"
+RE_SPACES = re.compile(r"\s*")
+# Janome ends a lattice at the end of this text. A text after it is analyzed from a new lattice.
+# The digits are grouped into one unknown word, so Janome skips over them quickly.
+LATTICE_BREAK: str = "1" * (Tokenizer.CHUNK_SIZE - 1) + "。"
+# characters before a settled end from which a growing text is tokenized again
+DEFAULT_RESTART_MARGIN: int = 16
+# the last character of a text after which Janome can end a lattice before MAX_CHUNK_SIZE
+RE_LATTICE_END_CHARACTER = re.compile("[" + re.escape(JANOME_PUNCTUATIONS) + "]|(?<=\n)\n|(?<=\r\n\r)\n")
+
+
+def is_lattice_end(text: str, start_index: int, end_index: int) -> bool:
+    """Check if Janome ends a lattice starting at start_index at end_index, where a token ends."""
+    length = end_index - start_index
+    if length >= Tokenizer.MAX_CHUNK_SIZE:
+        return True
+    if length < Tokenizer.CHUNK_SIZE:
+        return False
+    return (
+        text[end_index - 1] in JANOME_PUNCTUATIONS
+        or text.endswith("\n\n", start_index, end_index)
+        or text.endswith("\r\n\r\n", start_index, end_index)
+    )
+
+
+def find_lattice_starts(text: str, token_ends: typing.Iterable[int], start_index: int) -> typing.List[int]:
+    """
+    Find starts of lattices of Janome when text is tokenized from start_index.
+
+    The search stops at the first lattice which may be cut by the end of the text,
+    i.e. which has less than MAX_CHUNK_SIZE characters after its start. Tokens before its start are final.
+    """
+    __end_index = len(text.rstrip())
+    starts = [start_index]
+    for end_index in token_ends:
+        if starts[-1] + Tokenizer.MAX_CHUNK_SIZE > __end_index:
+            break
+        if end_index > starts[-1] and is_lattice_end(text, starts[-1], end_index):
+            starts.append(end_index)
+    return starts
+
+
+class IncrementalTokenizer(object):
+    def __init__(self, *, restart_margin: int = DEFAULT_RESTART_MARGIN):
+        """
+        Tokenize a growing text with Janome, keeping tokens before a settled end.
+
+        A longer text is tokenized from a settled token restart_margin characters or more before the settled end.
+        Janome takes the best path after a token regardless of tokens before it, so the new tokens replace
+        settled ones from the first token which is also settled, if the rest of the settled tokens are the same.
+        Otherwise the margin is doubled. The text is tokenized from the start of its lattice at last,
+        or when Janome may end the lattice within the new tokens.
+        """
+        self.restart_margin = restart_margin
+        self.tokens: typing.List[typing.Tuple[int, Token]] = []
+        self.settled_end = 0
+        # the start of the lattice at the settled end. None while it is the start of the whole text.
+        self.lattice_start: typing.Optional[int] = None
+        self.__starts: typing.List[int] = []
+
+    @staticmethod
+    def get_key(token: Token) -> typing.Tuple[str, ...]:
+        return (
+            token.surface,
+            token.part_of_speech,
+            token.infl_type,
+            token.infl_form,
+            token.base_form,
+            token.reading,
+            token.phonetic,
+        )
+
+    def __get_lattice_start(self, text: str, end_index: int) -> int:
+        if self.lattice_start is None:
+            # Janome strips the whole text
+            return min(end_index, RE_SPACES.match(text).end())
+        return self.lattice_start
+
+    def __find_restart(self, text: str, end_index: int, margin: int) -> typing.Optional[int]:
+        """Find the start of a settled token margin characters or more before the settled end."""
+        lattice_start = self.__get_lattice_start(text, end_index)
+        __i = bisect.bisect_right(self.__starts, self.settled_end - margin) - 1
+        # Janome strips the text
+        while __i >= 0 and text[self.__starts[__i]].isspace():
+            __i -= 1
+        if __i < 0 or self.__starts[__i] < lattice_start:
+            return None
+        start_index = self.__starts[__i]
+        # Janome ends a lattice at a punctuation or a blank line CHUNK_SIZE characters or more after its start
+        if end_index - lattice_start >= Tokenizer.MAX_CHUNK_SIZE:
+            return None
+        __search_start = max(start_index, lattice_start + Tokenizer.CHUNK_SIZE - 1)
+        if __search_start < end_index - 1 and RE_LATTICE_END_CHARACTER.search(text, __search_start, end_index - 1):
+            return None
+        return start_index
+
+    def __merge(
+        self, tokens: typing.List[typing.Tuple[int, Token]]
+    ) -> typing.Optional[typing.List[typing.Tuple[int, Token]]]:
+        """Replace settled tokens with tokens from the first one which is the same as a settled token."""
+        for __j, (start_index, token) in enumerate(tokens):
+            if start_index >= self.settled_end:
+                return None
+            __i = bisect.bisect_left(self.__starts, start_index)
+            if __i == len(self.__starts) or self.__starts[__i] != start_index:
+                continue
+            if self.get_key(self.tokens[__i][1]) != self.get_key(token):
+                continue
+            __rest = tokens[__j : __j + len(self.tokens) - __i]
+            if [(s, self.get_key(t)) for s, t in __rest] != [(s, self.get_key(t)) for s, t in self.tokens[__i:]]:
+                return None
+            return self.tokens[:__i] + tokens[__j:]
+        return None
+
+    def __tokenize_lattice(
+        self, text: str, end_index: int
+    ) -> typing.Tuple[typing.List[typing.Tuple[int, Token]], typing.Optional[int]]:
+        """Tokenize text[:end_index] from the start of the lattice at the settled end."""
+        tokenizer = get_janome_tokenizer()
+        lattice_start = self.__get_lattice_start(text, end_index)
+        if self.lattice_start is None:
+            __prefix, __start_index = "", 0
+        else:
+            __prefix, __start_index = LATTICE_BREAK, lattice_start
+        tokens = [t for t in self.tokens if t[0] < lattice_start]
+        __position = lattice_start - len(__prefix)
+        for token in tokenizer.tokenize(__prefix + text[__start_index:end_index]):
+            if __position >= lattice_start:
+                tokens.append((__position, token))
+            __position += len(token.surface)
+
+        # lattices which end before the end of the text do not change
+        __end_index = len(text[:end_index].rstrip())
+        __lattice_start = self.lattice_start
+        for start_index, token in tokens:
+            token_end_index = start_index + len(token.surface)
+            if start_index >= lattice_start and token_end_index < __end_index:
+                if is_lattice_end(text, lattice_start, token_end_index):
+                    lattice_start = __lattice_start = token_end_index
+        return tokens, __lattice_start
+
+    def tokenize(
+        self, text: str, end_index: int
+    ) -> typing.Tuple[typing.List[typing.Tuple[int, Token]], typing.Optional[int]]:
+        """
+        Get (start, token) of text[:end_index] and the start of the last lattice which ends before end_index.
+
+        text must start with the text given to settle().
+        """
+        tokenizer = get_janome_tokenizer()
+        margin = self.restart_margin
+        while True:
+            restart_index = self.__find_restart(text, end_index, margin)
+            if restart_index is None:
+                return self.__tokenize_lattice(text, end_index)
+            tokens = []
+            __position = restart_index
+            for token in tokenizer.tokenize(text[restart_index:end_index]):
+                tokens.append((__position, token))
+                __position += len(token.surface)
+            merged = self.__merge(tokens)
+            if merged is not None:
+                return merged, self.lattice_start
+            margin *= 2
+
+    def settle(
+        self, tokens: typing.List[typing.Tuple[int, Token]], end_index: int, lattice_start: typing.Optional[int]
+    ) -> None:
+        """Keep tokens before end_index, which is the end of a token or the start of the lattice."""
+        self.tokens = [t for t in tokens if t[0] + len(t[1].surface) <= end_index]
+        self.__starts = [start_index for start_index, _ in self.tokens]
+        self.settled_end = end_index
+        self.lattice_start = lattice_start
+
+    def shift(self, n_characters: int) -> None:
+        """Drop the first n_characters of the text. They must be before the start of the lattice."""
+        assert self.lattice_start is not None and n_characters <= self.lattice_start
+        self.tokens = [(s - n_characters, t) for s, t in self.tokens if s >= n_characters]
+        self.__starts = [start_index for start_index, _ in self.tokens]
+        self.settled_end -= n_characters
+        self.lattice_start -= n_characters
+
+    def find_token_start(self, text: str, end_index: int) -> typing.Optional[int]:
+        """Find the start of the last settled token at or before end_index which is not a space."""
+        __i = bisect.bisect_right(self.__starts, end_index) - 1
+        while __i >= 0 and text[self.__starts[__i]].isspace():
+            __i -= 1
+        return None if __i < 0 else self.__starts[__i]
+
+
+class StreamSegmenter(object):
+    def __init__(
+        self,
+        disambiguator: "BunkaiSentenceBoundaryDisambiguation",
+        *,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        margin: int = DEFAULT_MARGIN,
+        lookahead: typing.Optional[int] = None,
+    ):
+        """
+        Split a text given in chunks into sentences without holding the whole text.
+
+        A window is the text not emitted yet, preceded by emitted text from the start of a lattice of Janome.
+        Boundaries margin characters or more before the last lattice of a window are fixed, and
+        their sentences are emitted. Sentences are the same as segmenting the whole text at once
+        unless the linebreak model is used, since it sees only a window.
+        Memory use is O(window_size + MAX_CHUNK_SIZE + margin + the length of the longest sentence).
+
+        :param window_size: the number of new characters segmented at once.
+        :param margin: the number of characters before and after a boundary which annotators look at.
+        :param lookahead: If given, the text is segmented incrementally for texts given a few characters at a time.
+            A window is segmented lookahead * 2 characters after a character which may end a sentence.
+            A boundary is fixed when lookahead characters after it are given and tokens over them
+            do not change without the last lookahead characters of the window. Otherwise it is checked again later.
+            Tokens before fixed boundaries are kept, and Janome tokenizes again from a few tokens before
+            the new characters unless it may end a lattice among them. The annotators look at margin characters
+            before the boundaries not fixed yet, so the cost of a chunk is mostly bounded by its length and margin.
+        """
+        if window_size <= 0 or margin <= 0:
+            raise ValueError(f"window_size and margin must be positive: {window_size}, {margin}")
+        if lookahead is not None and lookahead <= 0:
+            raise ValueError(f"lookahead must be positive: {lookahead}")
+        if disambiguator.local_morph:
+            raise ValueError("local_morph can not be used since it tokenizes the whole text or not by its length.")
+        self.disambiguator = disambiguator
+        self.window_size = window_size
+        self.margin = margin
+        self.lookahead = lookahead
+        # the text not emitted yet, chunks not moved into it and emitted text from the start of a lattice
+        self.__buffer = ""
+        self.__pending: typing.Deque[str] = collections.deque()
+        self.__pending_size = 0
+        self.__context = ""
+        # leading spaces of the whole text. None while the context starts at the beginning of the text.
+        self.__leading_spaces: typing.Optional[str] = None
+        self.__next_size = window_size
+        self.__is_started = False
+        # the length of the buffer scanned for triggers, and the length at which the window is segmented next
+        self.__n_scanned = 0
+        self.__retry_size: typing.Optional[int] = None
+        # tokens of the window settled by the last segmentation, and the start of the text annotators look at
+        self.__tokenizer = IncrementalTokenizer()
+        self.__view_start = 0
+        if lookahead is not None:
+            self.__re_triggers = [
+                RE_TRIGGER,
+                re.compile("[" + re.escape(CLOSING_CHARACTERS) + "]"),
+                get_emoji_table().re_start,
+            ]
+
+    def __fill(self, size: int) -> None:
+        """Move pending chunks into the buffer up to size characters."""
+        __parts = [self.__buffer]
+        __size = len(self.__buffer)
+        while __size < size and len(self.__pending) > 0:
+            chunk = self.__pending.popleft()
+            if __size + len(chunk) > size:
+                self.__pending.appendleft(chunk[size - __size :])
+                chunk = chunk[: size - __size]
+            __parts.append(chunk)
+            __size += len(chunk)
+            self.__pending_size -= len(chunk)
+        self.__buffer = "".join(__parts)
+
+    def __get_prefix(self) -> str:
+        """
+        Get a text put before the context.
+
+        The context starts a lattice after LATTICE_BREAK. Janome strips a text and token offsets start
+        from the first non-space character, so the leading spaces of the whole text are also put to keep offsets.
+        """
+        if self.__leading_spaces is None:
+            return ""
+        return self.__leading_spaces + LATTICE_BREAK
+
+    def __segment(self, is_final: bool) -> typing.List[str]:
+        """Segment the current window and emit sentences whose boundaries are fixed."""
+        if self.lookahead is None:
+            return self.__segment_window(is_final)
+        return self.__segment_incremental(is_final)
+
+    def __segment_window(self, is_final: bool) -> typing.List[str]:
+        """Segment the window from the start of a lattice and emit sentences margin characters before its last one."""
+        prefix = self.__get_prefix()
+        window = prefix + self.__context + self.__buffer
+        start_index = len(prefix) + len(self.__context)
+        n_spaces = len(window) - len(window.lstrip())
+
+        annotations = self.disambiguator.eos(window)
+        token_ends = []
+        __position = n_spaces
+        for token in annotations.get_morph_analysis():
+            __position += len(token.word_surface)
+            token_ends.append(__position)
+        lattice_starts = find_lattice_starts(window, token_ends, len(prefix) if len(prefix) > 0 else n_spaces)
+        end_index = len(window) if is_final else lattice_starts[-1] - self.margin
+
+        sentences: typing.List[str] = []
+        __start_index = start_index
+        for e_i in sorted(set(s.end_index for s in annotations.get_final_layer())):
+            if e_i <= __start_index:
+                continue
+            if e_i > end_index:
+                break
+            sentences.append(window[__start_index:e_i])
+            __start_index = e_i
+        if is_final and __start_index < len(window):
+            sentences.append(window[__start_index:])
+            __start_index = len(window)
+
+        if __start_index > start_index:
+            # the next window starts from the last lattice starting margin characters or more before the boundary
+            lattice_start = max(s for s in lattice_starts if s <= max(lattice_starts[0], __start_index - self.margin))
+            if lattice_start > lattice_starts[0]:
+                if self.__leading_spaces is None:
+                    self.__leading_spaces = window[:n_spaces]
+                self.__context = window[lattice_start:__start_index]
+            else:
+                self.__context = window[len(prefix) : __start_index]
+            self.__buffer = window[__start_index:]
+        self.__next_size = len(self.__buffer) + self.window_size
+        return sentences
+
+    @staticmethod
+    def __find_stable_end(
+        tokens: typing.List[typing.Tuple[int, Token]], cut_tokens: typing.List[typing.Tuple[int, Token]]
+    ) -> int:
+        """Find the end of tokens which are the same when the window is cut lookahead characters before its end."""
+        stable_end_index = 0
+        for (start_index, token), (cut_start_index, cut_token) in zip(tokens, cut_tokens):
+            if token is not cut_token and (
+                start_index != cut_start_index
+                or IncrementalTokenizer.get_key(token) != IncrementalTokenizer.get_key(cut_token)
+            ):
+                break
+            stable_end_index = start_index + len(token.surface)
+        return stable_end_index
+
+    def __annotate_view(
+        self, window: str, tokens: typing.List[typing.Tuple[int, Token]], start_index: int
+    ) -> typing.List[typing.Tuple[int, str]]:
+        """
+        Annotate the window from a settled token margin characters before boundaries which are not fixed yet.
+
+        Boundaries before the settled end minus lookahead were fixed, so annotators do not look at the text
+        before them again, and boundaries found there in the view are ignored.
+        Tokens are given to the annotators instead of tokenizing the view.
+        Return (end, rule name) of spans in the final layer after the fixed boundaries as positions in the window.
+        """
+        __fixed_index = self.__tokenizer.settled_end - self.lookahead
+        while __fixed_index > 0 and window[__fixed_index - 1].isspace():
+            __fixed_index -= 1
+        __fixed_index = max(start_index, __fixed_index)
+        view_start = self.__tokenizer.find_token_start(window, __fixed_index - self.margin)
+        view_start = self.__view_start if view_start is None else max(self.__view_start, view_start)
+        if self.__leading_spaces is not None:
+            prefix = self.__leading_spaces
+        elif view_start > 0:
+            prefix = window[: RE_SPACES.match(window).end()]
+        else:
+            prefix = ""
+        # Janome strips the whole text, so token offsets are positions after its leading spaces
+        view = prefix + window[view_start:]
+        __shift = view_start - len(prefix)
+        __offset = __shift + len(view) - len(view.lstrip())
+        __i = len(tokens)
+        while __i > 0 and tokens[__i - 1][0] >= view_start:
+            __i -= 1
+        annotations = self.disambiguator.eos(view, tokens=[(s - __offset, t) for s, t in tokens[__i:]])
+        return [
+            (s.end_index + __shift, s.rule_name)
+            for s in annotations.get_final_layer()
+            if s.end_index + __shift >= __fixed_index
+        ]
+
+    def __segment_incremental(self, is_final: bool) -> typing.List[str]:
+        """Segment the window with tokens kept from the last call and emit sentences whose boundaries are fixed."""
+        window = self.__context + self.__buffer
+        start_index = len(self.__context)
+        tokens, lattice_start = self.__tokenizer.tokenize(window, len(window))
+        if is_final:
+            end_index = len(window)
+        else:
+            # boundaries followed by lookahead characters whose tokens are stable
+            cut_tokens, _ = self.__tokenizer.tokenize(window, len(window) - self.lookahead)
+            end_index = max(self.__find_stable_end(tokens, cut_tokens), lattice_start or 0)
+        final_layer = self.__annotate_view(window, tokens, start_index)
+        self.__tokenizer.settle(tokens, end_index, lattice_start)
+
+        sentences: typing.List[str] = []
+        __start_index = start_index
+        for e_i in sorted(set(e for e, _ in final_layer)):
+            if e_i <= __start_index:
+                continue
+            if is_final:
+                if e_i > end_index:
+                    break
+            elif RE_SPACES.match(window, e_i).end() + self.lookahead > end_index:
+                break
+            sentences.append(window[__start_index:e_i])
+            __start_index = e_i
+        if is_final and __start_index < len(window):
+            sentences.append(window[__start_index:])
+            __start_index = len(window)
+        # a boundary can be fixed when lookahead characters after its tokens are given
+        unfixed_ends = [e for e, rule_name in final_layer if e > __start_index and rule_name != LAYER_NAME_FIRST]
+        if len(unfixed_ends) == 0:
+            self.__retry_size = None
+        else:
+            __retry_index = RE_SPACES.match(window, min(unfixed_ends)).end() + 2 * self.lookahead
+            if __retry_index <= len(window):
+                # tokens after the boundary are not stable yet
+                __retry_index = len(window) + self.lookahead
+            self.__retry_size = __retry_index - __start_index
+
+        if __start_index > start_index:
+            # annotators look at margin characters before the next boundary, and Janome at the start of the lattice
+            view_start = self.__tokenizer.find_token_start(window, __start_index - self.margin)
+            if view_start is not None:
+                self.__view_start = max(self.__view_start, view_start)
+            __n_dropped = 0 if lattice_start is None else min(self.__view_start, lattice_start)
+            if __n_dropped > 0:
+                if self.__leading_spaces is None:
+                    self.__leading_spaces = window[: RE_SPACES.match(window).end()]
+                self.__tokenizer.shift(__n_dropped)
+                self.__view_start -= __n_dropped
+            self.__context = window[__n_dropped:__start_index]
+            self.__buffer = window[__start_index:]
+        self.__next_size = len(self.__buffer) + self.window_size
+        self.__n_scanned = len(self.__buffer)
+        return sentences
+
+    def __scan(self) -> None:
+        """Find new characters which may end a sentence, and segment the window lookahead characters after them."""
+        for re_trigger in self.__re_triggers:
+            match_obj = re_trigger.search(self.__buffer, self.__n_scanned)
+            if match_obj is not None:
+                __retry_size = match_obj.end() + 2 * self.lookahead
+                if self.__retry_size is None or __retry_size < self.__retry_size:
+                    self.__retry_size = __retry_size
+        self.__n_scanned = len(self.__buffer)
+
+    def feed(self, text: str) -> typing.List[str]:
+        """Add a chunk of the text and get sentences which are fixed."""
+        if len(text) > 0:
+            self.__is_started = True
+            self.__pending.append(text)
+            self.__pending_size += len(text)
+        sentences: typing.List[str] = []
+        while len(self.__buffer) + self.__pending_size >= self.__next_size:
+            self.__fill(self.__next_size)
+            sentences += self.__segment(is_final=False)
+        if self.lookahead is not None and self.__pending_size > 0:
+            self.__fill(self.__next_size)
+            self.__scan()
+            if self.__retry_size is not None and len(self.__buffer) >= self.__retry_size:
+                sentences += self.__segment(is_final=False)
+        return sentences
+
+    def close(self) -> typing.List[str]:
+        """Get the rest of sentences at the end of the text."""
+        if not self.__is_started:
+            return list(self.disambiguator(""))
+        sentences: typing.List[str] = []
+        while self.__pending_size > 0:
+            self.__fill(self.__next_size)
+            if self.__pending_size > 0:
+                sentences += self.__segment(is_final=False)
+        if len(self.__buffer) > 0:
+            sentences += self.__segment(is_final=True)
+        self.__buffer = ""
+        self.__context = ""
+        self.__retry_size = None
+        self.__n_scanned = 0
+        self.__tokenizer = IncrementalTokenizer()
+        self.__view_start = 0
+        return sentences
@@ -3,14 +3,17 @@
 import collections
 import logging
 import os
+import sys
 import typing
 import unicodedata
 
-from janome.tokenizer import Token, Tokenizer
+from janome.tokenizer import Token
 from transformers.models.bert.tokenization_bert import BertTokenizer, WordpieceTokenizer, load_vocab
 from transformers.utils.hub import cached_file
 
 import bunkai.constant
+from bunkai.base.cache import ENTRY_OVERHEAD_BYTES, CacheStats, LRUCache
+from bunkai.base.tokenizer_registry import get_janome_tokenizer
 
 """
 The original source code is from cl-tohoku/bert-japanese.
@@ -20,6 +23,8 @@ The original source code is under Apache-2.0 License.
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SUBWORD_CACHE_BYTES: int = 8 * 1024 * 1024
+
 
 class JanomeTokenizer(object):
     """Runs basic tokenization with Janome morphological parser."""
@@ -40,7 +45,7 @@ class JanomeTokenizer(object):
         self.do_lower_case = do_lower_case
         self.never_split = never_split if never_split is not None else []
         self.normalize_text = normalize_text
-        self.janome_tokenizer = Tokenizer()
+        self.janome_tokenizer = get_janome_tokenizer()
 
     def tokenize(self, text: str, *, never_split=None, **kwargs):
         """Tokenizes a piece of text."""
@@ -118,6 +123,7 @@ class JanomeSubwordsTokenizer(BertTokenizer):
         pad_token="[PAD]",
         cls_token="[CLS]",
         mask_token="[MASK]",
+        subword_cache_bytes: int = DEFAULT_SUBWORD_CACHE_BYTES,
         **kwargs,
     ):
         """
@@ -133,7 +139,15 @@ class JanomeSubwordsTokenizer(BertTokenizer):
                 Type of word tokenizer. basic / janome / pre_tokenize
         :arg subword_tokenizer_type: (`optional`) string (default "wordpiece") Type of subword tokenizer.
         :arg cls_token: No description.
+        :arg subword_cache_bytes: (`optional`) the maximum size of the cache of ids of subwords of words.
+                0 disables the cache.
         """
+        # the vocabulary is loaded first since the base class looks it up to register special tokens
+        if os.path.isfile(vocab_file):
+            self.vocab = load_vocab(vocab_file)
+        else:
+            self.vocab = load_vocab(cached_file(vocab_file, "vocab.txt"))
+
         super(BertTokenizer, self).__init__(
             unk_token=unk_token,
             sep_token=sep_token,
@@ -143,11 +157,6 @@ class JanomeSubwordsTokenizer(BertTokenizer):
             **kwargs,
         )
 
-        if os.path.isfile(vocab_file):
-            self.vocab = load_vocab(vocab_file)
-        else:
-            self.vocab = load_vocab(cached_file(vocab_file, "vocab.txt"))
-
         # add new vocab
         self.add_tokens([" ", bunkai.constant.METACHAR_LINE_BREAK])
 
@@ -164,6 +173,33 @@ class JanomeSubwordsTokenizer(BertTokenizer):
                 raise ValueError("Invalid subword_tokenizer_type '{}' is specified.".format(subword_tokenizer_type))
 
         self.janome_tokenizer = JanomeTokenizer()
+        self.__subword_cache: typing.Optional[LRUCache[str, typing.Tuple[int, ...]]] = None
+        if subword_cache_bytes > 0:
+            self.__subword_cache = LRUCache(subword_cache_bytes, self.sizeof_subword_cache_entry)
+
+    @staticmethod
+    def sizeof_subword_cache_entry(key: str, value: typing.Tuple[int, ...]) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+
+    def get_subword_ids(self, word: str) -> typing.List[int]:
+        """
+        Get ids of subwords of a word, the same as convert_tokens_to_ids(tokenize(word)).
+
+        Words such as particles and punctuations repeat, so results are memoized by their surfaces.
+        """
+        if self.__subword_cache is None:
+            return self.convert_tokens_to_ids(self.tokenize(word))
+        ids = self.__subword_cache.get(word)
+        if ids is None:
+            ids = tuple(self.convert_tokens_to_ids(self.tokenize(word)))
+            self.__subword_cache.put(word, ids)
+        return list(ids)
+
+    def subword_cache_stats(self) -> typing.Optional[CacheStats]:
+        """Get hits, misses and the size of the cache of get_subword_ids(). None if the cache is disabled."""
+        if self.__subword_cache is None:
+            return None
+        return self.__subword_cache.stats()
 
     def tokenize(self, text: typing.Union[str, typing.List[str]]) -> typing.List[str]:
         if isinstance(text, str):
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import argparse
+import logging
 import sys
 import typing
 from pathlib import Path
@@ -11,27 +12,85 @@ from more_itertools import chunked
 from transformers.models.auto.modeling_auto import AutoModelForTokenClassification
 
 import bunkai.constant
-from bunkai.algorithm.lbd.corpus import LABEL_OTHER, LABEL_SEP, annotation2spans
-from bunkai.algorithm.lbd.custom_tokenizers import JanomeSubwordsTokenizer, JanomeTokenizer
-from bunkai.algorithm.lbd.train import BunkaiConfig, MyDataset
+from bunkai.algorithm.lbd.corpus import LABEL_SEP, annotation2spans
+from bunkai.algorithm.lbd.custom_tokenizers import (
+    DEFAULT_SUBWORD_CACHE_BYTES,
+    JanomeSubwordsTokenizer,
+    JanomeTokenizer,
+)
+from bunkai.algorithm.lbd.train import BunkaiConfig
 from bunkai.base.annotation import Tokens
-from bunkai.third.utils_ner import InputExample, get_labels
+from bunkai.third.utils_ner import get_labels
 
 StringMorphemeInputType = typing.List[typing.List[str]]  # (batch-size * variable-length of sentence * tokens)
 
+logger = logging.getLogger(__name__)
+
+
+class InputBuffers(object):
+    """Arrays of model inputs which are allocated once and reused for every batch."""
+
+    def __init__(self, names: typing.Iterable[str]) -> None:
+        self.names: typing.List[str] = list(names)
+        self.__arrays: typing.Dict[str, np.ndarray] = {}
+
+    def get(self, n_rows: int, n_columns: int) -> typing.Dict[str, np.ndarray]:
+        """
+        Get contiguous views of n_rows * n_columns for each input.
+
+        Values of the views are undefined, and they are overwritten by the next call.
+        """
+        size = n_rows * n_columns
+        views: typing.Dict[str, np.ndarray] = {}
+        for name in self.names:
+            array = self.__arrays.get(name)
+            if array is None or len(array) < size:
+                array = np.empty(max(size, 2 * len(array) if array is not None else 0), dtype=np.int64)
+                self.__arrays[name] = array
+            views[name] = array[:size].reshape(n_rows, n_columns)
+        return views
+
+
+def get_length_buckets(
+    lengths: typing.List[int], batch_size: typing.Optional[int] = None
+) -> typing.List[typing.List[int]]:
+    """
+    Group indices of sequences into batches of similar lengths.
+
+    Sequences are sorted by their lengths and cut into batch_size sequences, so little padding is added in a batch.
+    If batch_size is None, all sequences are in one batch.
+    """
+    indices = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    if batch_size is None:
+        batch_size = max(1, len(indices))
+    return [indices[i : i + batch_size] for i in range(0, len(indices), batch_size)]
+
 
 class Predictor(object):
-    def __init__(self, modelpath: Path) -> None:
+    def __init__(
+        self,
+        modelpath: Path,
+        *,
+        num_threads: typing.Optional[int] = None,
+        num_interop_threads: typing.Optional[int] = None,
+        subword_cache_bytes: int = DEFAULT_SUBWORD_CACHE_BYTES,
+    ) -> None:
         """
         Use JanomeTokenizer by default if the input is Document(String).
 
         If the input is Morpheme(String), Tokenizers are not called.
 
-        :param subword_tokenizer_type: pre_tokenize, janome, basic
+        :param num_threads: the number of threads used within an operator on CPU. If None, the default of torch.
+        :param num_interop_threads: the number of threads used across operators on CPU. If None, the default of torch.
+            It is set only before torch runs any parallel work, so it is ignored with a warning after that.
+        :param subword_cache_bytes: the maximum size of the cache of ids of subwords of morphemes. 0 disables it.
         """
+        set_num_threads(num_threads=num_threads, num_interop_threads=num_interop_threads)
         self.model = AutoModelForTokenClassification.from_pretrained(str(modelpath))
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = self.model.to(self.device)
+        # the model is used only for inference, so dropout is disabled once here
+        self.model.eval()
 
         self.labels = get_labels(str(modelpath.joinpath("labels.txt")))
         self.label_map: typing.Dict[int, str] = {i: label for i, label in enumerate(self.labels)}
@@ -40,19 +99,27 @@ class Predictor(object):
             self.bc = BunkaiConfig.from_json(bcf.read())
         # use janome tokenizer or tokenizer based on a vocab-file.
         self.path_tokenizer_model: str = str(Path(modelpath).joinpath("vocab.txt"))
-        self.tokenizer = JanomeSubwordsTokenizer(self.path_tokenizer_model)
+        self.tokenizer = JanomeSubwordsTokenizer(self.path_tokenizer_model, subword_cache_bytes=subword_cache_bytes)
 
         # hotfix
         if self.model.base_model_prefix == "distilbert" and "token_type_ids" in self.tokenizer.model_input_names:
             self.tokenizer.model_input_names.remove("token_type_ids")
+        self.input_buffers = InputBuffers(self.get_input_names())
+
+    def get_input_names(self) -> typing.List[str]:
+        """Get names of inputs which the model takes."""
+        if self.model.base_model_prefix == "bert":  # hotfix
+            return ["input_ids", "attention_mask", "token_type_ids"]
+        return ["input_ids", "attention_mask"]
 
     def _split_long_text(
         self, tokens: typing.List[str]
-    ) -> typing.Tuple[typing.List[typing.List[str]], typing.List[typing.List[int]]]:
+    ) -> typing.Tuple[typing.List[typing.List[str]], typing.List[typing.List[typing.List[int]]]]:
         """
-        Split documents(tokens) into sub-documents(tokens).
+        Split documents(tokens) into sub-documents(tokens) with ids of subwords of each token.
 
         This is because Bert has the maximum token-length of the input.
+        Each token is tokenized into subwords once, and their ids are used to build inputs of the model.
         """
         # tokenized_spans_list is a temporary stack which holds subword-token and underbar.
         # That is because underbar is replaced into UNK if underbar is put into a subword-tokeniser.
@@ -72,87 +139,121 @@ class Predictor(object):
 
         # run subword-tokeniser
         processed_tokens: typing.List[typing.List[str]] = [[]]
-        processed_num_sws: typing.List[typing.List[int]] = [[]]
+        processed_subword_ids: typing.List[typing.List[typing.List[int]]] = [[]]
         current_count: int = 0
         tokenized_span: typing.List[str]
         for tokenized_span in tokenized_spans_list:
             for word in tokenized_span:
-                subwords = self.tokenizer.tokenize(word)
-                num_subwords = len(subwords)
+                subword_ids = self.tokenizer.get_subword_ids(word)
+                num_subwords = len(subword_ids)
                 current_count += num_subwords
                 if current_count >= self.bc.max_seq_length:
                     processed_tokens.append([])
-                    processed_num_sws.append([])
+                    processed_subword_ids.append([])
                     current_count = num_subwords
                     assert current_count < self.bc.max_seq_length
                 processed_tokens[-1].append(word)
-                processed_num_sws[-1].append(num_subwords)
-        return processed_tokens, processed_num_sws
+                processed_subword_ids[-1].append(subword_ids)
+        return processed_tokens, processed_subword_ids
+
+    def _get_input_ids(self, subword_ids: typing.List[typing.List[int]]) -> np.ndarray:
+        """Get input ids of a sub-document, [CLS] subwords [SEP]. Subwords over max_seq_length are dropped."""
+        input_ids = [self.tokenizer.cls_token_id]
+        for ids in subword_ids:
+            input_ids += ids
+        del input_ids[self.bc.max_seq_length - 1 :]
+        input_ids.append(self.tokenizer.sep_token_id)
+        return np.array(input_ids, dtype=np.int64)
+
+    def _run_model(self, sequences: typing.List[np.ndarray]) -> typing.List[np.ndarray]:
+        """
+        Get ids of labels with the highest scores of each sequence of input ids.
 
-    def predict(self, documents_morphemes: StringMorphemeInputType) -> typing.List[typing.Set[int]]:
+        Sequences are padded on the right to the longest sequence in the batch.
+        """
+        n_columns = max(len(input_ids) for input_ids in sequences)
+        buffers = self.input_buffers.get(len(sequences), n_columns)
+        buffers["input_ids"].fill(self.tokenizer.pad_token_id)
+        buffers["attention_mask"].fill(0)
+        if "token_type_ids" in buffers:
+            # a single sequence has the segment id 0, the same as padding
+            buffers["token_type_ids"].fill(0)
+        for row, input_ids in enumerate(sequences):
+            buffers["input_ids"][row, : len(input_ids)] = input_ids
+            buffers["attention_mask"][row, : len(input_ids)] = 1
+
+        with torch.inference_mode():
+            kwargs = {name: torch.from_numpy(array).to(self.device) for name, array in buffers.items()}
+            logits = self.model(**kwargs).logits
+            assert len(logits.shape) == 3, (
+                f"Unexpected error. A value tensor of a model prediction is {len(logits.shape)} tensor. "
+                f"expect = 3rd tensor."
+            )
+            # labels are decided on the device, and only their ids are copied
+            return list(logits.argmax(dim=-1).cpu().numpy())
+
+    def predict(
+        self, documents_morphemes: StringMorphemeInputType, *, batch_size: typing.Optional[int] = None
+    ) -> typing.List[typing.Set[int]]:
         """
         Run prediction on incoming inputs. Inputs are 2 dims array with [[sentence]].
 
+        Documents are split into windows within max_seq_length, and windows of similar lengths are fed together.
+
         :param spans_list: 2 dims list (batch-size * variable-length of sentence) or
         [['ラウンジ', 'も', '気軽', 'に', '利用', 'でき', '、', '申し分', 'ない', 'です', '。', '▁', '']].
+        :param batch_size: the number of windows fed to the model at once. If None, all windows are fed at once.
         """
-        examples = []
+        if batch_size is not None and batch_size <= 0:
+            raise ValueError(f"batch_size must be positive: {batch_size}")
 
-        # Note: gave up to separate this process in MyDataset because _split_long_text calls a tokenizer.
-        num_subwords = []
+        # (the index of the document, ids of subwords of each word) of windows
+        windows: typing.List[typing.Tuple[int, typing.List[typing.List[int]]]] = []
         for d_id, spans in enumerate(documents_morphemes):
-            sentences_within_length, _num_subwords = self._split_long_text(spans)
-            num_subwords += _num_subwords
-            for local_s_id, tokenized_spans in enumerate(sentences_within_length):
-                examples.append(
-                    InputExample(
-                        guid=f"{d_id}-{local_s_id}",
-                        words=tokenized_spans,
-                        labels=[LABEL_OTHER] * len(tokenized_spans),
-                        is_document_first=bool(local_s_id == 0),
-                    )
-                )
-        ds = MyDataset(examples, self.labels, self.bc.max_seq_length, self.tokenizer, False)
-
-        kwargs = {
-            "input_ids": torch.tensor([f.input_ids for f in ds.features], device=self.device),
-            "attention_mask": torch.tensor([f.attention_mask for f in ds.features], device=self.device),
-        }
-        if self.model.base_model_prefix == "bert":  # hotfix
-            kwargs["token_type_ids"] = torch.tensor([f.token_type_ids for f in ds.features], device=self.device)
+            _, subword_ids_list = self._split_long_text(spans)
+            windows += [(d_id, subword_ids) for subword_ids in subword_ids_list]
+        sequences = [self._get_input_ids(subword_ids) for _, subword_ids in windows]
 
-        predictions = self.model(**kwargs).logits.to("cpu").detach().numpy()
+        predictions: typing.List[np.ndarray] = [np.zeros(0, dtype=np.int64)] * len(sequences)
+        for indices in get_length_buckets([len(input_ids) for input_ids in sequences], batch_size):
+            for i, pred in zip(indices, self._run_model([sequences[i] for i in indices])):
+                predictions[i] = pred
 
-        assert isinstance(
-            predictions, np.ndarray
-        ), f"Unexpected error. A value type of a model prediction is {type(predictions)}. expect = numpy.ndarray"
-        assert len(predictions.shape) == 3, (
-            f"Unexpected error. A value tensor of a model prediction is {len(predictions.shape)} tensor. "
-            f"expect = 3rd tensor."
-        )
-
-        out: typing.List[typing.Set[int]] = []
+        out: typing.List[typing.Set[int]] = [set() for _ in documents_morphemes]
         word_idx_offset = 0
-        for idx, (example, pred) in enumerate(zip(examples, predictions)):
-            sw_idx = 0
-            if example.is_document_first:
+        for idx, ((d_id, subword_ids), pred) in enumerate(zip(windows, predictions)):
+            if idx == 0 or windows[idx - 1][0] != d_id:
                 word_idx_offset = 0  # reset
-                out.append(set())
             else:
-                word_idx_offset += len(examples[idx - 1].words)
+                word_idx_offset += len(windows[idx - 1][1])
 
-            for word_idx, _ in enumerate(example.words):
-                num_sw: int = num_subwords[idx][word_idx]
-                while num_sw > 0:
+            # the first subword follows [CLS]
+            sw_idx = 0
+            for word_idx, ids in enumerate(subword_ids):
+                for _ in ids:
                     sw_idx += 1
-                    label_high_prob = int(np.argmax(pred[sw_idx]))
+                    label_high_prob = int(pred[sw_idx])
                     if self.label_map[label_high_prob] == LABEL_SEP:
-                        out[-1].add(word_idx + word_idx_offset)
-                    num_sw -= 1
+                        out[d_id].add(word_idx + word_idx_offset)
 
         return out
 
 
+def set_num_threads(*, num_threads: typing.Optional[int] = None, num_interop_threads: typing.Optional[int] = None):
+    """Set the numbers of threads of torch on CPU. None keeps the current number."""
+    if num_threads is not None:
+        if num_threads <= 0:
+            raise ValueError(f"num_threads must be positive: {num_threads}")
+        torch.set_num_threads(num_threads)
+    if num_interop_threads is not None and num_interop_threads != torch.get_num_interop_threads():
+        if num_interop_threads <= 0:
+            raise ValueError(f"num_interop_threads must be positive: {num_interop_threads}")
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError as e:
+            logger.warning(f"num_interop_threads is not changed: {e}")
+
+
 def get_opts() -> argparse.Namespace:
     oparser = argparse.ArgumentParser()
     oparser.add_argument("--input", "-i", type=argparse.FileType("r"), required=False, default=sys.stdin)
@@ -164,7 +265,12 @@ def get_opts() -> argparse.Namespace:
         default=sys.stdout,
     )
     oparser.add_argument("--model", "-m", type=Path, required=True)
-    oparser.add_argument("--batch", "-b", type=int, default=1, help="Number of documents to feed a batch")
+    oparser.add_argument("--batch", "-b", type=int, default=1, help="Number of windows of documents to feed a batch")
+    oparser.add_argument(
+        "--buffer", type=int, default=1000, help="Number of documents read at once and grouped by their lengths"
+    )
+    oparser.add_argument("--threads", type=int, help="Number of threads within an operator on CPU")
+    oparser.add_argument("--interop-threads", type=int, help="Number of threads across operators on CPU")
     return oparser.parse_args()
 
 
@@ -190,11 +296,11 @@ def generate_initial_annotation_obj(
 
 def main() -> None:
     opts = get_opts()
-    pdt = Predictor(opts.model)
+    pdt = Predictor(opts.model, num_threads=opts.threads, num_interop_threads=opts.interop_threads)
 
     with opts.input as inf, opts.output as outf:
-        for one_batch in chunked(generate_initial_annotation_obj(inf), n=opts.batch):
-            for did, token_ids_seps in enumerate(pdt.predict(one_batch)):
+        for one_batch in chunked(generate_initial_annotation_obj(inf), n=opts.buffer):
+            for did, token_ids_seps in enumerate(pdt.predict(one_batch, batch_size=opts.batch)):
                 for tid, token in enumerate(one_batch[did]):
                     outf.write(token)
                     if tid in token_ids_seps:
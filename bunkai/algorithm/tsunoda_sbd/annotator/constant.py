@@ -8,8 +8,12 @@ import typing
 PUNCTUATIONS: str = "。!?.！？．\u2605\u2606\u266a\\*＊※"
 SYMBOLS: str = r"[（(\(]笑[）\))]|[（(\(]泣[）\))]|[（(\(]涙[）\))]"
 
-SPANS_PARENTHESES1_REGEXP: str = r"\((?!涙|笑|泣).+?(?<!涙|笑|泣)\)"
-SPANS_PARENTHESES2_REGEXP: str = r"\((?!涙|笑|泣).+?\)"
+# characters which can not follow "(", or precede ")" in SPANS_PARENTHESES1_REGEXP
+PARENTHESES_EXCLUDED_CHARACTERS: str = "涙笑泣"
+SPANS_PARENTHESES1_REGEXP: str = (
+    rf"\((?![{PARENTHESES_EXCLUDED_CHARACTERS}]).+?(?<![{PARENTHESES_EXCLUDED_CHARACTERS}])\)"
+)
+SPANS_PARENTHESES2_REGEXP: str = rf"\((?![{PARENTHESES_EXCLUDED_CHARACTERS}]).+?\)"
 CHARS_FOR_IGNORE_PARENTHESES1: typing.Set[str] = {
     "。",
     ".",
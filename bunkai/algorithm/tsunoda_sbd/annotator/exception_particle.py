@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
-from typing import Dict, List, Type
+from typing import Mapping, Type
 
 from bunkai.algorithm.tsunoda_sbd.annotator.basic_annotator import BasicRule
 from bunkai.algorithm.tsunoda_sbd.annotator.morph_annotator_janome import MorphAnnotatorJanome
-from bunkai.base.annotation import Annotations, SpanAnnotation, TokenResult
+from bunkai.base.annotation import Annotations, TokenResult
 from bunkai.base.annotator import Annotator
 
 
@@ -17,7 +17,7 @@ class ExceptionParticle(Annotator):
         original_text: str,
         start_index: int,
         end_index: int,
-        index2token_obj: Dict[int, TokenResult],
+        index2token_obj: Mapping[int, TokenResult],
     ) -> bool:
         """
         形態素解析の結果、基本分割文字列の後ろが助詞だった場合は 分割を行わない.
@@ -34,29 +34,12 @@ class ExceptionParticle(Annotator):
             else:
                 return False
 
-    def __generate(self, anns: List[SpanAnnotation]) -> Dict[int, TokenResult]:
-        index2tokens = {}
-        __start_index = 0
-        __tokenizer_anns = [ann for ann in anns if ann.rule_name == self.morph_annotator_class.__name__]
-        __processed = []
-        for ann in __tokenizer_anns:
-            t_obj = ann.args["token"]  # type: ignore
-            if t_obj in __processed:
-                continue
-            __length = len(t_obj.word_surface)
-            for __i in range(__start_index, __start_index + __length):
-                index2tokens[__i] = t_obj
-            __start_index += __length
-            __processed.append(t_obj)
-        else:
-            return index2tokens
-
     def annotate(
         self,
         original_text: str,
         spans: Annotations,
     ) -> Annotations:
-        index2token_obj = self.__generate(list(spans.get_annotation_layer(self.morph_annotator_class.__name__)))
+        index2token_obj = spans.get_token_index(self.morph_annotator_class.__name__)
 
         __return_span_ann = []
         for __s in spans.name2spans[BasicRule.__name__]:
@@ -1,20 +1,19 @@
 #!/usr/bin/env python3
-from typing import List
+from janome.tokenizer import Token
 
-from janome.tokenizer import Token, Tokenizer
-
-from bunkai.base.annotation import Annotations, SpanAnnotation, TokenResult
+from bunkai.base.annotation import Annotations, SpanStore, TokenResult
 from bunkai.base.annotator import Annotator
+from bunkai.base.tokenizer_registry import get_janome_tokenizer
 
 
 class MorphAnnotatorJanome(Annotator):
     def __init__(self):
         super().__init__(rule_name=self.__class__.__name__)
-        self.tokenizer = Tokenizer()
+        self.tokenizer = get_janome_tokenizer()
 
-    def __generate(self, text: str) -> List[SpanAnnotation]:
+    def __generate(self, text: str) -> SpanStore:
         tokenizer_result = self.tokenizer.tokenize(text)
-        span_ann = []
+        span_ann = SpanStore()
         __start_index = 0
         for t_obj in tokenizer_result:
             assert isinstance(t_obj, Token)
@@ -26,15 +25,13 @@ class MorphAnnotatorJanome(Annotator):
                 word_stem=t_obj.base_form,
                 word_surface=t_obj.surface,
             )
-            span_ann.append(
-                SpanAnnotation(
-                    rule_name=self.rule_name,
-                    start_index=__start_index,
-                    end_index=__start_index + __length,
-                    split_string_type="janome",
-                    split_string_value="token",
-                    args={"token": token},
-                )
+            span_ann.add(
+                self.rule_name,
+                __start_index,
+                __start_index + __length,
+                "janome",
+                "token",
+                {"token": token},
             )
             __start_index += __length
         else:
@@ -42,5 +39,6 @@ class MorphAnnotatorJanome(Annotator):
 
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
         anns = self.__generate(original_text)
-        spans.add_annotation_layer(self.rule_name, anns + list(spans.flatten()))
+        anns.extend(spans.flatten())
+        spans.add_annotation_layer(self.rule_name, anns)
         return spans
@@ -1,17 +1,64 @@
 #!/usr/bin/env python3
-import re
-from typing import Dict, List
+import bisect
+from typing import Dict, Iterator, List, Set, Tuple
 
 from bunkai.algorithm.tsunoda_sbd.annotator import constant
 from bunkai.base.annotation import SpanAnnotation
 from bunkai.base.annotator import Annotations, Annotator
 
 
+def find_parentheses(
+    text: str, exclude_after_open: str = "", exclude_before_close: str = ""
+) -> Iterator[Tuple[int, int]]:
+    r"""
+    Find (start, end) of parentheses in linear time.
+
+    The result is the same as finditer() of r"\((?!A).+?(?<!B)\)" where A and B are the characters
+    of exclude_after_open and exclude_before_close.
+    The next closing parenthesis and the next newline are kept while opening parentheses are scanned,
+    so a line with many "(" and no ")" is scanned only once.
+    """
+    close_index = -1
+    newline_index = -1
+    position = 0
+    while True:
+        open_index = text.find("(", position)
+        if open_index < 0 or open_index + 2 >= len(text):
+            return
+        position = open_index + 1
+        if text[open_index + 1] in exclude_after_open:
+            continue
+        if close_index < open_index + 2:
+            close_index = text.find(")", open_index + 2)
+            while close_index >= 0 and text[close_index - 1] in exclude_before_close:
+                close_index = text.find(")", close_index + 1)
+            if close_index < 0:
+                return
+        if newline_index <= open_index:
+            newline_index = text.find("\n", open_index + 1)
+            if newline_index < 0:
+                newline_index = len(text)
+        if newline_index < close_index:
+            continue
+        yield open_index, close_index + 1
+        position = close_index + 1
+
+
 class ExceptionParentheses(Annotator):
     def __init__(self):
         super().__init__(rule_name=self.__class__.__name__)
-        self.re_spans_parentheses1 = re.compile(constant.SPANS_PARENTHESES1_REGEXP)
-        self.re_spans_parentheses2 = re.compile(constant.SPANS_PARENTHESES2_REGEXP)
+
+    @staticmethod
+    def __find_inside(starts: List[int], ends: List[int], start_index: int, end_index: int) -> int:
+        """
+        Get the index of the parentheses which contain a span. It is -1 when no parentheses contain it.
+
+        Parentheses are disjoint and sorted, so only the last parentheses starting before the span can contain it.
+        """
+        __i = bisect.bisect_left(starts, start_index) - 1
+        if __i >= 0 and end_index < ends[__i]:
+            return __i
+        return -1
 
     def replace_parentheses_no1(self, original_text: str, split_points: List[SpanAnnotation]) -> List[SpanAnnotation]:
         """
@@ -19,51 +66,45 @@ class ExceptionParentheses(Annotator):
 
         例:  ̃ (近日中には冷房に切り替わる予定です。) ̃ 1 時間飲み放題(カクテル各種! ! )はお勧め.
         """
+        spans_parentheses = list(
+            find_parentheses(
+                original_text, constant.PARENTHESES_EXCLUDED_CHARACTERS, constant.PARENTHESES_EXCLUDED_CHARACTERS
+            )
+        )
+        starts = [p[0] for p in spans_parentheses]
+        ends = [p[1] for p in spans_parentheses]
+
+        # 該当の区切り文字候補は破棄。代わりに()のインデックス情報
+        sentence_parentheses: Set[int] = set()
+        skip_end_index: Set[int] = set()
+        for split_candidate in split_points:
+            __split_char = original_text[split_candidate.start_index : split_candidate.end_index]
+            if __split_char not in constant.CHARS_FOR_IGNORE_PARENTHESES1:
+                continue
+            __i = self.__find_inside(starts, ends, split_candidate.start_index, split_candidate.end_index)
+            if __i >= 0:
+                sentence_parentheses.add(__i)
+                skip_end_index.add(split_candidate.end_index)
 
-        def unique_obj(input_list: List[SpanAnnotation]) -> List[SpanAnnotation]:
-            # filter out same index
-            filtered = []
-            __added = []
-            for s in input_list:
-                if s.end_index not in __added:
-                    filtered.append(s)
-                __added.append(s.end_index)
-            return filtered
-
-        spans_parentheses = self.re_spans_parentheses1.finditer(original_text)
         filtered_split_point = []
-        skip_end_index = []
-        for parentheses_point in spans_parentheses:
-            p_start_index = parentheses_point.regs[0][0]
-            p_end_index = parentheses_point.regs[0][1]
-            for split_candidate in split_points:
-                __split_char = original_text[split_candidate.start_index : split_candidate.end_index]
-                if p_start_index < split_candidate.start_index and split_candidate.end_index < p_end_index:
-                    if __split_char in constant.CHARS_FOR_IGNORE_PARENTHESES1:
-                        # 該当の区切り文字候補は破棄。代わりに()のインデックス情報
-                        __new_parentheses_point = SpanAnnotation(
-                            rule_name=self.rule_name,
-                            start_index=p_end_index - 1,
-                            end_index=p_end_index,
-                            split_string_type="parentheses-sentence",
-                            split_string_value=original_text[p_start_index:p_end_index],
-                        )
-                        filtered_split_point.append(__new_parentheses_point)
-                        skip_end_index.append(split_candidate.end_index)
-                    else:
-                        pass
-                else:
-                    pass
-            else:
-                pass
-        else:
-            pass
-
+        for __i in sorted(sentence_parentheses):
+            p_start_index, p_end_index = spans_parentheses[__i]
+            filtered_split_point.append(
+                SpanAnnotation(
+                    rule_name=self.rule_name,
+                    start_index=p_end_index - 1,
+                    end_index=p_end_index,
+                    split_string_type="parentheses-sentence",
+                    split_string_value=original_text[p_start_index:p_end_index],
+                )
+            )
+        # filter out same index
+        __added = {s.end_index for s in filtered_split_point}
         for s in split_points:
-            if s.end_index not in skip_end_index:
+            if s.end_index not in skip_end_index and s.end_index not in __added:
                 filtered_split_point.append(s)
-
-        return unique_obj(filtered_split_point)
+                __added.add(s.end_index)
+        return filtered_split_point
 
     # FIXME: Duplicated span bug
     def replace_parentheses_no2(self, original_text: str, split_points: List[SpanAnnotation]) -> List[SpanAnnotation]:
@@ -74,7 +115,9 @@ class ExceptionParentheses(Annotator):
 
         例: ̃(セルフドリンクサービスはすごく良かったです!種類も豊富。).
         """
-        spans_parentheses = list(self.re_spans_parentheses2.finditer(original_text))
+        spans_parentheses = list(find_parentheses(original_text, constant.PARENTHESES_EXCLUDED_CHARACTERS))
+        starts = [p[0] for p in spans_parentheses]
+        ends = [p[1] for p in spans_parentheses]
         filtered_split_point: List[SpanAnnotation] = []
 
         target_strings_positions: Dict[int, SpanAnnotation] = {}
@@ -84,42 +127,35 @@ class ExceptionParentheses(Annotator):
                 target_strings_positions[split_candidate.end_index] = split_candidate
 
         # add split points between parentheses and frequency is more than 2 inside parentheses
-        for parentheses_point in spans_parentheses:
-            p_start_index = parentheses_point.regs[0][0]
-            p_end_index = parentheses_point.regs[0][1]
-            __split_char_in_parentheses = [
-                (end_pos, reg_obj)
-                for end_pos, reg_obj in target_strings_positions.items()
-                if p_start_index < end_pos < p_end_index
-            ]
-            if len(__split_char_in_parentheses) >= 2:
-                filtered_split_point += [t[1] for t in __split_char_in_parentheses]
+        parentheses2split_points: Dict[int, List[SpanAnnotation]] = {}
+        for end_pos, reg_obj in target_strings_positions.items():
+            __i = self.__find_inside(starts, ends, end_pos, end_pos)
+            if __i >= 0:
+                parentheses2split_points.setdefault(__i, []).append(reg_obj)
+        for __i in sorted(parentheses2split_points):
+            if len(parentheses2split_points[__i]) >= 2:
+                filtered_split_point += parentheses2split_points[__i]
 
         # add split points outside of parentheses
-        t_span_parentheses = [
-            (parentheses_point.regs[0][0], parentheses_point.regs[0][1]) for parentheses_point in spans_parentheses
-        ]
-
-        def is_outside_of_parentheses(t_s):
-            if s_point.split_string_type == "parentheses-sentence":
-                return True
-            elif s_point.start_index <= t_s[0] and s_point.end_index <= t_s[0]:
-                return True
-            elif s_point.start_index >= t_s[1] and s_point.end_index >= t_s[1]:
-                return True
-            else:
-                return False
-
+        if len(spans_parentheses) == 0:
+            return filtered_split_point
         for s_point in split_points:
-            _ = [is_outside_of_parentheses(t_s) for t_s in t_span_parentheses]
-            if len(_) > 0 and all(_):
+            if s_point.split_string_type == "parentheses-sentence":
+                filtered_split_point.append(s_point)
+                continue
+            # a point is inside when it overlaps (start, end) of the last parentheses starting before its right end
+            __left = min(s_point.start_index, s_point.end_index)
+            __right = max(s_point.start_index, s_point.end_index)
+            __i = bisect.bisect_left(starts, __right) - 1
+            if __i < 0 or ends[__i] <= __left:
                 filtered_split_point.append(s_point)
 
         return filtered_split_point
 
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
         __s_no1 = self.replace_parentheses_no1(original_text, spans.get_final_layer())
-        if len(re.findall(r"\(.+\)", original_text)) > 0:
+        # same as re.search(r"\(.+\)", original_text)
+        if next(find_parentheses(original_text), None) is not None:
             __s_no2 = self.replace_parentheses_no2(original_text, __s_no1)
         else:
             __s_no2 = __s_no1
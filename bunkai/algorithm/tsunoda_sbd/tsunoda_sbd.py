@@ -12,6 +12,7 @@ from bunkai.algorithm.tsunoda_sbd.annotator import (
 )
 from bunkai.base.annotation import Annotations, SpanAnnotation
 from bunkai.base.annotator import AnnotatorPipeline, RuleOrderException, SentenceBoundaryDisambiguator
+from bunkai.base.cache import SegmentationCache
 
 
 class TsunodaPipeline(AnnotatorPipeline):
@@ -35,7 +36,7 @@ class TsunodaPipeline(AnnotatorPipeline):
 
 
 class TsunodaSentenceBoundaryDisambiguation(SentenceBoundaryDisambiguator):
-    def __init__(self, *, path_model: typing.Any = None):
+    def __init__(self, *, path_model: typing.Any = None, cache: typing.Optional[SegmentationCache] = None):
         morph_annotator = MorphAnnotatorJanome()  # type: ignore
         particle_annotator = ExceptionParticle(MorphAnnotatorJanome)
 
@@ -49,7 +50,7 @@ class TsunodaSentenceBoundaryDisambiguation(SentenceBoundaryDisambiguator):
                 ExceptionParentheses(),
             ]
         )
-        super().__init__()
+        super().__init__(path_model=path_model, cache=cache)
 
     def eos(self, text: str) -> Annotations:
         annotations = Annotations()
@@ -69,24 +70,23 @@ class TsunodaSentenceBoundaryDisambiguation(SentenceBoundaryDisambiguator):
             rule_obj.annotate(text, annotations)
         return annotations
 
-    def find_eos(self, text: str) -> List[int]:
+    def __find_eos(self, text: str) -> List[int]:
         annotations = self.eos(text)
         end_index = list(sorted(list(set([s_a.end_index for s_a in annotations.get_final_layer()]))))
         if len(end_index) == 0 or end_index[-1] != len(text):
             end_index.append(len(text))
         return end_index
 
+    def find_eos(self, text: str) -> List[int]:
+        return self._find_eos_with_cache(text, self.__find_eos)
+
+    def _split_with_eos(self, text: str, end_index: List[int]) -> List[str]:
+        # find_eos ends an empty text at 0, where __call__ does not split it
+        if len(text) == 0:
+            return []
+        return super()._split_with_eos(text, end_index)
+
     def __call__(self, text: str) -> Iterator[str]:
         annotations = self.eos(text)
         end_index = sorted(list(set([s_a.end_index for s_a in annotations.get_final_layer()])))
-        __start_index = 0
-        __end_index = 0
-        for e_i in end_index:
-            part_sentences = text[__start_index:e_i]
-            __start_index = e_i
-            __end_index = e_i
-            yield part_sentences
-
-        if __end_index < len(text):
-            part_sentences = text[__end_index:]
-            yield part_sentences
+        yield from self._split_text(text, end_index)
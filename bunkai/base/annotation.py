@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
+import array
+import bisect
 import dataclasses
 import itertools
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
 
 import spans
 from dataclasses_json import DataClassJsonMixin
@@ -55,15 +58,306 @@ class SpanAnnotation:
         self.rule_name = new_rule_name
 
 
+class LabelTable(object):
+    """Map labels such as rule names to integer ids. The id of None is always 0."""
+
+    def __init__(self):
+        self.labels: List[Optional[str]] = [None]
+        self.label2id: Dict[Optional[str], int] = {None: 0}
+        self._lock = threading.Lock()
+
+    def get_id(self, label: Optional[str]) -> int:
+        label_id = self.label2id.get(label)
+        if label_id is None:
+            with self._lock:
+                label_id = self.label2id.get(label)
+                if label_id is None:
+                    label_id = len(self.labels)
+                    self.labels.append(label)
+                    self.label2id[label] = label_id
+        return label_id
+
+    def find_id(self, label: Optional[str]) -> int:
+        """Return -1 if the label has never been registered."""
+        return self.label2id.get(label, -1)
+
+    def get_label(self, label_id: int) -> Optional[str]:
+        return self.labels[label_id]
+
+
+RULE_NAMES = LabelTable()
+SPLIT_STRING_TYPES = LabelTable()
+
+
+class SpanStore(object):
+    """
+    Columnar storage of span annotations.
+
+    Character indices, rule ids and split-string-type ids are kept in packed arrays,
+    and split-string values and args (payloads such as tokens) are kept in side lists.
+    Iteration and indexing return SpanAnnotation views for compatibility.
+    Note that changes to the views are not written back to the store.
+    """
+
+    def __init__(self):
+        self.start_indices = array.array("q")
+        self.end_indices = array.array("q")
+        self.rule_ids = array.array("i")
+        self.type_ids = array.array("i")
+        self.values: List[Optional[str]] = []
+        self.args: List[Optional[Dict[str, Any]]] = []
+
+    @classmethod
+    def from_spans(cls, spans: Iterable[SpanAnnotation]) -> "SpanStore":
+        store = cls()
+        store.extend(spans)
+        return store
+
+    @classmethod
+    def from_layer(cls, layer: "SpanLayer") -> "SpanStore":
+        """Return the layer itself if it is a store. Otherwise, copy its spans into a new store."""
+        if isinstance(layer, SpanStore):
+            return layer
+        return cls.from_spans(layer)
+
+    def add(
+        self,
+        rule_name: Optional[str],
+        start_index: int,
+        end_index: int,
+        split_string_type: Optional[str],
+        split_string_value: Optional[str],
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add a span without creating SpanAnnotation."""
+        self.start_indices.append(start_index)
+        self.end_indices.append(end_index)
+        self.rule_ids.append(RULE_NAMES.get_id(rule_name))
+        self.type_ids.append(SPLIT_STRING_TYPES.get_id(split_string_type))
+        self.values.append(split_string_value)
+        self.args.append(args)
+
+    def append(self, span: SpanAnnotation) -> None:
+        self.add(
+            span.rule_name,
+            span.start_index,
+            span.end_index,
+            span.split_string_type,
+            span.split_string_value,
+            span.args,
+        )
+
+    def append_from(self, store: "SpanStore", i: int) -> None:
+        """Add the i-th span of another store without creating SpanAnnotation. Payloads are shared."""
+        self.start_indices.append(store.start_indices[i])
+        self.end_indices.append(store.end_indices[i])
+        self.rule_ids.append(store.rule_ids[i])
+        self.type_ids.append(store.type_ids[i])
+        self.values.append(store.values[i])
+        self.args.append(store.args[i])
+
+    def extend(self, spans: Iterable[SpanAnnotation]) -> None:
+        if isinstance(spans, SpanStore):
+            self.start_indices.extend(spans.start_indices)
+            self.end_indices.extend(spans.end_indices)
+            self.rule_ids.extend(spans.rule_ids)
+            self.type_ids.extend(spans.type_ids)
+            self.values.extend(spans.values)
+            self.args.extend(spans.args)
+            return
+        for span in spans:
+            self.append(span)
+
+    def select(self, indices: Iterable[int]) -> "SpanStore":
+        """Return a new store with the given positions. Payloads are shared."""
+        store = SpanStore()
+        for i in indices:
+            store.append_from(self, i)
+        return store
+
+    def indices(self, rule_name: Optional[str]) -> List[int]:
+        """Positions of spans of a rule_name."""
+        rule_id = RULE_NAMES.find_id(rule_name)
+        if rule_id < 0:
+            return []
+        return [i for i, r_id in enumerate(self.rule_ids) if r_id == rule_id]
+
+    def filter_rule(self, rule_name: Optional[str]) -> "SpanStore":
+        return self.select(self.indices(rule_name))
+
+    def get_rule_name(self, i: int) -> Optional[str]:
+        return RULE_NAMES.get_label(self.rule_ids[i])
+
+    def get_split_string_type(self, i: int) -> Optional[str]:
+        return SPLIT_STRING_TYPES.get_label(self.type_ids[i])
+
+    def get_span(self, i: int) -> SpanAnnotation:
+        return SpanAnnotation(
+            rule_name=self.get_rule_name(i),
+            start_index=self.start_indices[i],
+            end_index=self.end_indices[i],
+            split_string_type=self.get_split_string_type(i),
+            split_string_value=self.values[i],
+            args=self.args[i],
+        )
+
+    def __len__(self) -> int:
+        return len(self.start_indices)
+
+    def __iter__(self) -> Iterator[SpanAnnotation]:
+        for i in range(len(self)):
+            yield self.get_span(i)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[SpanAnnotation, List[SpanAnnotation]]:
+        if isinstance(i, slice):
+            return [self.get_span(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("SpanStore index out of range")
+        return self.get_span(i)
+
+
+SpanLayer = Union[List[SpanAnnotation], SpanStore]
+
+
+class LayerIndex(object):
+    """Positions of spans per rule_name in a layer. Spans appended to the layer afterwards are indexed on lookup."""
+
+    def __init__(self, layer: SpanLayer):
+        self.layer = layer
+        self.n_indexed = 0
+        # positions are packed, since a morph layer has a position per token
+        self.rule2positions: Dict[Optional[str], array.array] = {}
+        self.update()
+
+    def update(self) -> None:
+        if len(self.layer) < self.n_indexed:
+            self.n_indexed = 0
+            self.rule2positions = {}
+        if isinstance(self.layer, SpanStore):
+            rule_ids = self.layer.rule_ids
+            for i in range(self.n_indexed, len(self.layer)):
+                self.__get_positions(RULE_NAMES.get_label(rule_ids[i])).append(i)
+        else:
+            for i in range(self.n_indexed, len(self.layer)):
+                self.__get_positions(self.layer[i].rule_name).append(i)
+        self.n_indexed = len(self.layer)
+
+    def __get_positions(self, rule_name: Optional[str]) -> array.array:
+        positions = self.rule2positions.get(rule_name)
+        if positions is None:
+            positions = self.rule2positions[rule_name] = array.array("q")
+        return positions
+
+    def positions(self, rule_name: Optional[str]) -> Sequence[int]:
+        if len(self.layer) != self.n_indexed:
+            self.update()
+        return self.rule2positions.get(rule_name, ())
+
+
+class TokenIndex(Mapping[int, TokenResult]):
+    """
+    Tokens of a morph layer looked up by character offsets.
+
+    It maps every character offset covered by a token to the token like a dict, with sorted offsets and bisect.
+    When tokens overlap, the later token in the layer covers the overlapping offsets.
+    """
+
+    def __init__(self, token_spans: Union[Iterable[SpanAnnotation], SpanStore]):
+        # tokens in the layer order. A store is kept as it is, and its spans are read from the columns.
+        self.spans: SpanLayer
+        if isinstance(token_spans, SpanStore):
+            self.spans = token_spans
+            __tokens: Iterable[Tuple[int, TokenResult]] = zip(
+                token_spans.start_indices, (args["token"] for args in token_spans.args)  # type: ignore
+            )
+        else:
+            self.spans = list(token_spans)
+            __tokens = ((span_ann.start_index, span_ann.args["token"]) for span_ann in self.spans)  # type: ignore
+        # disjoint ranges sorted by offsets
+        self.start_indices = array.array("q")
+        self.end_indices = array.array("q")
+        self.tokens: List[TokenResult] = []
+        __processed: Set[int] = set()
+        for start_index, t_obj in __tokens:
+            if id(t_obj) in __processed:
+                continue
+            __processed.add(id(t_obj))
+            self.__add(start_index, start_index + len(t_obj.word_surface), t_obj)
+
+    def __add(self, start_index: int, end_index: int, t_obj: TokenResult) -> None:
+        if start_index >= end_index:
+            return
+        if len(self.tokens) == 0 or start_index >= self.end_indices[-1]:
+            self.start_indices.append(start_index)
+            self.end_indices.append(end_index)
+            self.tokens.append(t_obj)
+            return
+        # the token overwrites the ranges overlapping it
+        i = bisect.bisect_right(self.end_indices, start_index)
+        ranges: List[Tuple[int, int, TokenResult]] = []
+        if self.start_indices[i] < start_index:
+            ranges.append((self.start_indices[i], start_index, self.tokens[i]))
+        ranges.append((start_index, end_index, t_obj))
+        for j in range(i, len(self.tokens)):
+            if self.end_indices[j] > end_index:
+                ranges.append((max(self.start_indices[j], end_index), self.end_indices[j], self.tokens[j]))
+        del self.start_indices[i:]
+        del self.end_indices[i:]
+        del self.tokens[i:]
+        for __start_index, __end_index, __t_obj in ranges:
+            self.start_indices.append(__start_index)
+            self.end_indices.append(__end_index)
+            self.tokens.append(__t_obj)
+
+    def get(self, key: int, default: Optional[TokenResult] = None) -> Optional[TokenResult]:  # type: ignore
+        i = bisect.bisect_right(self.start_indices, key) - 1
+        if i < 0 or key >= self.end_indices[i]:
+            return default
+        return self.tokens[i]
+
+    def __getitem__(self, key: int) -> TokenResult:
+        t_obj = self.get(key)
+        if t_obj is None:
+            raise KeyError(key)
+        return t_obj
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, int) and self.get(key) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        for start_index, end_index in zip(self.start_indices, self.end_indices):
+            yield from range(start_index, end_index)
+
+    def __len__(self) -> int:
+        return sum(self.end_indices) - sum(self.start_indices)
+
+
 @dataclasses.dataclass
 class Annotations:
     annotator_forward: Optional[str] = None
-    name2spans: Dict[str, List[SpanAnnotation]] = dataclasses.field(default_factory=dict)
+    name2spans: Dict[str, SpanLayer] = dataclasses.field(default_factory=dict)
     name2order: Dict[str, int] = dataclasses.field(default_factory=dict)
     current_order: int = 0
+    # If False, an intermediate layer is dropped when the next layer is added, except persistent_layers.
+    keep_layers: bool = True
+    persistent_layers: Set[str] = dataclasses.field(default_factory=set)
+    name2index: Dict[str, LayerIndex] = dataclasses.field(default_factory=dict, repr=False, compare=False)
+    # per-document data shared among annotators, such as scan results of the text.
+    name2resource: Dict[str, Any] = dataclasses.field(default_factory=dict, repr=False, compare=False)
 
-    def add_annotation_layer(self, annotator_name: str, annotations: List[SpanAnnotation]) -> None:
+    def add_annotation_layer(self, annotator_name: str, annotations: SpanLayer) -> None:
+        if (
+            not self.keep_layers
+            and self.annotator_forward is not None
+            and self.annotator_forward != annotator_name
+            and self.annotator_forward not in self.persistent_layers
+        ):
+            del self.name2spans[self.annotator_forward]
+            self.name2index.pop(self.annotator_forward, None)
         self.name2spans[annotator_name] = annotations
+        self.name2index[annotator_name] = LayerIndex(annotations)
         self.name2order[annotator_name] = self.current_order
         self.annotator_forward = annotator_name
         self.current_order += 1
@@ -80,24 +374,81 @@ class Annotations:
     def flatten(self) -> Iterator[SpanAnnotation]:
         return itertools.chain.from_iterable(self.name2spans.values())
 
-    def get_final_layer(self) -> List[SpanAnnotation]:
+    def get_final_layer(self) -> SpanLayer:
         if self.annotator_forward is None:
             return []
         else:
             return self.name2spans[self.annotator_forward]
 
     def get_annotation_layer(self, layer_name: str) -> Iterator[SpanAnnotation]:
-        assert layer_name in list(self.name2spans.keys()), f"{layer_name} not in analysis layers."
-        span_anns = {str(ann): ann for ann in itertools.chain.from_iterable(self.name2spans.values())}
-        for ann in span_anns.values():
-            if ann.rule_name is not None and ann.rule_name == layer_name:
-                yield ann
-        return
+        assert layer_name in self.name2spans or layer_name in self.name2order, f"{layer_name} not in analysis layers."
+        span_anns: Dict[Tuple[int, int], SpanAnnotation] = {}
+        for name, layer in self.name2spans.items():
+            for i in self.__get_layer_index(name, layer).positions(layer_name):
+                ann = layer[i]
+                # rule_name may be updated after the layer is added.
+                if ann.rule_name == layer_name:
+                    span_anns[(ann.start_index, ann.end_index)] = ann  # type: ignore
+        yield from span_anns.values()
+
+    def get_annotation_store(self, layer_name: str) -> SpanStore:
+        """Get the same spans as get_annotation_layer in a new store, reading the columns of stores."""
+        assert layer_name in self.name2spans or layer_name in self.name2order, f"{layer_name} not in analysis layers."
+        rule_id = RULE_NAMES.find_id(layer_name)
+        key2span: Dict[Tuple[int, int], Tuple[SpanLayer, int]] = {}
+        for name, layer in self.name2spans.items():
+            positions = self.__get_layer_index(name, layer).positions(layer_name)
+            if isinstance(layer, SpanStore):
+                for i in positions:
+                    if layer.rule_ids[i] == rule_id:
+                        key2span[(layer.start_indices[i], layer.end_indices[i])] = (layer, i)
+            else:
+                for i in positions:
+                    ann = layer[i]
+                    # rule_name may be updated after the layer is added.
+                    if ann.rule_name == layer_name:
+                        key2span[(ann.start_index, ann.end_index)] = (layer, i)
+        store = SpanStore()
+        for layer, i in key2span.values():
+            if isinstance(layer, SpanStore):
+                store.append_from(layer, i)
+            else:
+                store.append(layer[i])
+        return store
+
+    def get_token_index(self, layer_name: str = "MorphAnnotatorJanome") -> TokenIndex:
+        """Get the index of tokens in a morph layer. It is shared until tokens are added to the layer."""
+        layer = self.name2spans.get(layer_name)
+        resource_name = f"{TokenIndex.__name__}:{layer_name}"
+        cached = self.name2resource.get(resource_name)
+        if layer is None:
+            return TokenIndex(self.get_annotation_store(layer_name))
+        # spans of other rules, such as LinebreakAnnotator, may be appended to the layer.
+        n_tokens = len(self.__get_layer_index(layer_name, layer).positions(layer_name))
+        if cached is not None and cached[0] is layer and cached[1] == n_tokens:
+            return cached[2]
+        index = TokenIndex(self.get_annotation_store(layer_name))
+        self.name2resource[resource_name] = (layer, n_tokens, index)
+        return index
+
+    def __get_layer_index(self, name: str, layer: SpanLayer) -> LayerIndex:
+        index = self.name2index.get(name)
+        if index is None or index.layer is not layer:
+            index = LayerIndex(layer)
+            self.name2index[name] = index
+        return index
 
     def get_morph_analysis(self, name_annotation_layer: str = "MorphAnnotatorJanome") -> Iterator[TokenResult]:
         """Get Tokens analysis from Janome."""
         assert name_annotation_layer in self.name2spans, f"{name_annotation_layer} not in annotation layer."
-        for span_ann in self.name2spans[name_annotation_layer]:
+        layer = self.name2spans[name_annotation_layer]
+        if isinstance(layer, SpanStore):
+            for i in layer.indices(name_annotation_layer):
+                ret = layer.args[i]["token"]  # type: ignore
+                assert isinstance(ret, TokenResult)
+                yield ret
+            return
+        for span_ann in layer:
             if span_ann.rule_name == name_annotation_layer:
                 ret = span_ann.args["token"]  # type: ignore
                 assert isinstance(ret, TokenResult)
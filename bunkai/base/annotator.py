@@ -1,45 +1,63 @@
 #!/usr/bin/env python3
+import bisect
+import itertools
+import os
 import typing
 from abc import ABCMeta, abstractmethod
 from pathlib import Path
-from typing import Callable, Iterator, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
-from bunkai.base.annotation import Annotations, SpanAnnotation
+from more_itertools import chunked
 
+from bunkai.base.annotation import RULE_NAMES, Annotations, SpanAnnotation, SpanLayer, SpanStore
+from bunkai.base.cache import SegmentationCache, get_cache_key, get_model_fingerprint
+from bunkai.base.parallel import WorkerPool, segment
 
-def func_filter_span(
-    spans_wide: typing.List[SpanAnnotation], spans_narrow: typing.List[SpanAnnotation]
-) -> typing.List[SpanAnnotation]:
+# the number of documents processed together by find_eos_batch and segment_batch, which bounds their memory use
+DEFAULT_BATCH_SIZE: int = 1000
+
+
+def func_filter_span(spans_wide: SpanLayer, spans_narrow: SpanLayer) -> SpanLayer:
     """Compare spans_wide and spans_narrow. If there is an overlap, use wider one."""
-    __filtered = []
-    for b_ann in spans_narrow:
-        is_skip = False
-        b_span = b_ann.get_spans()
-        for f_ann in spans_wide:
-            if b_span.within(f_ann.get_spans()):
-                is_skip = True
-            else:
-                pass
+    # offsets are read from the columns, so that no SpanAnnotation is created for a SpanStore.
+    __wide_store = SpanStore.from_layer(spans_wide)
+    __narrow_store = SpanStore.from_layer(spans_narrow)
+    # wide spans sorted by start index with the running maximum of end index.
+    # A narrow span is within a wide one iff some wide span starting at or before it ends at or after it.
+    __wide = sorted(
+        (start_index, end_index)
+        for start_index, end_index in zip(__wide_store.start_indices, __wide_store.end_indices)
+        if start_index < end_index
+    )
+    __starts = [start_index for start_index, _ in __wide]
+    __max_ends = list(itertools.accumulate((end_index for _, end_index in __wide), max))
+    __kept = []
+    for i, (start_index, end_index) in enumerate(zip(__narrow_store.start_indices, __narrow_store.end_indices)):
+        if start_index >= end_index:
+            # an empty span is within any span.
+            is_skip = len(__wide_store) > 0
+        else:
+            __i = bisect.bisect_right(__starts, start_index)
+            is_skip = __i > 0 and __max_ends[__i - 1] >= end_index
         if is_skip is False:
-            __filtered.append(b_ann)
-    return __filtered
+            __kept.append(i)
+    if isinstance(spans_narrow, SpanStore):
+        return spans_narrow.select(__kept)
+    return [spans_narrow[i] for i in __kept]
 
 
 def func_filter_previous_rule_same_span(
     spans_current: typing.List[SpanAnnotation],
-    spans_previous: typing.List[SpanAnnotation],
-) -> typing.List[SpanAnnotation]:
+    spans_previous: SpanLayer,
+) -> SpanStore:
     """If there are conflicting results, use the result of the previous rules."""
     spans_current_map = {(sp.start_index, sp.end_index): sp for sp in spans_current}
-    spans_previous_map = {(sp.start_index, sp.end_index): sp for sp in spans_previous}
-    common_key = list(set(spans_current_map.keys()) & set(spans_previous_map.keys()))
-    filtered = []
-    for span_key, sp in spans_current_map.items():
-        if span_key in common_key:
-            continue
-        else:
-            filtered.append(sp)
-    return filtered + spans_previous
+    __previous = SpanStore.from_layer(spans_previous)
+    previous_keys = set(zip(__previous.start_indices, __previous.end_indices))
+    filtered = SpanStore.from_spans(sp for span_key, sp in spans_current_map.items() if span_key not in previous_keys)
+    # the previous spans are copied column by column
+    filtered.extend(__previous)
+    return filtered
 
 
 class RuleOrderException(Exception):
@@ -64,12 +82,30 @@ class Annotator(metaclass=ABCMeta):
     def annotate(self, original_text: str, spans: Annotations) -> Annotations:
         raise NotImplementedError()
 
+    def annotate_batch(self, original_texts: List[str], spans_list: List[Annotations]) -> List[Annotations]:
+        """Annotate documents. Annotators which share work across documents override this."""
+        for original_text, spans in zip(original_texts, spans_list):
+            self.annotate(original_text, spans)
+        return spans_list
+
 
 class AnnotationFilter(Annotator):
     @staticmethod
-    def unify_span_annotations(
-        span_annotations: List[SpanAnnotation],
-    ) -> List[SpanAnnotation]:
+    def unify_span_annotations(span_annotations: SpanLayer) -> SpanLayer:
+        if isinstance(span_annotations, SpanStore):
+            # the same keys as str(SpanAnnotation), read from the columns
+            key2position = {
+                f"{start_index}-{end_index}/{RULE_NAMES.get_label(rule_id)}/{value}": i
+                for i, (start_index, end_index, rule_id, value) in enumerate(
+                    zip(
+                        span_annotations.start_indices,
+                        span_annotations.end_indices,
+                        span_annotations.rule_ids,
+                        span_annotations.values,
+                    )
+                )
+            }
+            return span_annotations.select(key2position.values())
         span_anns = {str(ann): ann for ann in span_annotations}
         return list(span_anns.values())
 
@@ -88,8 +124,59 @@ class AnnotatorPipeline(metaclass=ABCMeta):
 
 
 class SentenceBoundaryDisambiguator(metaclass=ABCMeta):
-    def __init__(self, *, path_model: Optional[Path] = None):
-        pass
+    def __init__(self, *, path_model: Optional[Path] = None, cache: Optional[SegmentationCache] = None):
+        """
+        Set up a disambiguator.
+
+        :param cache: If given, results of find_eos are cached. Use MemorySegmentationCache for an in-process LRU cache.
+        """
+        self.path_model = path_model
+        self.cache = cache
+        self._pool: Optional[WorkerPool] = None
+        self.__config: Optional[str] = None
+
+    def _init_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments to build the same disambiguator in worker processes."""
+        return {"path_model": self.path_model, "cache": self.cache}
+
+    def get_config(self) -> str:
+        """Get a string identifying the pipeline. Cached results are shared only among the same pipelines."""
+        if self.__config is None:
+            # imported here since bunkai/__init__.py imports this module.
+            from bunkai import __version__
+
+            kwargs = {k: v for k, v in self._init_kwargs().items() if k != "cache"}
+            self.__config = f"{self.__class__.__module__}.{self.__class__.__qualname__}/{__version__}/{kwargs!r}"
+            if self.path_model is not None:
+                self.__config += f"/{get_model_fingerprint(Path(self.path_model))}"
+        return self.__config
+
+    def _find_eos_with_cache(self, text: str, func_find_eos: Callable[[str], List[int]]) -> List[int]:
+        if self.cache is None:
+            return func_find_eos(text)
+        key = get_cache_key(text, self.get_config())
+        eos = self.cache.get(key)
+        if eos is None:
+            eos = func_find_eos(text)
+            self.cache.put(key, eos)
+        return eos
+
+    def _find_eos_batch_with_cache(
+        self, texts: List[str], func_find_eos_batch: Callable[[List[str]], List[List[int]]]
+    ) -> List[List[int]]:
+        if self.cache is None:
+            return func_find_eos_batch(texts)
+        keys = [get_cache_key(text, self.get_config()) for text in texts]
+        eos_list = [self.cache.get(key) for key in keys]
+        __missing = [i for i, eos in enumerate(eos_list) if eos is None]
+        for i, eos in zip(__missing, func_find_eos_batch([texts[i] for i in __missing])):
+            self.cache.put(keys[i], eos)
+            eos_list[i] = eos
+        return typing.cast(List[List[int]], eos_list)
+
+    def _find_eos_distinct(self, texts: List[str]) -> List[List[int]]:
+        """Run find_eos on distinct documents. Disambiguators which share work across documents override this."""
+        return [self.find_eos(text) for text in texts]
 
     @abstractmethod
     def eos(self, text: str) -> Annotations:
@@ -102,3 +189,88 @@ class SentenceBoundaryDisambiguator(metaclass=ABCMeta):
     @abstractmethod
     def __call__(self, text: str) -> Iterator[str]:
         raise NotImplementedError()
+
+    @staticmethod
+    def _split_text(text: str, end_index: List[int]) -> Iterator[str]:
+        __start_index = 0
+        __end_index = 0
+        for e_i in end_index:
+            part_sentences = text[__start_index:e_i]
+            __start_index = e_i
+            __end_index = e_i
+            yield part_sentences
+
+        if __end_index < len(text):
+            part_sentences = text[__end_index:]
+            yield part_sentences
+
+    def _split_with_eos(self, text: str, end_index: List[int]) -> List[str]:
+        """Split a text at end_index given by find_eos into the same sentences as __call__."""
+        return list(self._split_text(text, end_index))
+
+    def find_eos_batch(self, texts: Iterable[str], *, batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[int]]:
+        """
+        Run find_eos on each document and return character indices of end-of-sentence per document.
+
+        Documents are processed batch_size documents at a time, and identical documents in a batch only once.
+        Without an annotator which shares work across documents, e.g. the linebreak model,
+        this is a convenience wrapper of find_eos and no faster than calling it on each document.
+        """
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive: {batch_size}")
+        __return = []
+        for batch in chunked(texts, batch_size):
+            distinct_texts = list(dict.fromkeys(batch))
+            text2eos = dict(zip(distinct_texts, self._find_eos_distinct(distinct_texts)))
+            __return += [list(text2eos[text]) for text in batch]
+        return __return
+
+    def segment_batch(self, texts: Iterable[str], *, batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[str]]:
+        """Split each document into sentences with find_eos_batch."""
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive: {batch_size}")
+        __return = []
+        for batch in chunked(texts, batch_size):
+            for text, end_index in zip(batch, self.find_eos_batch(batch, batch_size=batch_size)):
+                __return.append(self._split_with_eos(text, end_index))
+        return __return
+
+    def map(
+        self,
+        texts: Iterable[str],
+        *,
+        workers: Optional[int] = None,
+        chunksize: Optional[int] = None,
+    ) -> Iterator[List[str]]:
+        """
+        Split documents into sentences with worker processes. Results are yielded in input order.
+
+        Each worker holds its own pipeline. Workers are reused across calls until close() is called.
+
+        :param workers: the number of worker processes. os.cpu_count() by default.
+        If 1, documents are processed in this process.
+        :param chunksize: the number of documents sent to a worker at once.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            for text in texts:
+                yield list(self(text))
+            return
+
+        if self._pool is None or self._pool.closed or self._pool.workers != workers:
+            self.close()
+            self._pool = WorkerPool(self.__class__, self._init_kwargs(), workers)
+        yield from self._pool.imap(segment, texts, chunksize)
+
+    def close(self) -> None:
+        """Shutdown worker processes started by map()."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+import array
+import collections
+import dataclasses
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import typing
+from abc import ABCMeta, abstractmethod
+from pathlib import Path
+
+"""This module caches segmentation results"""
+
+# approximate memory of an entry besides its key and value (OrderedDict node, tuple, array header)
+ENTRY_OVERHEAD_BYTES: int = 200
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+DEFAULT_SQLITE_MAX_BYTES: int = 1024 * 1024 * 1024
+DEFAULT_SQLITE_MAX_AGE: float = 30 * 24 * 60 * 60
+DEFAULT_SQLITE_TIMEOUT: float = 60.0
+# the last access time is updated at most once in this period (seconds) to avoid a write per hit
+SQLITE_ACCESS_UPDATE_INTERVAL: float = 60 * 60
+# eviction runs once per this number of puts
+SQLITE_EVICTION_INTERVAL: int = 1000
+
+K = typing.TypeVar("K")
+V = typing.TypeVar("V")
+
+
+@dataclasses.dataclass
+class CacheStats(object):
+    hits: int
+    misses: int
+    n_items: int
+    n_bytes: int
+    max_bytes: typing.Optional[int]
+
+    @property
+    def hit_rate(self) -> float:
+        if self.hits + self.misses == 0:
+            return 0.0
+        return self.hits / (self.hits + self.misses)
+
+
+class LRUCache(typing.Generic[K, V]):
+    def __init__(self, max_bytes: int, sizeof: typing.Callable[[K, V], int]):
+        """
+        Least-recently-used cache bounded by the total size of entries.
+
+        :param sizeof: a function returning the size of an entry in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.n_bytes = 0
+        self.__data: "collections.OrderedDict[K, typing.Tuple[V, int]]" = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: K) -> typing.Optional[V]:
+        with self.__lock:
+            item = self.__data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.__data.move_to_end(key)
+            return item[0]
+
+    def put(self, key: K, value: V) -> None:
+        size = self.sizeof(key, value)
+        if size > self.max_bytes:
+            return
+        with self.__lock:
+            old = self.__data.pop(key, None)
+            if old is not None:
+                self.n_bytes -= old[1]
+            self.__data[key] = (value, size)
+            self.n_bytes += size
+            while self.n_bytes > self.max_bytes:
+                _, (_, old_size) = self.__data.popitem(last=False)
+                self.n_bytes -= old_size
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__data.clear()
+            self.n_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits, misses=self.misses, n_items=len(self), n_bytes=self.n_bytes, max_bytes=self.max_bytes
+        )
+
+
+def get_model_fingerprint(path_model: Path) -> str:
+    """Hash names, sizes and modification times of model files."""
+    __hash = hashlib.sha256()
+    if path_model.is_dir():
+        paths = sorted(path for path in path_model.rglob("*") if path.is_file())
+    else:
+        paths = [path_model] if path_model.is_file() else []
+    for path in paths:
+        stat = path.stat()
+        name = path.name if path == path_model else str(path.relative_to(path_model))
+        __hash.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+    return __hash.hexdigest()
+
+
+def get_cache_key(text: str, config: str) -> bytes:
+    """Hash a text and a pipeline configuration."""
+    __hash = hashlib.sha256(config.encode("utf-8"))
+    __hash.update(b"\0")
+    __hash.update(text.encode("utf-8", "surrogatepass"))
+    return __hash.digest()
+
+
+class SegmentationCache(metaclass=ABCMeta):
+    """Cache of end-of-sentence indices keyed by get_cache_key()."""
+
+    @abstractmethod
+    def get(self, key: bytes) -> typing.Optional[typing.List[int]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def put(self, key: bytes, eos: typing.List[int]) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        raise NotImplementedError()
+
+
+class MemorySegmentationCache(SegmentationCache):
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        In-process LRU cache.
+
+        Indices are kept as packed arrays. When it is sent to worker processes, each worker starts with an empty cache.
+        """
+        self.max_bytes = max_bytes
+        self.__lru: LRUCache[bytes, array.array] = LRUCache(max_bytes, self.sizeof)
+
+    @staticmethod
+    def sizeof(key: bytes, value: array.array) -> int:
+        return sys.getsizeof(key) + value.itemsize * len(value) + ENTRY_OVERHEAD_BYTES
+
+    def get(self, key: bytes) -> typing.Optional[typing.List[int]]:
+        value = self.__lru.get(key)
+        if value is None:
+            return None
+        return value.tolist()
+
+    def put(self, key: bytes, eos: typing.List[int]) -> None:
+        self.__lru.put(key, array.array("q", eos))
+
+    def clear(self) -> None:
+        self.__lru.clear()
+
+    def stats(self) -> CacheStats:
+        return self.__lru.stats()
+
+    def __getstate__(self):
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class SqliteSegmentationCache(SegmentationCache):
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_bytes: typing.Optional[int] = DEFAULT_SQLITE_MAX_BYTES,
+        max_age: typing.Optional[float] = DEFAULT_SQLITE_MAX_AGE,
+        timeout: float = DEFAULT_SQLITE_TIMEOUT,
+    ):
+        """
+        Cache results persistently in a sqlite3 database. Processes can share the same file.
+
+        :param max_bytes: the maximum total size of entries. The least recently used entries are evicted.
+        :param max_age: entries unused for max_age seconds are evicted.
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.__n_puts = 0
+        self.__connection: typing.Optional[sqlite3.Connection] = None
+        self.__pid: typing.Optional[int] = None
+
+    def __connect(self) -> sqlite3.Connection:
+        # a connection can not be shared with forked processes
+        if self.__connection is None or self.__pid != os.getpid():
+            connection = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS eos "
+                "(key BLOB PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS eos_accessed ON eos (accessed)")
+            self.__connection = connection
+            self.__pid = os.getpid()
+        return self.__connection
+
+    @staticmethod
+    def __encode(eos: typing.List[int]) -> bytes:
+        value = array.array("q", eos)
+        if sys.byteorder == "big":
+            value.byteswap()
+        return value.tobytes()
+
+    @staticmethod
+    def __decode(data: bytes) -> typing.List[int]:
+        value = array.array("q")
+        value.frombytes(data)
+        if sys.byteorder == "big":
+            value.byteswap()
+        return value.tolist()
+
+    def get(self, key: bytes) -> typing.Optional[typing.List[int]]:
+        connection = self.__connect()
+        row = connection.execute("SELECT value, accessed FROM eos WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - row[1] > SQLITE_ACCESS_UPDATE_INTERVAL:
+            connection.execute("UPDATE eos SET accessed = ? WHERE key = ?", (now, key))
+        return self.__decode(row[0])
+
+    def put(self, key: bytes, eos: typing.List[int]) -> None:
+        data = self.__encode(eos)
+        self.__connect().execute(
+            "INSERT OR REPLACE INTO eos (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+            (key, data, len(key) + len(data), time.time()),
+        )
+        self.__n_puts += 1
+        if self.__n_puts % SQLITE_EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete entries older than max_age, and then least recently used ones exceeding max_bytes."""
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if self.max_age is not None:
+                connection.execute("DELETE FROM eos WHERE accessed < ?", (time.time() - self.max_age,))
+            if self.max_bytes is not None:
+                n_bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM eos").fetchone()[0]
+                keys = []
+                for key, size in connection.execute("SELECT key, size FROM eos ORDER BY accessed"):
+                    if n_bytes <= self.max_bytes:
+                        break
+                    keys.append((key,))
+                    n_bytes -= size
+                connection.executemany("DELETE FROM eos WHERE key = ?", keys)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> CacheStats:
+        n_items, n_bytes = self.__connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM eos").fetchone()
+        return CacheStats(
+            hits=self.hits, misses=self.misses, n_items=n_items, n_bytes=n_bytes, max_bytes=self.max_bytes
+        )
+
+    def close(self) -> None:
+        if self.__connection is not None and self.__pid == os.getpid():
+            self.__connection.close()
+        self.__connection = None
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes, "max_age": self.max_age, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        path = state.pop("path")
+        self.__init__(path, **state)
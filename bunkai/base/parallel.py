@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import collections
+import concurrent.futures
+import typing
+import weakref
+
+from more_itertools import chunked
+
+"""This module runs disambiguators in a pool of worker processes"""
+
+DEFAULT_CHUNKSIZE: int = 64
+# the number of chunks per worker submitted at once. It bounds memory use for long inputs.
+NUM_CHUNKS_IN_FLIGHT_PER_WORKER: int = 2
+
+_worker_disambiguator: typing.Any = None
+
+
+def _initialize_worker(cls: typing.Type, kwargs: typing.Dict[str, typing.Any]) -> None:
+    global _worker_disambiguator
+    _worker_disambiguator = cls(**kwargs)
+
+
+def _run_chunk(func: typing.Callable, chunk: typing.List[typing.Any]) -> typing.List[typing.Any]:
+    return [func(_worker_disambiguator, item) for item in chunk]
+
+
+def segment(disambiguator, text: str) -> typing.List[str]:
+    return list(disambiguator(text))
+
+
+def get_chunksize(num_items: typing.Optional[int], workers: int) -> int:
+    """Get a chunksize in the same manner as multiprocessing.Pool.map."""
+    if num_items is None:
+        return DEFAULT_CHUNKSIZE
+    chunksize, extra = divmod(num_items, workers * 4)
+    if extra:
+        chunksize += 1
+    return max(1, chunksize)
+
+
+class WorkerPool(object):
+    def __init__(self, cls: typing.Type, kwargs: typing.Dict[str, typing.Any], workers: int):
+        """
+        Start worker processes. Each worker builds its own disambiguator with cls(**kwargs) once.
+
+        Workers are kept alive until close() is called, so that they are reused across calls.
+        """
+        self.workers = workers
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_initialize_worker,
+            initargs=(cls, kwargs),
+        )
+        self._finalizer = weakref.finalize(self, self.executor.shutdown)
+
+    def imap(
+        self, func: typing.Callable, items: typing.Iterable[typing.Any], chunksize: typing.Optional[int] = None
+    ) -> typing.Iterator[typing.Any]:
+        """
+        Apply func(disambiguator, item) to every item in worker processes.
+
+        Results are yielded in input order.
+        """
+        if chunksize is None:
+            chunksize = get_chunksize(len(items) if isinstance(items, typing.Sized) else None, self.workers)
+        futures: typing.Deque[concurrent.futures.Future] = collections.deque()
+        try:
+            for chunk in chunked(items, chunksize):
+                futures.append(self.executor.submit(_run_chunk, func, chunk))
+                if len(futures) >= self.workers * NUM_CHUNKS_IN_FLIGHT_PER_WORKER:
+                    yield from futures.popleft().result()
+            while len(futures) > 0:
+                yield from futures.popleft().result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    @property
+    def closed(self) -> bool:
+        return not self._finalizer.alive
+
+    def close(self) -> None:
+        self._finalizer()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import threading
+import typing
+
+from janome.tokenizer import DEFAULT_MMAP_MODE, Tokenizer
+
+"""This module shares Janome tokenizers in a process"""
+
+_tokenizers: typing.Dict[bool, Tokenizer] = {}
+_lock = threading.Lock()
+
+
+def get_janome_tokenizer(*, mmap: bool = DEFAULT_MMAP_MODE) -> Tokenizer:
+    """
+    Get the Janome tokenizer shared in this process.
+
+    Building a tokenizer decodes the dictionary FST, which takes time and memory.
+    The tokenizer is built once per mmap mode. If it is built before fork, child processes share its pages.
+
+    :param mmap: Whether to use the memory-mapped system dictionary.
+    """
+    tokenizer = _tokenizers.get(mmap)
+    if tokenizer is None:
+        with _lock:
+            tokenizer = _tokenizers.get(mmap)
+            if tokenizer is None:
+                tokenizer = Tokenizer(mmap=mmap)
+                _tokenizers[mmap] = tokenizer
+    return tokenizer
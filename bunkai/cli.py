@@ -1,31 +1,57 @@
 #!/usr/bin/env python3
 
 import argparse
+import contextlib
+import functools
+import importlib
+import importlib.util
+import io
+import mmap
+import multiprocessing
 import sys
 import tempfile
 import typing
 import zipfile
 from pathlib import Path
 
+from more_itertools import chunked
+
 import bunkai.constant
 from bunkai import __version__
-from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
-from bunkai.algorithm.tsunoda_sbd.tsunoda_sbd import TsunodaSentenceBoundaryDisambiguation
+from bunkai.base.cache import SegmentationCache, SqliteSegmentationCache
+from bunkai.base.parallel import WorkerPool
 
 DEFAULT_ALGORITHM = "bunkai"
-algorithm2class: typing.Dict[str, typing.Type] = {
-    DEFAULT_ALGORITHM: BunkaiSentenceBoundaryDisambiguation,
-    "tsunoda": TsunodaSentenceBoundaryDisambiguation,
+NUM_SHARDS_PER_JOB: int = 8
+MAX_SHARD_BYTES: int = 64 * 1024 * 1024
+NUM_LINES_PER_CHUNK: int = 256
+# classes are imported on use so that `bunkai --version` does not load dictionaries
+algorithm2class_path: typing.Dict[str, str] = {
+    DEFAULT_ALGORITHM: "bunkai.algorithm.bunkai_sbd.bunkai_sbd.BunkaiSentenceBoundaryDisambiguation",
+    "tsunoda": "bunkai.algorithm.tsunoda_sbd.tsunoda_sbd.TsunodaSentenceBoundaryDisambiguation",
 }
 
 
+def get_algorithm_class(algorithm: str) -> typing.Type:
+    module_name, class_name = algorithm2class_path[algorithm].rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def positive_int(value: str) -> int:
+    """Parse a number of jobs. A value below 1 is an error rather than a silent serial run."""
+    num = int(value)
+    if num < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more: {value}")
+    return num
+
+
 def get_opts() -> argparse.Namespace:
     oparser = argparse.ArgumentParser()
     oparser.add_argument(
         "--algorithm",
         "-a",
         default=DEFAULT_ALGORITHM,
-        choices=sorted(list(algorithm2class.keys())),
+        choices=sorted(list(algorithm2class_path.keys())),
     )
     oparser.add_argument(
         "--input",
@@ -56,6 +82,18 @@ def get_opts() -> argparse.Namespace:
         action="store_true",
         help="Print Morphological analyses result",
     )
+    oparser.add_argument(
+        "--jobs",
+        "-j",
+        type=positive_int,
+        default=1,
+        help="Number of worker processes",
+    )
+    oparser.add_argument(
+        "--cache",
+        type=Path,
+        help="Path to a sqlite3 file to cache results across runs",
+    )
     oparser.add_argument(
         "--version",
         "-v",
@@ -66,14 +104,8 @@ def get_opts() -> argparse.Namespace:
 
 
 def is_install_with_lb() -> bool:
-    try:
-        import numpy  # noqa: F401
-        import torch  # noqa: F401
-        import transformers  # noqa: F401
-    except ImportError:
-        return False
-    else:
-        return True
+    # find modules without importing them since torch and transformers are slow to import
+    return all(importlib.util.find_spec(name) is not None for name in ("numpy", "torch", "transformers"))
 
 
 def run(
@@ -134,6 +166,113 @@ def run(
         yield "\n"
 
 
+def remove_sentence_boundary(ol: str) -> typing.Tuple[str, bool]:
+    if bunkai.constant.METACHAR_SENTENCE_BOUNDARY in ol:
+        return (
+            ol.replace(
+                bunkai.constant.METACHAR_SENTENCE_BOUNDARY,
+                "",
+            ),
+            True,
+        )
+    return ol, False
+
+
+def warn_sentence_boundary() -> None:
+    sys.stderr.write(
+        f"\033[91m[Warning] All {bunkai.constant.METACHAR_SENTENCE_BOUNDARY} will be removed for input\n\033[0m"
+    )
+
+
+def run_lines(
+    annotator,
+    lines: typing.Iterable[str],
+    ma: bool = False,
+) -> typing.Tuple[str, bool]:
+    """Process lines and return the output and whether sentence boundary characters are removed."""
+    outputs: typing.List[str] = []
+    removed_any: bool = False
+    for line in lines:
+        ol, removed = remove_sentence_boundary(line[:-1])
+        removed_any |= removed
+        outputs.extend(run(annotator, ol, ma))
+    return "".join(outputs), removed_any
+
+
+def run_shard(
+    annotator,
+    shard: typing.Tuple[str, int, int],
+    ma: bool = False,
+) -> typing.Tuple[str, bool]:
+    path, start, end = shard
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data: bytes = mm[start:end]
+    # decode in the same manner as Path.open() in the serial mode
+    with io.TextIOWrapper(io.BytesIO(data)) as inf:
+        return run_lines(annotator, inf, ma)
+
+
+def get_shards(path: Path, num_shards: int) -> typing.List[typing.Tuple[str, int, int]]:
+    """Split a file into byte ranges. Every range except the last one ends with a newline."""
+    shards: typing.List[typing.Tuple[str, int, int]] = []
+    with path.open("rb") as f:
+        size: int = path.stat().st_size
+        if size == 0:
+            return shards
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            shard_size: int = max(1, min(size // num_shards, MAX_SHARD_BYTES))
+            start: int = 0
+            while start < size:
+                pos: int = mm.find(b"\n", min(start + shard_size, size) - 1)
+                end: int = size if pos < 0 else pos + 1
+                shards.append((str(path), start, end))
+                start = end
+    return shards
+
+
+def run_parallel(
+    cls: typing.Type,
+    path_model: typing.Optional[Path],
+    path_in: Path,
+    path_out: Path,
+    ma: bool,
+    jobs: int,
+    cache: typing.Optional[SegmentationCache] = None,
+) -> None:
+    """Run the annotator in worker processes. The output is identical to the serial mode."""
+    if multiprocessing.get_start_method() == "fork":
+        from bunkai.base.tokenizer_registry import get_janome_tokenizer
+
+        # forked workers share the dictionary of the tokenizer built here
+        get_janome_tokenizer()
+    pool = WorkerPool(cls, {"path_model": path_model, "cache": cache}, jobs)
+    warned: bool = False
+    with contextlib.ExitStack() as stack:
+        stack.callback(pool.close)
+        outf = stack.enter_context(path_out.open("w"))
+        results: typing.Iterator[typing.Tuple[str, bool]]
+        if path_in.resolve().is_file():
+            # memory-map the input and let workers read their own byte ranges
+            results = pool.imap(
+                functools.partial(run_shard, ma=ma),
+                get_shards(path_in.resolve(), jobs * NUM_SHARDS_PER_JOB),
+                chunksize=1,
+            )
+        else:
+            inf = stack.enter_context(path_in.open())
+            results = pool.imap(
+                functools.partial(run_lines, ma=ma),
+                chunked(inf, NUM_LINES_PER_CHUNK),
+                chunksize=1,
+            )
+
+        for output, removed in results:
+            if removed and not warned:
+                warn_sentence_boundary()
+                warned = True
+            outf.write(output)
+
+
 def setup(
     path_model: Path,
     path_in: typing.Optional[Path],
@@ -198,25 +337,31 @@ def main() -> None:
         )
         return
 
-    cls = algorithm2class[opts.algorithm]
-    annotator = cls(path_model=opts.model)
+    cls = get_algorithm_class(opts.algorithm)
+    cache: typing.Optional[SegmentationCache] = None
+    if opts.cache is not None:
+        cache = SqliteSegmentationCache(opts.cache)
+    if opts.jobs > 1:
+        run_parallel(
+            cls,
+            opts.model,
+            opts.input,
+            opts.output,
+            opts.ma,
+            opts.jobs,
+            cache,
+        )
+        return
+
+    annotator = cls(path_model=opts.model, cache=cache)
     warned: bool = False
 
     with opts.input.open() as inf, opts.output.open("w") as outf:
         for line in inf:
-            ol: str = line[:-1]
-            if bunkai.constant.METACHAR_SENTENCE_BOUNDARY in ol:
-                ol = ol.replace(
-                    bunkai.constant.METACHAR_SENTENCE_BOUNDARY,
-                    "",
-                )
-                if not warned:
-                    sys.stderr.write(
-                        "\033[91m"
-                        f"[Warning] All {bunkai.constant.METACHAR_SENTENCE_BOUNDARY} will be removed for input\n"
-                        "\033[0m"
-                    )
-                    warned = True
+            ol, removed = remove_sentence_boundary(line[:-1])
+            if removed and not warned:
+                warn_sentence_boundary()
+                warned = True
 
             for op in run(
                 annotator,
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import statistics
+import time
+import typing
+from pathlib import Path
+
+from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+
+"""This module compares find_eos_batch with a loop of find_eos on documents in a line each"""
+
+
+def measure(
+    func: typing.Callable[[typing.List[str]], typing.List[typing.List[int]]],
+    documents: typing.List[str],
+    repeat: int,
+) -> typing.Tuple[typing.List[float], typing.List[typing.List[int]]]:
+    """Run func on documents repeat times and return the wall-clock times in seconds and the result."""
+    times: typing.List[float] = []
+    eos: typing.List[typing.List[int]] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        eos = func(documents)
+        times.append(time.perf_counter() - start)
+    return times, eos
+
+
+def main() -> None:
+    oparser = argparse.ArgumentParser()
+    oparser.add_argument("--input", "-i", type=argparse.FileType("r"), required=True, help="Documents in a line each")
+    oparser.add_argument("--output", "-o", type=argparse.FileType("w"), default="-")
+    oparser.add_argument("--model", "-m", type=Path, help="The linebreak model. Rules only if not given")
+    oparser.add_argument("--batch", "-b", type=int, nargs="+", default=[100, 1000], help="Numbers of documents")
+    oparser.add_argument("--repeat", "-n", type=int, default=3)
+    opts = oparser.parse_args()
+
+    splitter = BunkaiSentenceBoundaryDisambiguation(path_model=opts.model)
+    with opts.input as inf:
+        documents = [line.rstrip("\n") for line in inf]
+    # load lazy resources such as the dictionary of Janome
+    splitter.find_eos(documents[0])
+
+    loop_times, loop_eos = measure(lambda texts: [splitter.find_eos(text) for text in texts], documents, opts.repeat)
+    for batch_size in opts.batch:
+        batch_times, batch_eos = measure(
+            lambda texts: splitter.find_eos_batch(texts, batch_size=batch_size), documents, opts.repeat
+        )
+        result = {
+            "batch": batch_size,
+            "documents": len(documents),
+            "model": opts.model is not None,
+            "loop": statistics.median(loop_times),
+            "find_eos_batch": statistics.median(batch_times),
+            "speedup": statistics.median(loop_times) / statistics.median(batch_times),
+            "same": loop_eos == batch_eos,
+        }
+        opts.output.write(json.dumps(result, ensure_ascii=False))
+        opts.output.write("\n")
+        opts.output.flush()
+
+
+if __name__ == "__main__":
+    main()
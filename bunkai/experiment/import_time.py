@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+"""This module measures the start-up time of bunkai in fresh interpreters"""
+
+DEFAULT_STATEMENTS: typing.Dict[str, str] = {
+    "python": "pass",
+    "import bunkai": "import bunkai",
+    "import bunkai.cli": "import bunkai.cli",
+    "bunkai --version": "import sys; sys.argv = ['bunkai', '--version']; import bunkai.cli; bunkai.cli.main()",
+    "first segmentation": "from bunkai import Bunkai; list(Bunkai()('今日は晴れ。明日は雨'))",
+}
+HEAVY_MODULES: typing.Tuple[str, ...] = ("janome", "emoji", "emojis", "numpy", "torch", "transformers")
+SCRIPT_LOADED_MODULES: str = "; import sys, json; print(json.dumps([name for name in {} if name in sys.modules]))"
+
+
+def measure(statement: str, repeat: int) -> typing.List[float]:
+    """Run a statement in a new interpreter repeat times and return the wall-clock times in seconds."""
+    times: typing.List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def get_loaded_modules(statement: str, names: typing.Iterable[str] = HEAVY_MODULES) -> typing.List[str]:
+    """Get modules in names which are imported after a statement runs."""
+    script = statement + SCRIPT_LOADED_MODULES.format(repr(tuple(names)))
+    output = subprocess.run([sys.executable, "-c", script], check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output.decode("utf-8").splitlines()[-1])
+
+
+def main() -> None:
+    oparser = argparse.ArgumentParser()
+    oparser.add_argument("--repeat", "-n", type=int, default=5)
+    oparser.add_argument("--output", "-o", type=argparse.FileType("w"), default="-")
+    opts = oparser.parse_args()
+
+    for name, statement in DEFAULT_STATEMENTS.items():
+        times = measure(statement, opts.repeat)
+        result = {
+            "name": name,
+            "median": statistics.median(times),
+            "min": min(times),
+            "loaded": get_loaded_modules(statement),
+        }
+        opts.output.write(json.dumps(result, ensure_ascii=False))
+        opts.output.write("\n")
+        opts.output.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import argparse
+import dataclasses
+import functools
+import json
+import statistics
+import time
+import typing
+from pathlib import Path
+
+"""This module measures documents per second of the linebreak model on CPU"""
+
+
+def measure(
+    predict: typing.Callable[[typing.List[typing.List[str]]], typing.Any],
+    documents: typing.List[typing.List[str]],
+    buffer_size: int,
+    repeat: int,
+) -> typing.List[float]:
+    """Predict all documents buffer_size documents at a time repeat times and return the wall-clock times in seconds."""
+    times: typing.List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(0, len(documents), buffer_size):
+            predict(documents[i : i + buffer_size])
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> None:
+    oparser = argparse.ArgumentParser()
+    oparser.add_argument("--input", "-i", type=argparse.FileType("r"), required=True, help="Documents in a line each")
+    oparser.add_argument("--output", "-o", type=argparse.FileType("w"), default="-")
+    oparser.add_argument("--model", "-m", type=Path, required=True)
+    oparser.add_argument("--batch", "-b", type=int, nargs="+", default=[1, 8, 32], help="Numbers of windows in a batch")
+    oparser.add_argument("--buffer", type=int, default=1000, help="Number of documents given to a prediction")
+    oparser.add_argument("--threads", type=int)
+    oparser.add_argument("--interop-threads", type=int)
+    oparser.add_argument("--repeat", "-n", type=int, default=3)
+    oparser.add_argument("--subword-cache-bytes", type=int, help="Size of the cache of subwords. 0 disables it")
+    opts = oparser.parse_args()
+
+    # imported here since torch and transformers are slow to import
+    import torch
+
+    from bunkai.algorithm.lbd.predict import Predictor, generate_initial_annotation_obj
+
+    kwargs = {} if opts.subword_cache_bytes is None else {"subword_cache_bytes": opts.subword_cache_bytes}
+    predictor = Predictor(opts.model, num_threads=opts.threads, num_interop_threads=opts.interop_threads, **kwargs)
+    if predictor.device.type != "cpu":
+        predictor.device = torch.device("cpu")
+        predictor.model = predictor.model.to(predictor.device)
+    with opts.input as inf:
+        documents = list(generate_initial_annotation_obj(inf))
+    # the first batch loads lazy resources such as the dictionary of Janome
+    predictor.predict(documents[:1])
+
+    for batch_size in opts.batch:
+        times = measure(
+            functools.partial(predictor.predict, batch_size=batch_size), documents, opts.buffer, opts.repeat
+        )
+        result: typing.Dict[str, typing.Any] = {
+            "batch": batch_size,
+            "buffer": opts.buffer,
+            "documents": len(documents),
+            "threads": torch.get_num_threads(),
+            "median": statistics.median(times),
+            "documents_per_second": len(documents) / statistics.median(times),
+        }
+        cache_stats = predictor.tokenizer.subword_cache_stats()
+        if cache_stats is not None:
+            result["subword_cache"] = dataclasses.asdict(cache_stats)
+            result["subword_cache"]["hit_rate"] = cache_stats.hit_rate
+        opts.output.write(json.dumps(result, ensure_ascii=False))
+        opts.output.write("\n")
+        opts.output.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import statistics
+import time
+import typing
+
+from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+
+"""This module compares find_eos with and without local_morph on kinds of documents"""
+
+REVIEWS: typing.List[str] = [
+    "まずは一文目(^!^)つぎに二文目(^^)これ、テスト文なんですけど(笑)本当?にこんなテキストでいいのかな☆",
+    "(セルフドリンクサービスはすごく良かったです!種類も豊富。)",
+    "この値段で、こんな夕飯いいの？\nって、くらいおいしかった！",
+    "宿を予約しました♪まだ2ヶ月も先だけど。早すぎかな(笑)楽しみです★",
+]
+# a long sentence whose only candidates are at its end
+PROSE: str = "吾輩は猫であるが名前はまだ無いのでどこで生れたかとんと見当がつかぬ"
+DEFAULT_DOCUMENTS: typing.Dict[str, str] = {
+    # documents which local_morph targets: long texts with few boundary candidates
+    "sparse_4k": PROSE * 120 + "。って" + PROSE + "？と",
+    "sparse_30k": (PROSE * 100 + "。") * 9,
+    "review": "".join(REVIEWS),
+    # documents dense with candidates, where local_morph falls back to tokenizing the whole text
+    "dense_16k": "".join(review + PROSE[:30] + "。" for review in REVIEWS) * 60,
+    "dense_27k": "".join(REVIEWS) * 180,
+}
+
+
+def measure(
+    splitter: BunkaiSentenceBoundaryDisambiguation, text: str, repeat: int
+) -> typing.Tuple[typing.List[float], typing.List[int]]:
+    """Run find_eos repeat times and return the wall-clock times in seconds and the result."""
+    times: typing.List[float] = []
+    eos: typing.List[int] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        eos = splitter.find_eos(text)
+        times.append(time.perf_counter() - start)
+    return times, eos
+
+
+def main() -> None:
+    oparser = argparse.ArgumentParser()
+    oparser.add_argument("--repeat", "-n", type=int, default=3)
+    oparser.add_argument("--output", "-o", type=argparse.FileType("w"), default="-")
+    opts = oparser.parse_args()
+
+    full = BunkaiSentenceBoundaryDisambiguation()
+    local = BunkaiSentenceBoundaryDisambiguation(local_morph=True)
+    # load the dictionary of Janome
+    full.find_eos(REVIEWS[0])
+
+    for name, text in DEFAULT_DOCUMENTS.items():
+        full_times, full_eos = measure(full, text, opts.repeat)
+        local_times, local_eos = measure(local, text, opts.repeat)
+        result = {
+            "name": name,
+            "length": len(text),
+            "full": statistics.median(full_times),
+            "local": statistics.median(local_times),
+            "speedup": statistics.median(full_times) / statistics.median(local_times),
+            "same": full_eos == local_eos,
+        }
+        opts.output.write(json.dumps(result, ensure_ascii=False))
+        opts.output.write("\n")
+        opts.output.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -286,6 +286,13 @@ def read_examples_from_file(data_dir, mode: Union[Split, str]) -> List[InputExam
     return examples
 
 
+def get_subword_ids(tokenizer: PreTrainedTokenizer, word: str) -> List[int]:
+    """Get ids of subwords of a word. JanomeSubwordsTokenizer returns them from its cache."""
+    if isinstance(tokenizer, JanomeSubwordsTokenizer):
+        return tokenizer.get_subword_ids(word)
+    return tokenizer.convert_tokens_to_ids(tokenizer.tokenize(word))
+
+
 def convert_examples_to_features(
     examples: List[InputExample],
     label_list: List[str],
@@ -315,6 +322,9 @@ def convert_examples_to_features(
     # TODO clean up all this to leverage built-in features of tokenizers
 
     label_map = {label: i for i, label in enumerate(label_list)}
+    # tokens are kept as ids, and ids of subwords of a word are memoized by JanomeSubwordsTokenizer
+    cls_token_id = tokenizer.convert_tokens_to_ids(cls_token)
+    sep_token_id = tokenizer.convert_tokens_to_ids(sep_token)
 
     features = []
     for ex_index, example in enumerate(examples):
@@ -324,7 +334,7 @@ def convert_examples_to_features(
         tokens = []
         label_ids = []
         for word, label in zip(example.words, example.labels):
-            word_tokens = tokenizer.tokenize(word)
+            word_tokens = get_subword_ids(tokenizer, word)
             # bert-base-multilingual-cased sometimes output "nothing ([]) when calling tokenize with just a space.
             if len(word_tokens) > 0:
                 tokens.extend(word_tokens)
@@ -355,24 +365,24 @@ def convert_examples_to_features(
         # For classification tasks, the first vector (corresponding to [CLS]) is
         # used as as the "sentence vector". Note that this only makes sense because
         # the entire model is fine-tuned.
-        tokens += [sep_token]
+        tokens += [sep_token_id]
         label_ids += [pad_token_label_id]
         if sep_token_extra:
             # roberta uses an extra separator b/w pairs of sentences
-            tokens += [sep_token]
+            tokens += [sep_token_id]
             label_ids += [pad_token_label_id]
         segment_ids = [sequence_a_segment_id] * len(tokens)
 
         if cls_token_at_end:
-            tokens += [cls_token]
+            tokens += [cls_token_id]
             label_ids += [pad_token_label_id]
             segment_ids += [cls_token_segment_id]
         else:
-            tokens = [cls_token] + tokens
+            tokens = [cls_token_id] + tokens
             label_ids = [pad_token_label_id] + label_ids
             segment_ids = [cls_token_segment_id] + segment_ids
 
-        input_ids = tokenizer.convert_tokens_to_ids(tokens)
+        input_ids = list(tokens)
 
         # The mask has 1 for real tokens and 0 for padding tokens. Only real
         # tokens are attended to.
@@ -399,7 +409,7 @@ def convert_examples_to_features(
         if ex_index < 5:
             logger.info("*** Example ***")
             logger.info("guid: %s", example.guid)
-            logger.info("tokens: %s", " ".join([str(x) for x in tokens]))
+            logger.info("tokens: %s", " ".join([str(x) for x in tokenizer.convert_ids_to_tokens(tokens)]))
             logger.info("input_ids: %s", " ".join([str(x) for x in input_ids]))
             logger.info("input_mask: %s", " ".join([str(x) for x in input_mask]))
             logger.info("segment_ids: %s", " ".join([str(x) for x in segment_ids]))
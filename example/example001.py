@@ -48,6 +48,29 @@ def example_eos_character_index(input_text: str, path_newline_model: typing.Opti
         sent_start_index = eos_index
 
 
+@message
+def example_batch(input_text: str, path_newline_model: typing.Optional[Path] = None):
+    """How to process many documents at once."""
+    from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+
+    bunkai = BunkaiSentenceBoundaryDisambiguation(path_model=path_newline_model)
+    documents = [input_text, "2文書目です。おしまい♪"]
+    for eos_indices, sentences in zip(bunkai.find_eos_batch(documents), bunkai.segment_batch(documents)):
+        print(f"eos={eos_indices} sentences={sentences}")
+
+
+@message
+def example_parallel(input_text: str, path_newline_model: typing.Optional[Path] = None):
+    """How to process many documents with worker processes."""
+    from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+
+    documents = [input_text] * 10
+    # worker processes are shut down when exiting the with-block
+    with BunkaiSentenceBoundaryDisambiguation(path_model=path_newline_model) as bunkai:
+        for sentences in bunkai.map(documents, workers=2):
+            print(sentences)
+
+
 @message
 def example_morphological_analysis(input_text: str, path_newline_model: typing.Optional[Path] = None):
     """How to get morphemes during processes."""
@@ -88,5 +111,7 @@ if __name__ == "__main__":
     example_basic_usage(input_text, PATH_NEWLINE_MODEL)
     example_basic_usage_with_alias(input_text, PATH_NEWLINE_MODEL)
     example_eos_character_index(input_text, PATH_NEWLINE_MODEL)
+    example_batch(input_text, PATH_NEWLINE_MODEL)
+    example_parallel(input_text, PATH_NEWLINE_MODEL)
     example_morphological_analysis(input_text, PATH_NEWLINE_MODEL)
     example_error_analysis_during_process(input_text, PATH_NEWLINE_MODEL)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import unittest
+
+from bunkai.base.annotation import Annotations, SpanAnnotation, SpanStore, TokenIndex, TokenResult
+
+
+class TestSpanStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.spans = [
+            SpanAnnotation(
+                rule_name="Morph",
+                start_index=0,
+                end_index=2,
+                split_string_type="janome",
+                split_string_value="token",
+                args={"token": TokenResult(None, ("名詞",), "今日", "今日")},
+            ),
+            SpanAnnotation(
+                rule_name="BasicRule",
+                start_index=2,
+                end_index=3,
+                split_string_type="symbol",
+                split_string_value="。",
+            ),
+        ]
+
+    def test_store(self):
+        store = SpanStore.from_spans(self.spans)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(list(store), self.spans)
+        self.assertEqual(store[-1], self.spans[1])
+        self.assertEqual(store[0:1], self.spans[0:1])
+        with self.assertRaises(IndexError):
+            store[2]
+        self.assertEqual(store.indices("BasicRule"), [1])
+        self.assertEqual(store.indices("NotRegistered"), [])
+        self.assertEqual(list(store.filter_rule("Morph")), self.spans[0:1])
+
+        store.add("LinebreakAnnotator", 3, 4, "linebreak", "\n")
+        copied = SpanStore()
+        copied.extend(store)
+        self.assertEqual(list(copied), list(store))
+        self.assertIs(copied.args[0], store.args[0])
+        self.assertEqual(copied.get_rule_name(2), "LinebreakAnnotator")
+
+    def test_annotations(self):
+        annotations = Annotations()
+        annotations.add_annotation_layer("BasicRule", self.spans[1:])
+        annotations.add_annotation_layer("Morph", SpanStore.from_spans(self.spans))
+        self.assertEqual(list(annotations.get_final_layer()), self.spans)
+        self.assertEqual(
+            [t.word_surface for t in annotations.get_morph_analysis("Morph")],
+            ["今日"],
+        )
+        self.assertEqual(list(annotations.get_annotation_layer("BasicRule")), self.spans[1:])
+
+    def test_get_annotation_layer(self):
+        annotations = Annotations()
+        annotations.add_annotation_layer("BasicRule", self.spans[1:])
+        duplicated = SpanAnnotation(
+            rule_name="BasicRule",
+            start_index=2,
+            end_index=3,
+            split_string_type="symbol",
+            split_string_value="。",
+        )
+        layer = [duplicated] + self.spans
+        annotations.add_annotation_layer("Morph", SpanStore.from_spans(layer))
+        self.assertEqual(list(annotations.get_annotation_layer("BasicRule")), self.spans[1:])
+        self.assertEqual(list(annotations.get_annotation_layer("Morph")), self.spans[:1])
+
+        # spans appended to a layer after it is added are also found.
+        appended = SpanAnnotation(
+            rule_name="BasicRule",
+            start_index=5,
+            end_index=6,
+            split_string_type="symbol",
+            split_string_value="。",
+        )
+        annotations.get_final_layer().append(appended)
+        self.assertEqual(list(annotations.get_annotation_layer("BasicRule")), [self.spans[1], appended])
+
+    def test_get_annotation_store(self):
+        annotations = Annotations()
+        annotations.add_annotation_layer("BasicRule", self.spans[1:])
+        annotations.add_annotation_layer("Morph", SpanStore.from_spans(self.spans))
+        for rule_name in ("BasicRule", "Morph"):
+            store = annotations.get_annotation_store(rule_name)
+            self.assertIsInstance(store, SpanStore)
+            self.assertEqual(list(store), list(annotations.get_annotation_layer(rule_name)))
+
+
+def make_token_span(start_index: int, surface: str) -> SpanAnnotation:
+    return SpanAnnotation(
+        rule_name="Morph",
+        start_index=start_index,
+        end_index=start_index + len(surface),
+        split_string_type="janome",
+        split_string_value="token",
+        args={"token": TokenResult(None, ("名詞",), surface, surface)},
+    )
+
+
+class TestTokenIndex(unittest.TestCase):
+    def test_get(self):
+        token_spans = [make_token_span(0, "今日"), make_token_span(2, "は"), make_token_span(5, "晴れ")]
+        tokens = [span_ann.args["token"] for span_ann in token_spans]  # type: ignore
+        index = TokenIndex(token_spans)
+        self.assertEqual(
+            [index.get(i) for i in range(8)],
+            [tokens[0], tokens[0], tokens[1], None, None, tokens[2], tokens[2], None],
+        )
+        self.assertIn(1, index)
+        self.assertNotIn(3, index)
+        with self.assertRaises(KeyError):
+            index[3]
+        self.assertEqual(list(index), [0, 1, 2, 5, 6])
+        self.assertEqual(index.spans, token_spans)
+
+    def test_overlap(self):
+        # a later token covers offsets in the same way as a dict filled in the layer order
+        for token_spans in [
+            [make_token_span(0, "あいうえ"), make_token_span(2, "うえお"), make_token_span(6, "き")],
+            [make_token_span(0, "あいうえお"), make_token_span(1, "い")],
+            [make_token_span(3, "えお"), make_token_span(0, "あいうえおか"), make_token_span(2, "う")],
+        ]:
+            index2token = {}
+            for span_ann in token_spans:
+                for i in range(span_ann.start_index, span_ann.end_index):
+                    index2token[i] = span_ann.args["token"]  # type: ignore
+            self.assertEqual(dict(TokenIndex(token_spans)), index2token)
+
+    def test_get_token_index(self):
+        annotations = Annotations()
+        annotations.add_annotation_layer("Morph", [make_token_span(0, "今日"), make_token_span(2, "は")])
+        index = annotations.get_token_index("Morph")
+        self.assertIs(annotations.get_token_index("Morph"), index)
+        # spans of other rules do not change the index
+        annotations.get_final_layer().append(  # type: ignore
+            SpanAnnotation(
+                rule_name="BasicRule", start_index=2, end_index=3, split_string_type="symbol", split_string_value="。"
+            )
+        )
+        self.assertIs(annotations.get_token_index("Morph"), index)
+        annotations.get_final_layer().append(make_token_span(3, "晴れ"))  # type: ignore
+        self.assertEqual(len(annotations.get_token_index("Morph").spans), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+import random
+import unittest
+
+from bunkai.base.annotation import SpanAnnotation, SpanStore
+from bunkai.base.annotator import func_filter_previous_rule_same_span, func_filter_span
+
+
+def generate_spans(rule_name: str, n_spans: int, max_index: int):
+    spans = []
+    for _ in range(n_spans):
+        start_index = random.randint(0, max_index)
+        end_index = random.randint(start_index, max_index)
+        spans.append(
+            SpanAnnotation(
+                rule_name=rule_name,
+                start_index=start_index,
+                end_index=end_index,
+                split_string_type=None,
+                split_string_value=None,
+            )
+        )
+    return spans
+
+
+class TestAnnotator(unittest.TestCase):
+    def test_func_filter_span(self):
+        random.seed(0)
+        for _ in range(200):
+            spans_wide = generate_spans("wide", random.randint(0, 10), 30)
+            spans_narrow = generate_spans("narrow", random.randint(0, 10), 30)
+            expected = [
+                b_ann
+                for b_ann in spans_narrow
+                if not any(b_ann.get_spans().within(f_ann.get_spans()) for f_ann in spans_wide)
+            ]
+            self.assertEqual(func_filter_span(spans_wide, spans_narrow), expected)
+            filtered = func_filter_span(SpanStore.from_spans(spans_wide), SpanStore.from_spans(spans_narrow))
+            self.assertIsInstance(filtered, SpanStore)
+            self.assertEqual(list(filtered), expected)
+
+    def test_func_filter_previous_rule_same_span(self):
+        spans_previous = generate_spans("previous", 5, 10)
+        spans_current = generate_spans("current", 5, 10) + [
+            SpanAnnotation(
+                rule_name="current",
+                start_index=spans_previous[0].start_index,
+                end_index=spans_previous[0].end_index,
+                split_string_type=None,
+                split_string_value=None,
+            )
+        ]
+        previous_keys = {(s.start_index, s.end_index) for s in spans_previous}
+        for previous in (spans_previous, SpanStore.from_spans(spans_previous)):
+            filtered = func_filter_previous_rule_same_span(spans_current, previous)
+            self.assertEqual(filtered[-len(spans_previous) :], spans_previous)
+            for s in filtered[: -len(spans_previous)]:
+                self.assertNotIn((s.start_index, s.end_index), previous_keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
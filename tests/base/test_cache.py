@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import os
+import pickle
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from bunkai.base.cache import (
+    LRUCache,
+    MemorySegmentationCache,
+    SqliteSegmentationCache,
+    get_cache_key,
+    get_model_fingerprint,
+)
+
+
+class TestCache(unittest.TestCase):
+    def test_lru_cache(self):
+        cache: LRUCache[str, str] = LRUCache(max_bytes=3, sizeof=lambda k, v: len(v))
+        cache.put("a", "x")
+        cache.put("b", "yy")
+        self.assertEqual(cache.get("a"), "x")
+        # "b" is the least recently used.
+        cache.put("c", "z")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "z")
+        # larger than max_bytes
+        cache.put("d", "wwww")
+        self.assertIsNone(cache.get("d"))
+
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.n_items, stats.n_bytes), (2, 2, 2, 2))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_memory_segmentation_cache(self):
+        cache = MemorySegmentationCache()
+        key = get_cache_key("テキスト。", "config")
+        self.assertNotEqual(key, get_cache_key("テキスト。", "other-config"))
+        self.assertIsNone(cache.get(key))
+        cache.put(key, [5])
+        self.assertEqual(cache.get(key), [5])
+        self.assertEqual(cache.stats().n_items, 1)
+
+        cache_small = MemorySegmentationCache(max_bytes=cache.stats().n_bytes)
+        cache_small.put(key, [5])
+        cache_small.put(get_cache_key("テキスト", "config"), [4])
+        self.assertIsNone(cache_small.get(key))
+
+        # entries are not sent to other processes.
+        copied = pickle.loads(pickle.dumps(cache))
+        self.assertIsNone(copied.get(key))
+        self.assertEqual(copied.max_bytes, cache.max_bytes)
+
+    def test_sqlite_segmentation_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir).joinpath("cache.sqlite3")
+            keys = [get_cache_key(str(i), "config") for i in range(3)]
+            cache = SqliteSegmentationCache(path)
+            self.assertIsNone(cache.get(keys[0]))
+            cache.put(keys[0], [1, 2**40])
+            cache.put(keys[1], [])
+            cache.close()
+
+            # shared with other instances and processes
+            cache = pickle.loads(pickle.dumps(SqliteSegmentationCache(path, max_bytes=None, max_age=None)))
+            self.assertEqual(cache.get(keys[0]), [1, 2**40])
+            self.assertEqual(cache.get(keys[1]), [])
+            stats = cache.stats()
+            self.assertEqual((stats.hits, stats.misses, stats.n_items), (2, 0, 2))
+
+            # keys[0] is the least recently used
+            time.sleep(0.01)
+            cache.put(keys[2], [3])
+            cache.max_bytes = stats.n_bytes
+            cache.evict()
+            self.assertIsNone(cache.get(keys[0]))
+            self.assertEqual(cache.get(keys[2]), [3])
+
+            cache.max_age = 0.0
+            cache.evict()
+            self.assertEqual(cache.stats().n_items, 0)
+            cache.close()
+
+    def test_get_model_fingerprint(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_model = Path(tmpdir)
+            path_model.joinpath("model.bin").write_bytes(b"0")
+            fingerprint = get_model_fingerprint(path_model)
+            self.assertEqual(fingerprint, get_model_fingerprint(path_model))
+            path_model.joinpath("model.bin").write_bytes(b"01")
+            os.utime(path_model.joinpath("model.bin"), ns=(0, 0))
+            self.assertNotEqual(fingerprint, get_model_fingerprint(path_model))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+import unittest
+
+from bunkai.algorithm.bunkai_sbd.annotator.morph_annotator import MorphAnnotatorJanome
+from bunkai.algorithm.lbd.custom_tokenizers import JanomeTokenizer
+from bunkai.algorithm.tsunoda_sbd.annotator.morph_annotator_janome import (
+    MorphAnnotatorJanome as TsunodaMorphAnnotatorJanome,
+)
+from bunkai.base.tokenizer_registry import get_janome_tokenizer
+
+
+class TestTokenizerRegistry(unittest.TestCase):
+    def test_get_janome_tokenizer(self):
+        tokenizer = get_janome_tokenizer()
+        self.assertIs(get_janome_tokenizer(), tokenizer)
+        self.assertIs(MorphAnnotatorJanome().tokenizer, tokenizer)
+        self.assertIs(TsunodaMorphAnnotatorJanome().tokenizer, tokenizer)
+        self.assertIs(JanomeTokenizer().janome_tokenizer, tokenizer)
+
+        tokenizer_ram = get_janome_tokenizer(mmap=False)
+        self.assertIsNot(tokenizer_ram, tokenizer)
+        self.assertIs(get_janome_tokenizer(mmap=False), tokenizer_ram)
+        self.assertEqual(
+            [t.surface for t in tokenizer_ram.tokenize("すもももももももものうち")],
+            [t.surface for t in tokenizer.tokenize("すもももももももものうち")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
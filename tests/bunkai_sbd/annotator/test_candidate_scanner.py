@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import random
+import unittest
+
+from bunkai.algorithm.bunkai_sbd.annotator.candidate_scanner import (
+    RE_FACEMARK,
+    RE_LBS,
+    RE_PARENT_EMOTION,
+    RE_SENT_SPLIT,
+    get_candidates,
+    scan,
+)
+from bunkai.base.annotation import Annotations
+
+FRAGMENTS = [
+    "宿を予約しました",
+    "(笑)",
+    "（泣）",
+    "(^_^;)",
+    "＼(^o^)／",
+    "（＊́ω‘＊）",
+    "!!",
+    "。",
+    "？",
+    "．",
+    "…",
+    "☆",
+    "♪",
+    " ",
+    "　",
+    "\n",
+    " \n \n",
+    "(",
+    ")",
+    "a1",
+    "No.1",
+    "★。",
+    "…！？\n",
+    "。 ",
+    "\t",
+]
+RULE2PATTERN = {
+    "FaceMarkDetector": RE_FACEMARK,
+    "EmotionExpressionAnnotator": RE_PARENT_EMOTION,
+    "BasicRule": RE_SENT_SPLIT,
+    "LinebreakForceAnnotator": RE_LBS,
+}
+
+
+class TestCandidateScanner(unittest.TestCase):
+    def test_scan(self):
+        random.seed(0)
+        texts = ["", "テキスト", "\n", "(^ ^) (^　^) 先月泊まりましたが とてもよかったです。"]
+        texts += ["".join(random.choices(FRAGMENTS, k=random.randint(1, 20))) for _ in range(2000)]
+        for text in texts:
+            result = scan(text)
+            self.assertEqual(result.keys(), RULE2PATTERN.keys())
+            for rule_name, pattern in RULE2PATTERN.items():
+                self.assertEqual(
+                    result[rule_name],
+                    [match_obj.span() for match_obj in pattern.finditer(text)],
+                    (rule_name, text),
+                )
+
+    def test_get_candidates(self):
+        annotations = Annotations()
+        self.assertEqual(get_candidates("あ。い。", annotations, "BasicRule"), [(1, 2), (3, 4)])
+        self.assertEqual(get_candidates("あ。", annotations, "BasicRule"), [(1, 2)])
+        self.assertEqual(get_candidates("あ。", annotations, "LinebreakForceAnnotator"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
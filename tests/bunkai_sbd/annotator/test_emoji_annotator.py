@@ -3,6 +3,7 @@ import unittest
 from collections import namedtuple
 
 from bunkai.algorithm.bunkai_sbd.annotator.emoji_annotator import EmojiAnnotator
+from bunkai.algorithm.bunkai_sbd.annotator.emoji_table import get_emoji_table
 from bunkai.base.annotation import Annotations
 
 from .annotation_test_base import TestAnnotatorBase, TestInstance
@@ -15,8 +16,10 @@ class TestMorphAnnotator(TestAnnotatorBase):
         self.test_input = [
             MorphResult("うーん🤔🤔🤔どうしよう", [6]),
             MorphResult("ビール🍺のみたい。️Frankfurtの🍺はKrombacher", []),
-            MorphResult("これが文⬆️", [5]),
+            MorphResult("これが文⬆️", [6]),
             MorphResult("１文目😄２文目😚３文目😙４文目😄😙おわり。", [4, 8, 12, 17]),
+            MorphResult("楽しかった👍🏽❤️また行きたい", [9]),
+            MorphResult("家族で👨\u200d👩\u200d👧旅行😄楽しかった", [11]),
         ]
 
     def test_emoji_detector(self):
@@ -26,6 +29,17 @@ class TestMorphAnnotator(TestAnnotatorBase):
             result = emoji_annotator.annotate(test_tuple.input_text, spans=ann)
             self.assertEqual(set([s.end_index for s in result.get_final_layer()]), set(test_tuple.seq_newline_position))
 
+    def test_find_emoji_sequences(self):
+        table = get_emoji_table()
+        self.assertEqual(
+            list(table.find("家族👨\u200d👩\u200d👧です")), [(2, 7, table.get_category("👨\u200d👩\u200d👧"))]
+        )
+        self.assertEqual(list(table.find("👍🏽👍")), [(0, 2, "People & Body"), (2, 3, "People & Body")])
+        self.assertEqual(list(table.find("❤️\u200d")), [(0, 2, "Smileys & Emotion")])
+        self.assertEqual(list(table.find("1.5リットル")), [])
+        self.assertEqual(EmojiAnnotator.get_emoji_info("⬆"), "Symbols")
+        self.assertIsNone(EmojiAnnotator.get_emoji_info("あ"))
+
     def test_annotate(self):
         test_input = [
             TestInstance("うーん🤔🤔🤔どうしよう", n_sentence=2, expected_rules=[EmojiAnnotator.__name__]),
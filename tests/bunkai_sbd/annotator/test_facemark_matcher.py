@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import random
+import typing
+import unittest
+
+from bunkai.algorithm.bunkai_sbd.annotator.candidate_scanner import RE_FACEMARK
+from bunkai.algorithm.bunkai_sbd.annotator.facemark_detector import FaceMarkDetector
+from bunkai.algorithm.bunkai_sbd.annotator.facemark_matcher import FaceMarkMatcher
+from bunkai.base.annotation import Annotations
+from tests.linear_time import assert_linear_time
+
+
+class TestFaceMarkMatcher(unittest.TestCase):
+    def test_same_as_regexp(self):
+        matcher = FaceMarkMatcher()
+        texts = [
+            "いい湯でした(^_^)食事はよかった",
+            "子供連れによい＼(^_^ )( ^_^)／品揃えは良い",
+            "食事はよかった(*￣(ｴ)￣*)いい湯でした",
+            "(^ ^)いいですね(泣)No.1❤️(^ ^)",
+            "(()",
+            "(a(b)c)",
+            "（涙）a.b（笑",
+        ]
+        __random = random.Random(0)
+        alphabet = "(（)）^_;a1あ!！ω \n"
+        texts += ["".join(__random.choice(alphabet) for _ in range(__random.randint(0, 16))) for _ in range(3000)]
+        for text in texts:
+            for pos in (0, len(text) // 2):
+                self.assertEqual(
+                    list(matcher.finditer(text, pos)),
+                    [m.span() for m in RE_FACEMARK.finditer(text, pos)],
+                    msg=f"{text} {pos}",
+                )
+
+    def test_pathological_inputs(self):
+        def make_inputs(n: int) -> typing.Dict[str, str]:
+            return {
+                "opens": "(" * n,
+                "opens_full_width": "（" * n + "）",
+                "open_and_symbols": "(" + "^" * n,
+                "symbols_and_open": "！" * n + "(",
+                "alternating": "(a" * (n // 2),
+                "unbalanced": "(^_^" * (n // 4),
+                "nested": "(" * (n // 2) + ")" * (n // 2),
+            }
+
+        detector = FaceMarkDetector()
+        assert_linear_time(self, lambda text: detector.annotate(text, Annotations()), make_inputs, 20000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,9 +7,15 @@ from bunkai.algorithm.bunkai_sbd.annotator.constant import LAYER_NAME_FIRST
 from bunkai.algorithm.bunkai_sbd.annotator.emoji_annotator import EmojiAnnotator
 from bunkai.algorithm.bunkai_sbd.annotator.emotion_expression_annotator import EmotionExpressionAnnotator
 from bunkai.algorithm.bunkai_sbd.annotator.facemark_detector import FaceMarkDetector
-from bunkai.algorithm.bunkai_sbd.annotator.indirect_quote_exception_annotator import IndirectQuoteExceptionAnnotator
+from bunkai.algorithm.bunkai_sbd.annotator.indirect_quote_exception_annotator import (
+    MORPHEMES_AFTER_CANDIDATE,
+    IndirectQuoteExceptionAnnotator,
+    RuleObject,
+    RuleTrie,
+)
 from bunkai.algorithm.bunkai_sbd.annotator.linebreak_annotator import LinebreakAnnotator
 from bunkai.algorithm.bunkai_sbd.annotator.morph_annotator import MorphAnnotatorJanome
+from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
 from bunkai.base.annotation import Annotations, SpanAnnotation
 
 MorphResult = namedtuple("MorphResult", ("input_text", "seq_linebreak_position"))
@@ -65,6 +71,34 @@ class TestMorphAnnotator(unittest.TestCase):
     def test_indirect_quote_exception_annotator(self):
         pass
 
+    def test_rule_trie(self):
+        rules = MORPHEMES_AFTER_CANDIDATE + [RuleObject(["くらい", "の", "量"]), RuleObject(["と", "いう"])]
+        rule_trie = RuleTrie(rules)
+        for text in ["くらいの量ですと言ってもいいくらいです", "もありません。ほどでしたなどという"]:
+            index2token_obj = self.init_tokenized_layer(text).get_token_index(MorphAnnotatorJanome.__name__)
+            for i in range(len(text) + 1):
+                self.assertEqual(
+                    rule_trie.match(i, index2token_obj),
+                    any(rule_object.match(i, index2token_obj) for rule_object in rules),
+                    msg=f"{text} {i}",
+                )
+        self.assertFalse(RuleTrie().match(0, {}))
+        self.assertTrue(RuleTrie([RuleObject([])]).match(0, {}))
+
+    def test_custom_rules(self):
+        text = "楽しかった！また行きたい"
+        rules = MORPHEMES_AFTER_CANDIDATE + [RuleObject(["また"])]
+        self.assertEqual(
+            len(IndirectQuoteExceptionAnnotator().annotate(text, self.init_tokenized_layer(text)).get_final_layer()), 2
+        )
+        annotator = IndirectQuoteExceptionAnnotator(rules=rules)
+        self.assertEqual(len(annotator.annotate(text, self.init_tokenized_layer(text)).get_final_layer()), 1)
+        self.assertEqual(BunkaiSentenceBoundaryDisambiguation().find_eos(text), [6, 12])
+        self.assertEqual(BunkaiSentenceBoundaryDisambiguation(indirect_quote_rules=rules).find_eos(text), [12])
+        self.assertEqual(
+            BunkaiSentenceBoundaryDisambiguation(indirect_quote_rules=rules, local_morph=True).find_eos(text), [12]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
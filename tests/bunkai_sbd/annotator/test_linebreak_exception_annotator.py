@@ -70,6 +70,21 @@ class TestLinebreakExceptionAnnotator(TestAnnotatorBase):
                     __ = set([(spans.start_index, spans.end_index) for spans in results_exception_annotator])
                     assert __ == set(test_case.char_positions)
 
+    def test_annotate_batch(self):
+        texts = [test_case.text for test_case in self.test_sentences]
+        predictions = [set(test_case.return_value[0]) for test_case in self.test_sentences]
+        with patch("bunkai.algorithm.lbd.predict.Predictor.__init__", MagicMock(return_value=None)):
+            with patch("bunkai.algorithm.lbd.predict.Predictor.predict", MagicMock(return_value=predictions)):
+                splitter_obj = LinebreakAnnotator(path_model=Path(""))
+                spans_list = splitter_obj.annotate_batch(texts, [self.init_tokenized_layer(text) for text in texts])
+        for test_case, span_result in zip(self.test_sentences, spans_list):
+            __ = set(
+                (a.start_index, a.end_index)
+                for a in span_result.get_annotation_layer("LinebreakAnnotator")
+                if a.rule_name == "LinebreakAnnotator"
+            )
+            self.assertEqual(__, set(test_case.char_positions))
+
 
 if __name__ == "__main__":
     unittest.main()
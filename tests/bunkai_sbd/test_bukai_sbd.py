@@ -2,6 +2,8 @@
 import dataclasses
 import typing
 import unittest
+from pathlib import Path
+from unittest.mock import patch
 
 from bunkai.algorithm.bunkai_sbd.annotator.basic_annotator import BasicRule
 from bunkai.algorithm.bunkai_sbd.annotator.constant import LAYER_NAME_FIRST
@@ -9,8 +11,11 @@ from bunkai.algorithm.bunkai_sbd.annotator.emoji_annotator import EmojiAnnotator
 from bunkai.algorithm.bunkai_sbd.annotator.emotion_expression_annotator import EmotionExpressionAnnotator
 from bunkai.algorithm.bunkai_sbd.annotator.facemark_detector import FaceMarkDetector
 from bunkai.algorithm.bunkai_sbd.annotator.linebreak_force_annotator import LinebreakForceAnnotator
+from bunkai.algorithm.bunkai_sbd.annotator.morph_annotator import MorphAnnotatorJanome
 from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
 from bunkai.base.annotation import Annotations, SpanAnnotation
+from bunkai.base.cache import MemorySegmentationCache
+from bunkai.constant import METACHAR_LINE_BREAK
 
 
 @dataclasses.dataclass
@@ -196,6 +201,112 @@ class TestBunkaiSbd(unittest.TestCase):
                 f"!= {test_case.expected_rules}",
             )
 
+    def test_batch(self):
+        splitter_obj = BunkaiSentenceBoundaryDisambiguation(path_model=None)
+        texts = ["".join(test_case.sentences) for test_case in self.test_sentences]
+        texts.append(texts[0])
+        self.assertEqual(splitter_obj.find_eos_batch(texts), [splitter_obj.find_eos(text) for text in texts])
+        self.assertEqual(splitter_obj.segment_batch(texts), [list(splitter_obj(text)) for text in texts])
+        self.assertEqual(splitter_obj.find_eos_batch([]), [])
+        self.assertEqual(splitter_obj.segment_batch(texts, batch_size=2), [list(splitter_obj(text)) for text in texts])
+        with self.assertRaises(ValueError):
+            splitter_obj.find_eos_batch(texts, batch_size=0)
+
+    def test_batch_linebreak_model(self):
+        def predict(documents_morphemes, *, batch_size=None):
+            return [
+                {i for i, token in enumerate(tokens) if token == METACHAR_LINE_BREAK} for tokens in documents_morphemes
+            ]
+
+        texts = [
+            "いい宿でした\nまた来ます",
+            "お風呂も大きく\nのんびり出来ました☆",
+            "おしまい♪",
+            "いい宿でした\nまた来ます",
+        ]
+        with patch("bunkai.algorithm.lbd.predict.Predictor.__init__", return_value=None):
+            with patch("bunkai.algorithm.lbd.predict.Predictor.predict", side_effect=predict) as predict_mock:
+                splitter_obj = BunkaiSentenceBoundaryDisambiguation(path_model=Path(""))
+                expected = [splitter_obj.find_eos(text) for text in texts]
+                predict_mock.reset_mock()
+                self.assertEqual(splitter_obj.find_eos_batch(texts), expected)
+                # windows of distinct documents in a batch are predicted together
+                self.assertEqual(predict_mock.call_count, 1)
+                self.assertEqual(len(predict_mock.call_args.args[0]), 3)
+                self.assertEqual(splitter_obj.find_eos_batch(texts, batch_size=2), expected)
+
+    def test_keep_layers(self):
+        splitter_obj = BunkaiSentenceBoundaryDisambiguation(path_model=None)
+        splitter_lean = BunkaiSentenceBoundaryDisambiguation(path_model=None, keep_layers=False)
+        for test_case in self.test_sentences:
+            text = "".join(test_case.sentences)
+            annotations = splitter_lean.eos(text)
+            self.assertEqual(
+                set(annotations.name2spans.keys()),
+                {MorphAnnotatorJanome.__name__, LinebreakForceAnnotator.__name__},
+            )
+            self.assertEqual(
+                [str(s) for s in annotations.get_final_layer()],
+                [str(s) for s in splitter_obj.eos(text).get_final_layer()],
+            )
+            self.assertEqual(splitter_lean.find_eos(text), splitter_obj.find_eos(text))
+
+    def test_local_morph(self):
+        splitter_obj = BunkaiSentenceBoundaryDisambiguation(path_model=None)
+        splitter_local = BunkaiSentenceBoundaryDisambiguation(path_model=None, local_morph=True)
+        texts = ["".join(test_case.sentences) for test_case in self.test_sentences]
+        texts.append(
+            "吾輩は猫であるが名前はまだ無い" * 40 + "？と" + "どこで生れたかとんと見当がつかぬ" * 40 + "。って"
+        )
+        texts.append("  \nこの値段で、こんな夕飯いいの？\nって、くらいおいしかった！\n")
+        for text in texts:
+            self.assertEqual(splitter_local.find_eos(text), splitter_obj.find_eos(text))
+        with self.assertRaises(ValueError):
+            BunkaiSentenceBoundaryDisambiguation(path_model=Path("model"), local_morph=True)
+
+    def test_local_morph_cost(self):
+        splitter_local = BunkaiSentenceBoundaryDisambiguation(path_model=None, local_morph=True)
+        morph_annotator = [ann for ann in splitter_local.pipeline if isinstance(ann, MorphAnnotatorJanome)][0]
+        tokenizer = morph_annotator.tokenizer
+        prose = "吾輩は猫であるが名前はまだ無いのでどこで生れたかとんと見当がつかぬ"
+        sparse = prose * 120 + "。って" + prose + "？と"
+        # candidates a little further apart than the windows around them. Tokenizing them twice costs more than once
+        dense = "".join("".join(test_case.sentences) + prose[:30] + "。" for test_case in self.test_sentences) * 10
+        for text, max_ratio in ((sparse, 0.5), (dense, 1.0)):
+            with patch.object(tokenizer, "tokenize", wraps=tokenizer.tokenize) as tokenize_mock:
+                splitter_local.find_eos(text)
+            n_tokenized = sum(len(c.args[0]) for c in tokenize_mock.call_args_list)
+            self.assertLessEqual(n_tokenized, max_ratio * len(text))
+
+    def test_cache(self):
+        cache = MemorySegmentationCache()
+        splitter_obj = BunkaiSentenceBoundaryDisambiguation(path_model=None, cache=cache)
+        text = "".join(self.test_sentences[0].sentences)
+        expected = splitter_obj.find_eos(text)
+        with patch.object(splitter_obj, "eos") as eos_mock:
+            self.assertEqual(splitter_obj.find_eos(text), expected)
+            eos_mock.assert_not_called()
+        self.assertEqual((cache.stats().hits, cache.stats().misses), (1, 1))
+
+        # the cache is shared only among the same pipelines.
+        splitter_local = BunkaiSentenceBoundaryDisambiguation(path_model=None, local_morph=True, cache=cache)
+        self.assertNotEqual(splitter_local.get_config(), splitter_obj.get_config())
+        self.assertEqual(splitter_local.find_eos(text), expected)
+        self.assertEqual(cache.stats().misses, 2)
+
+    def test_map(self):
+        texts = ["".join(test_case.sentences) for test_case in self.test_sentences] * 3
+        with BunkaiSentenceBoundaryDisambiguation(path_model=None) as splitter_obj:
+            expected = [list(splitter_obj(text)) for text in texts]
+            self.assertEqual(list(splitter_obj.map(texts, workers=2, chunksize=2)), expected)
+            pool = splitter_obj._pool
+            # workers are reused
+            self.assertEqual(list(splitter_obj.map(iter(texts), workers=2)), expected)
+            self.assertIs(splitter_obj._pool, pool)
+            self.assertEqual(list(splitter_obj.map(texts, workers=1)), expected)
+        self.assertIsNone(splitter_obj._pool)
+        self.assertTrue(pool.closed)  # type: ignore
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import random
+import unittest
+from unittest.mock import patch
+
+from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+from bunkai.algorithm.bunkai_sbd.edit import MAX_WINDOW_RATIO, apply_edit
+from tests.bunkai_sbd.test_stream import SENTENCES, make_document
+
+
+class TestEditSegmentation(unittest.TestCase):
+    def test_edit_segmentation(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        __random = random.Random(0)
+        insertions = ["。", "の", "と", "\n", " ", "(笑)", "No.", "1"] + SENTENCES
+        for text in [make_document(120, 5), "  \n" + make_document(60, 6)]:
+            segmentation = splitter.get_segmentation(text)
+            for _ in range(10):
+                offset = __random.randint(0, len(segmentation.text))
+                deleted_length = min(__random.choice([0, 1, 5, 50]), len(segmentation.text) - offset)
+                inserted_text = __random.choice(insertions)
+                segmentation = splitter.edit_segmentation(segmentation, offset, deleted_length, inserted_text)
+                expected = splitter.get_segmentation(segmentation.text)
+                self.assertEqual(segmentation, expected, msg=(offset, deleted_length, inserted_text))
+                self.assertEqual(list(segmentation), list(splitter(segmentation.text)))
+
+    def test_edit_cost(self):
+        """An edit segments the first window and MAX_WINDOW_RATIO of the text at most more than the whole text."""
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        unpunctuated = "吾輩は猫であるが名前はまだ無いのでどこで生れたかとんと見当がつかぬ" * 400
+        # lattices after the edit do not align in either of unpunctuated texts
+        for text in [unpunctuated, unpunctuated + "。", make_document(600)]:
+            segmentation = splitter.get_segmentation(text)
+            with patch.object(splitter, "eos", wraps=splitter.eos) as eos:
+                edited = splitter.edit_segmentation(segmentation, len(text) // 3, 0, "の")
+            self.assertEqual(edited, splitter.get_segmentation(edited.text))
+            n_segmented = sum(len(call.args[0]) for call in eos.call_args_list)
+            n_first_window = len(eos.call_args_list[0].args[0])
+            self.assertLessEqual(n_segmented, n_first_window + (1 + MAX_WINDOW_RATIO) * len(edited.text))
+            if not text.startswith(unpunctuated):
+                # lattices align in the first window
+                self.assertEqual(eos.call_count, 1)
+                self.assertLess(n_segmented, len(edited.text) / 2)
+
+    def test_edit_edges(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        text = "宿を予約しました♪まだ2ヶ月も先だけど。"
+        segmentation = splitter.get_segmentation(text, splitter.eos(text))
+        for offset, deleted_length, inserted_text in [
+            (0, 0, " "),
+            (0, 3, ""),
+            (len(text), 0, "早すぎかな(笑)"),
+            (0, len(text), ""),
+        ]:
+            edited = splitter.edit_segmentation(segmentation, offset, deleted_length, inserted_text)
+            expected = apply_edit(text, offset, deleted_length, inserted_text)
+            self.assertEqual(edited, splitter.get_segmentation(expected))
+        with self.assertRaises(ValueError):
+            splitter.edit_segmentation(segmentation, len(text), 1, "")
+        with self.assertRaises(ValueError):
+            BunkaiSentenceBoundaryDisambiguation(local_morph=True).get_segmentation(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
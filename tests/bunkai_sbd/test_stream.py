@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import io
+import itertools
+import random
+import unittest
+from unittest.mock import patch
+
+from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+from bunkai.algorithm.bunkai_sbd.stream import DEFAULT_LOOKAHEAD, LATTICE_BREAK, StreamSegmenter, find_lattice_starts
+from bunkai.base.tokenizer_registry import get_janome_tokenizer
+
+SENTENCES = [
+    "まずは一文目(^!^)つぎに二文目(^^)これ、テスト文なんですけど(笑)本当?にこんなテキストでいいのかな☆",
+    "10秒で考えて書いたよ.",
+    "(セルフドリンクサービスはすごく良かったです!種類も豊富。)",
+    "おすすめ度No.1の和室3.5畳はあります。",
+    "この値段で、こんな夕飯いいの？\nって、くらいおいしかった！",
+    "宿を予約しました♪まだ2ヶ月も先だけど。早すぎかな(笑)楽しみです★",
+    "本当?にている。",
+    " \n\n",
+    "吾輩は猫である。名前はまだ無い。どこで生れたかとんと見当がつかぬ。",
+]
+
+
+def make_document(n_sentences: int, seed: int = 0) -> str:
+    __random = random.Random(seed)
+    return "".join(__random.choice(SENTENCES) for _ in range(n_sentences))
+
+
+class TestStreamSegmenter(unittest.TestCase):
+    def test_find_lattice_starts(self):
+        tokenizer = get_janome_tokenizer()
+        text = make_document(200)
+        surfaces = [token.surface for token in tokenizer.tokenize(text)]
+        token_ends = list(itertools.accumulate(len(surface) for surface in surfaces))
+        lattice_starts = find_lattice_starts(text, token_ends, 0)
+        self.assertGreater(len(lattice_starts), 2)
+        for start_index in lattice_starts[1:]:
+            # a text after LATTICE_BREAK has the same tokens as the whole text
+            tokens = []
+            __position = -len(LATTICE_BREAK)
+            for token in tokenizer.tokenize(LATTICE_BREAK + text[start_index:]):
+                if __position >= 0:
+                    tokens.append(token.surface)
+                __position += len(token.surface)
+            self.assertEqual(tokens, surfaces[token_ends.index(start_index) + 1 :], msg=start_index)
+
+    def test_segment_stream(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        __random = random.Random(0)
+        for text in ["  \n" + make_document(150, 1), make_document(150, 2)]:
+            expected = list(splitter(text))
+            chunks = []
+            __start_index = 0
+            while __start_index < len(text):
+                __end_index = __start_index + __random.randint(1, 100)
+                chunks.append(text[__start_index:__end_index])
+                __start_index = __end_index
+            self.assertEqual(list(splitter.segment_stream(chunks, window_size=1500, margin=64)), expected)
+            self.assertEqual(list(splitter.segment_stream(io.StringIO(text), window_size=2000)), expected)
+        for text in ["", " ", "\n\n", "おしまい♪"]:
+            self.assertEqual(list(splitter.segment_stream([text])), list(splitter(text)), msg=text)
+
+    def test_feed(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        text = make_document(100)
+        segmenter = StreamSegmenter(splitter, window_size=1000)
+        sentences = []
+        for __start_index in range(0, len(text), 500):
+            sentences += segmenter.feed(text[__start_index : __start_index + 500])
+            # sentences are emitted before the end of the text
+            self.assertLessEqual(len("".join(sentences)), __start_index + 500)
+        self.assertGreater(len(sentences), 0)
+        sentences += segmenter.close()
+        self.assertEqual(sentences, list(splitter(text)))
+
+    def test_incremental(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        __random = random.Random(0)
+        for text in [make_document(60, 3), "  \n" + make_document(30, 4), "本当?にている。", "おすすめ度No.1"]:
+            segmenter = splitter.incremental_segmenter()
+            sentences = []
+            __start_index = 0
+            while __start_index < len(text):
+                __end_index = __start_index + __random.randint(1, 4)
+                sentences += segmenter.feed(text[__start_index:__end_index])
+                __start_index = __end_index
+            sentences += segmenter.close()
+            self.assertEqual(sentences, list(splitter(text)), msg=text)
+
+    def test_incremental_cost(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        tokenizer = get_janome_tokenizer()
+        text = "  \n" + make_document(50)
+        segmenter = splitter.incremental_segmenter()
+        sentences = []
+        with patch.object(tokenizer, "tokenize", wraps=tokenizer.tokenize) as tokenize:
+            for character in text:
+                sentences += segmenter.feed(character)
+            sentences += segmenter.close()
+        self.assertEqual(sentences, list(splitter(text)))
+        # tokens are tokenized again only around new characters, not from the start of a lattice
+        self.assertLess(sum(len(c.args[0]) for c in tokenize.call_args_list), 16 * len(text))
+
+    def test_incremental_latency(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        segmenter = splitter.incremental_segmenter(lookahead=4)
+        self.assertEqual(segmenter.feed("宿を予約しました♪"), [])
+        self.assertEqual(segmenter.feed("まだ2ヶ月も先だけど。"), ["宿を予約しました♪"])
+        # a boundary is fixed lookahead * 2 characters after it
+        self.assertEqual(segmenter.feed("早すぎかな(笑)楽しみです★"), ["まだ2ヶ月も先だけど。"])
+        self.assertEqual(segmenter.feed("とても"), ["早すぎかな(笑)"])
+        self.assertEqual(segmenter.close(), ["楽しみです★", "とても"])
+        self.assertEqual(splitter.get_lookahead(), DEFAULT_LOOKAHEAD)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            StreamSegmenter(BunkaiSentenceBoundaryDisambiguation(local_morph=True))
+        with self.assertRaises(ValueError):
+            StreamSegmenter(BunkaiSentenceBoundaryDisambiguation(), margin=0)
+        with self.assertRaises(ValueError):
+            StreamSegmenter(BunkaiSentenceBoundaryDisambiguation(), lookahead=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
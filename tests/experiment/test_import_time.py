@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+import unittest
+
+from bunkai.experiment.import_time import get_loaded_modules
+
+
+class TestImportTime(unittest.TestCase):
+    def test_lazy_import(self):
+        self.assertEqual(get_loaded_modules("import bunkai"), [])
+        self.assertEqual(get_loaded_modules("import bunkai.cli"), [])
+        self.assertEqual(get_loaded_modules("from bunkai import Bunkai"), ["janome"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+import unittest
+
+from bunkai.experiment.lbd_benchmark import measure
+
+
+class TestLbdBenchmark(unittest.TestCase):
+    def test_measure(self):
+        batches = []
+        times = measure(batches.append, [["a"], ["b"], ["c"]], buffer_size=2, repeat=2)
+        self.assertEqual(len(times), 2)
+        self.assertEqual(batches, [[["a"], ["b"]], [["c"]]] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+import unittest
+
+from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+from bunkai.experiment.local_morph_benchmark import DEFAULT_DOCUMENTS, measure
+
+
+class TestLocalMorphBenchmark(unittest.TestCase):
+    def test_measure(self):
+        splitter = BunkaiSentenceBoundaryDisambiguation()
+        text = DEFAULT_DOCUMENTS["review"]
+        times, eos = measure(splitter, text, repeat=2)
+        self.assertEqual(len(times), 2)
+        self.assertEqual(eos, splitter.find_eos(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import pathlib
+import tempfile
+import unittest
+
+from bunkai.algorithm.lbd.custom_tokenizers import JanomeSubwordsTokenizer
+
+
+class TestJanomeSubwordsTokenizer(unittest.TestCase):
+    words = ["ホテル", "の", "部屋", "は", "広い", "です", "。", "▁", " ", "未知語", ""]
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_vocab = pathlib.Path(self.tmp_dir.name).joinpath("vocab.txt")
+        vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "ホテル", "部屋", "の", "は", "広", "##い", "です", "。"]
+        self.path_vocab.write_text("\n".join(vocab) + "\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_get_subword_ids(self):
+        """Memoized ids are the same as ids of tokenized subwords."""
+        tokenizer = JanomeSubwordsTokenizer(str(self.path_vocab))
+        uncached = JanomeSubwordsTokenizer(str(self.path_vocab), subword_cache_bytes=0)
+        self.assertIsNone(uncached.subword_cache_stats())
+        for _ in range(2):
+            for word in self.words:
+                expected = tokenizer.convert_tokens_to_ids(tokenizer.tokenize(word))
+                self.assertEqual(tokenizer.get_subword_ids(word), expected)
+                self.assertEqual(uncached.get_subword_ids(word), expected)
+
+        stats = tokenizer.subword_cache_stats()
+        assert stats is not None
+        self.assertEqual((stats.hits, stats.misses, stats.n_items), (len(self.words), len(self.words), len(self.words)))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+        # a returned list does not change the cache
+        tokenizer.get_subword_ids("ホテル").append(0)
+        self.assertEqual(tokenizer.get_subword_ids("ホテル"), tokenizer.convert_tokens_to_ids(["ホテル"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
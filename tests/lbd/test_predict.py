@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import dataclasses
 import pathlib
+import tempfile
 import typing
 import unittest
 from unittest.mock import MagicMock, Mock, patch
@@ -11,9 +12,12 @@ import torch
 import bunkai
 import bunkai.algorithm.lbd.predict
 from bunkai.algorithm.bunkai_sbd.annotator import MorphAnnotatorJanome
+from bunkai.algorithm.lbd.corpus import LABELS
+from bunkai.algorithm.lbd.predict import InputBuffers, generate_initial_annotation_obj, get_length_buckets
+from bunkai.algorithm.lbd.train import BunkaiConfig, MyDataset
 from bunkai.base.annotation import Annotations, SpanAnnotation
 from bunkai.constant import METACHAR_LINE_BREAK
-from bunkai.third.utils_ner import InputFeatures
+from bunkai.third.utils_ner import InputExample, InputFeatures
 
 
 @dataclasses.dataclass
@@ -2120,14 +2124,13 @@ class TestPredictor(unittest.TestCase):
         for test_case in self.test_dataset_distil_bert:
             transformer_predictor_mock = MagicMock()
             transformer_predictor_mock.return_value = test_case.return_value.to_prediction_tuple()
-            bunkai_predictor_mock_split_long_text = Mock(
-                return_value=(test_case.return_value.tokenizer, test_case.return_value.subwords_lengths)
-            )
+            # ids of subwords are dummy since the model is dummy
+            subword_ids = [[[1] * n for n in lengths] for lengths in test_case.return_value.subwords_lengths]
+            bunkai_predictor_mock_split_long_text = Mock(return_value=(test_case.return_value.tokenizer, subword_ids))
 
             from typing import List
 
             from bunkai.algorithm.lbd.custom_tokenizers import JanomeSubwordsTokenizer
-            from bunkai.third.utils_ner import InputExample
 
             # note: this function must be here because this function refers test_case objects.
             def func_dummy_convert_examples_to_features(
@@ -2171,33 +2174,12 @@ class TestPredictor(unittest.TestCase):
                         predictor.tokenizer = MagicMock()
                         predictor.tokenizer.side_effect = DummyJanomeSubwordsTokenizer()
                         predictor.tokenizer.convert_ids_to_tokens.side_effect = convert_ids_to_tokens
+                        predictor.tokenizer.pad_token_id = 0
+                        predictor.tokenizer.cls_token_id = 2
+                        predictor.tokenizer.sep_token_id = 3
                         predictor.device = torch.device("cpu")
 
-                        ret = type(
-                            "Ret",
-                            (object,),
-                            {
-                                "logits": type(
-                                    "Ret2",
-                                    (object,),
-                                    {
-                                        "to": lambda x: type(
-                                            "Ret4",
-                                            (object,),
-                                            {
-                                                "detach": type(
-                                                    "Ret3",
-                                                    (object,),
-                                                    {
-                                                        "numpy": lambda x: test_case.return_value.predictions,
-                                                    },
-                                                )
-                                            },
-                                        )
-                                    },
-                                )
-                            },
-                        )
+                        ret = type("Ret", (object,), {"logits": torch.from_numpy(test_case.return_value.predictions)})
 
                         class DummyModelDistilBert:
                             base_model_prefix = "distilbert"
@@ -2217,6 +2199,7 @@ class TestPredictor(unittest.TestCase):
                             predictor.model = DummyModelDistilBert()  # type: ignore
                         else:
                             raise Exception("unexpected case.")
+                        predictor.input_buffers = InputBuffers(predictor.get_input_names())
 
                         tokenized_layer = self.init_tokenized_layer(test_case.text)
                         tokens = self.reformat_data_structure(tokenized_layer)
@@ -2225,5 +2208,93 @@ class TestPredictor(unittest.TestCase):
                         self.check_all_prediction_point(tokens, res[0])  # type: ignore
 
 
+def save_tiny_model(path: pathlib.Path, texts: typing.List[str], max_seq_length: int) -> None:
+    """Save a randomly initialized model whose vocabulary is characters of texts."""
+    from transformers import BertConfig, BertForTokenClassification
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(set("".join(texts)))
+    path.joinpath("vocab.txt").write_text("\n".join(vocab) + "\n")
+    path.joinpath("labels.txt").write_text("\n".join(LABELS) + "\n")
+    path.joinpath("bunkai.json").write_text(BunkaiConfig(max_seq_length=max_seq_length, base_model="").to_json())
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab) + 2,
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        num_labels=len(LABELS),
+    )
+    BertForTokenClassification(config).save_pretrained(str(path))
+
+
+class TestPredictorInference(unittest.TestCase):
+    texts = [
+        "ラウンジも気軽に利用でき、申し分ないです。▁ホテル内の部屋もゆったりできました。",
+        "朝食は▁和食と洋食から選べます▁",
+        "駅から近い",
+        "▁▁",
+        "お風呂が広くて景色も良かったです。▁" * 8,
+    ]
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        path_model = pathlib.Path(self.tmp_dir.name)
+        save_tiny_model(path_model, self.texts, max_seq_length=32)
+        self.predictor = bunkai.algorithm.lbd.predict.Predictor(path_model, num_threads=1)
+        self.documents = list(generate_initial_annotation_obj(t + "\n" for t in self.texts))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_predict(self):
+        """Batches of any size give the same result while buffers are reused."""
+        self.assertFalse(self.predictor.model.training)
+        expected = [self.predictor.predict([d])[0] for d in self.documents]
+        for batch_size in [len(self.documents), 2, 1]:
+            results = []
+            for i in range(0, len(self.documents), batch_size):
+                results += self.predictor.predict(self.documents[i : i + batch_size])
+            self.assertEqual(results, expected)
+            # windows of documents are grouped by their lengths
+            self.assertEqual(self.predictor.predict(self.documents, batch_size=batch_size), expected)
+        self.assertEqual(self.predictor.predict([]), [])
+        with self.assertRaises(ValueError):
+            self.predictor.predict(self.documents, batch_size=0)
+
+    def test_input_ids(self):
+        """Inputs are the same as features for training."""
+        for document in self.documents:
+            words_list, subword_ids_list = self.predictor._split_long_text(document)
+            examples = [
+                InputExample(guid="", words=words, labels=[LABELS[0]] * len(words), is_document_first=False)
+                for words in words_list
+            ]
+            dataset = MyDataset(examples, self.predictor.labels, 32, self.predictor.tokenizer, False)
+            for feature, subword_ids in zip(dataset.features, subword_ids_list):
+                input_ids = self.predictor._get_input_ids(subword_ids)
+                self.assertEqual(input_ids.tolist(), feature.input_ids[: sum(feature.attention_mask)])
+
+    def test_get_length_buckets(self):
+        self.assertEqual(get_length_buckets([5, 2, 9, 2, 7], 2), [[1, 3], [0, 4], [2]])
+        self.assertEqual(get_length_buckets([5, 2, 9], None), [[1, 0, 2]])
+        self.assertEqual(get_length_buckets([], None), [])
+
+    def test_input_buffers(self):
+        buffers = InputBuffers(["input_ids", "attention_mask"])
+        views = buffers.get(2, 3)
+        self.assertEqual([v.shape for v in views.values()], [(2, 3), (2, 3)])
+        views["input_ids"][:] = 1
+        # a smaller batch reuses the array
+        self.assertTrue(numpy.shares_memory(buffers.get(1, 4)["input_ids"], views["input_ids"]))
+        self.assertEqual(buffers.get(4, 5)["input_ids"].shape, (4, 5))
+
+    def test_num_threads(self):
+        with self.assertRaises(ValueError):
+            bunkai.algorithm.lbd.predict.set_num_threads(num_threads=0)
+        bunkai.algorithm.lbd.predict.set_num_threads(num_threads=1)
+        self.assertEqual(torch.get_num_threads(), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import time
+import typing
+import unittest
+
+"""This module checks that a function runs in linear time without a wall-clock ceiling"""
+
+# inputs are made GROWTH_FACTOR times longer. A quadratic function slows down GROWTH_FACTOR ** 2 times.
+GROWTH_FACTOR: int = 4
+MAX_GROWTH_RATIO: float = GROWTH_FACTOR * 2.5
+
+
+def get_min_time(func: typing.Callable[[], typing.Any], repeat: int) -> float:
+    """Get the shortest wall-clock time of repeat runs, which is the least affected by other processes."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def assert_linear_time(
+    test_case: unittest.TestCase,
+    func: typing.Callable[[str], typing.Any],
+    make_inputs: typing.Callable[[int], typing.Dict[str, str]],
+    length: int,
+    *,
+    repeat: int = 3,
+) -> None:
+    """
+    Check that func slows down linearly when inputs get GROWTH_FACTOR times longer.
+
+    Only the ratio of times is compared, so a slow machine does not make it fail.
+
+    :param make_inputs: a function returning named inputs of about the given length.
+    """
+    short_inputs = make_inputs(length)
+    long_inputs = make_inputs(length * GROWTH_FACTOR)
+    for name, text in short_inputs.items():
+        short_time = get_min_time(lambda: func(text), repeat)
+        long_text = long_inputs[name]
+        long_time = get_min_time(lambda: func(long_text), repeat)
+        test_case.assertLess(long_time / max(short_time, 1e-6), MAX_GROWTH_RATIO, msg=name)
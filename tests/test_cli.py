@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
+import argparse
+import tempfile
 import unittest
 from collections import namedtuple
+from pathlib import Path
 
 import bunkai.constant
 from bunkai import cli as cli_module
 from bunkai.algorithm.bunkai_sbd.bunkai_sbd import BunkaiSentenceBoundaryDisambiguation
+from bunkai.base.cache import SqliteSegmentationCache
 
 NewlineTestCase = namedtuple("NewlineTestCase", ("text", "n_sentences", "return_value"))
 
@@ -33,6 +37,56 @@ class TestCli(unittest.TestCase):
             outsents = output.split(bunkai.constant.METACHAR_SENTENCE_BOUNDARY)
             self.assertEqual(len(outsents), test_case.n_sentences, msg=f"false sentence split={output}")
 
+    def test_positive_int(self):
+        self.assertEqual(cli_module.positive_int("4"), 4)
+        for value in ("0", "-4"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                cli_module.positive_int(value)
+        with self.assertRaises(ValueError):
+            cli_module.positive_int("x")
+
+    def test_get_shards(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir).joinpath("input.txt")
+            data = "".join(f"{i}行目です。\n" for i in range(100)).encode("utf8") + "最後の行".encode("utf8")
+            path.write_bytes(data)
+            shards = cli_module.get_shards(path, 7)
+            self.assertEqual(b"".join(data[start:end] for _, start, end in shards), data)
+            for _, start, end in shards[:-1]:
+                self.assertEqual(data[end - 1 : end], b"\n")
+
+            path.write_bytes(b"")
+            self.assertEqual(cli_module.get_shards(path, 7), [])
+
+    def test_run_parallel(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_in = Path(tmpdir).joinpath("input.txt")
+            lines = [test_case.text for test_case in self.seq_test_case] * 5
+            path_in.write_text("\n".join(lines) + "\n")
+            path_out = Path(tmpdir).joinpath("output.txt")
+            cli_module.run_parallel(BunkaiSentenceBoundaryDisambiguation, None, path_in, path_out, False, 2)
+
+            model = BunkaiSentenceBoundaryDisambiguation(path_model=None)
+            expected = "".join("".join(cli_module.run(model, line)) for line in lines)
+            self.assertEqual(path_out.read_text(), expected)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_in = Path(tmpdir).joinpath("input.txt")
+            lines = [test_case.text for test_case in self.seq_test_case]
+            path_in.write_text("\n".join(lines) + "\n")
+            path_out = Path(tmpdir).joinpath("output.txt")
+            path_cache = Path(tmpdir).joinpath("cache.sqlite3")
+            cache = SqliteSegmentationCache(path_cache)
+            cli_module.run_parallel(BunkaiSentenceBoundaryDisambiguation, None, path_in, path_out, False, 2, cache)
+            self.assertEqual(cache.stats().n_items, len(lines))
+
+            # results of worker processes are reused
+            model = BunkaiSentenceBoundaryDisambiguation(path_model=None, cache=cache)
+            expected = "".join("".join(cli_module.run(model, line)) for line in lines)
+            self.assertEqual(path_out.read_text(), expected)
+            self.assertEqual((cache.hits, cache.misses), (len(lines), 0))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import random
+import re
+import typing
+import unittest
+
+from bunkai.algorithm.tsunoda_sbd.annotator import constant
+from bunkai.algorithm.tsunoda_sbd.annotator.replace_parentheses import ExceptionParentheses, find_parentheses
+from bunkai.base.annotation import SpanAnnotation
+from tests.linear_time import assert_linear_time
+
+EXCLUDED_CHARACTERS: str = constant.PARENTHESES_EXCLUDED_CHARACTERS
+
+
+class TestExceptionParentheses(unittest.TestCase):
+    def test_find_parentheses(self):
+        __random = random.Random(0)
+        alphabet = "(()))笑泣涙あa\n"
+        texts = ["(笑)(あ笑)(あ)", "())", "(\n)(あ\n)", "((((あ)"]
+        texts += ["".join(__random.choice(alphabet) for _ in range(__random.randint(0, 16))) for _ in range(3000)]
+        for text in texts:
+            self.assertEqual(
+                list(find_parentheses(text, EXCLUDED_CHARACTERS, EXCLUDED_CHARACTERS)),
+                [m.span() for m in re.finditer(constant.SPANS_PARENTHESES1_REGEXP, text)],
+                msg=text,
+            )
+            self.assertEqual(
+                list(find_parentheses(text, EXCLUDED_CHARACTERS)),
+                [m.span() for m in re.finditer(constant.SPANS_PARENTHESES2_REGEXP, text)],
+                msg=text,
+            )
+            self.assertEqual(next(find_parentheses(text), None) is not None, re.search(r"\(.+\)", text) is not None)
+
+    def test_replace_parentheses(self):
+        annotator = ExceptionParentheses()
+        text = "(近日中です。)いい!(種類も豊富!良い!)はい(笑)"
+
+        def make_span(start_index: int) -> SpanAnnotation:
+            return SpanAnnotation("BasicRule", start_index, start_index + 1, "。", text[start_index])
+
+        split_points = [make_span(i) for i, c in enumerate(text) if c in "。!"]
+        no1 = annotator.replace_parentheses_no1(text, split_points)
+        self.assertEqual(
+            [(s.end_index, s.split_string_type) for s in no1],
+            [(8, "parentheses-sentence"), (11, "。"), (18, "。"), (21, "。")],
+        )
+        no2 = annotator.replace_parentheses_no2(text, no1)
+        self.assertEqual([s.end_index for s in no2], [18, 21, 8, 11])
+
+    def test_pathological_inputs(self):
+        def make_inputs(n: int) -> typing.Dict[str, str]:
+            return {
+                "opens": "(" * n,
+                "opens_with_closes_after_newlines": "(" * n + "\n)" * n,
+                "nested": "(" * (n // 2) + ")" * (n // 2),
+                "sentences": "(あ。)" * (n // 4),
+            }
+
+        annotator = ExceptionParentheses()
+
+        def annotate(text: str) -> None:
+            split_points = [
+                SpanAnnotation("BasicRule", i, i + 1, text[i], text[i]) for i, c in enumerate(text) if c in "。)"
+            ]
+            annotator.replace_parentheses_no2(text, annotator.replace_parentheses_no1(text, split_points))
+
+        assert_linear_time(self, annotate, make_inputs, 20000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,6 +41,12 @@ class TestTsukubaSplitter(unittest.TestCase):
         self.assertEqual(len(splitter_obj.find_eos(test_sentence_1_ok)), 7)
         self.assertEqual(len(list(splitter_obj(test_sentence_1_ok))), 7)
 
+    def test_batch(self):
+        splitter_obj = TsunodaSentenceBoundaryDisambiguation()
+        texts = ["これ、テスト文なんですけど(笑)本当?にこんなテキストでいいのかな☆", "おしまい♪", "", "おしまい♪"]
+        self.assertEqual(splitter_obj.find_eos_batch(texts), [splitter_obj.find_eos(text) for text in texts])
+        self.assertEqual(splitter_obj.segment_batch(texts), [list(splitter_obj(text)) for text in texts])
+
 
 if __name__ == "__main__":
     unittest.main()